@@ -2,16 +2,20 @@ from drf_spectacular.utils import extend_schema, OpenApiResponse
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from barter_platform.idempotency import IDEMPOTENCY_KEY_PARAMETER, idempotent
+
 from .serializers import UserSerializer
 
 
 class RegisterAPIView(APIView):
+    throttle_scope = 'registration'
 
     @extend_schema(
         tags=['Регистрация и аутентификация'],
         summary='Зарегистрировать пользователя',
         description='Введите имя пользователя и пароль',
         request=UserSerializer,
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={
             201: OpenApiResponse(
                 response=UserSerializer,
@@ -22,7 +26,7 @@ class RegisterAPIView(APIView):
             )
         }
     )
-
+    @idempotent
     def post(self, request):
         serializer = UserSerializer(data=request.data)
         if serializer.is_valid():
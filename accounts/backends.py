@@ -0,0 +1,21 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.backends import ModelBackend
+
+from .cache import get_cached_user, set_cached_user
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша, а не из БД."""
+
+    def get_user(self, user_id):
+        user, version = get_cached_user(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                set_cached_user(user, version)
+            return user
+        # Та же проверка, что делает ModelBackend.get_user для пользователя из БД.
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        return await sync_to_async(self.get_user)(user_id)
@@ -0,0 +1,84 @@
+import copy
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from barter_platform.cache import LocalLRUCache
+
+
+USER_CACHE_KEY = 'accounts.user:{}'
+VERSION_KEY = '{}:version'
+
+local_users = LocalLRUCache(
+    max_size=settings.USER_CACHE_LOCAL_SIZE,
+    timeout=settings.USER_CACHE_LOCAL_TIMEOUT,
+)
+local_sessions = LocalLRUCache(
+    max_size=settings.SESSION_CACHE_LOCAL_SIZE,
+    timeout=settings.SESSION_CACHE_LOCAL_TIMEOUT,
+)
+
+
+def current_version(key):
+    """
+    Версия записи в общем кэше. Записи локальных LRU хранятся вместе с
+    версией, при которой они прочитаны, и при расхождении не используются —
+    так сброс в одном процессе доходит до всех остальных.
+    """
+    return cache.get(VERSION_KEY.format(key))
+
+
+async def acurrent_version(key):
+    return await cache.aget(VERSION_KEY.format(key))
+
+
+def bump_version(key, timeout):
+    cache.set(VERSION_KEY.format(key), uuid.uuid4().hex, timeout)
+
+
+async def abump_version(key, timeout):
+    await cache.aset(VERSION_KEY.format(key), uuid.uuid4().hex, timeout)
+
+
+def get_local(local, key, version):
+    entry = local.get(key)
+    if entry is None:
+        return None
+    if entry[0] != version:
+        local.delete(key)
+        return None
+    return entry[1]
+
+
+def get_cached_user(user_id):
+    """Возвращает (пользователь или None, версия); версию передают в set_cached_user."""
+    key = USER_CACHE_KEY.format(user_id)
+    version = current_version(key)
+    user = get_local(local_users, key, version)
+    if user is None:
+        entry = cache.get(key)
+        if entry is not None and entry[0] == version:
+            user = entry[1]
+            local_users.set(key, entry)
+    return (copy.copy(user) if user is not None else None), version
+
+
+def set_cached_user(user, version):
+    """
+    Кэширует пользователя, прочитанного из БД при версии version: если
+    между чтением версии и записью кэш сбросили, запись сразу устареет.
+    """
+    key = USER_CACHE_KEY.format(user.pk)
+    entry = (version, user)
+    cache.set(key, entry, settings.USER_CACHE_TIMEOUT)
+    local_users.set(key, entry)
+
+
+def invalidate_user(user_id):
+    key = USER_CACHE_KEY.format(user_id)
+    # Версия живёт не меньше записи в общем кэше, иначе опоздавшая запись
+    # со старой версией снова стала бы актуальной.
+    bump_version(key, settings.USER_CACHE_TIMEOUT)
+    local_users.delete(key)
+    cache.delete(key)
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core import checks
+
+
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Версии кэша пользователей и сессий хранятся в кэше default: если он свой у
+    каждого процесса, сброс (смена пароля, блокировка, выход) не доходит до
+    остальных воркеров и они до USER_CACHE_TIMEOUT отдают устаревшие данные.
+    """
+    uses_local_copies = (
+        settings.SESSION_ENGINE == 'accounts.sessions'
+        or 'accounts.backends.CachedModelBackend' in settings.AUTHENTICATION_BACKENDS
+    )
+    backend = settings.CACHES['default']['BACKEND']
+    if not uses_local_copies or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    message = f'Кэш default ({backend}) не общий для процессов, а его используют кэши пользователей и сессий.'
+    hint = 'Задайте CACHE_BACKEND и CACHE_LOCATION общего кэша, например Redis.'
+    if settings.DEBUG:
+        # Сервер разработки — один процесс, для него локального кэша достаточно.
+        return [checks.Warning(message, hint=hint, id='accounts.W001')]
+    return [checks.Error(message, hint=hint, id='accounts.E001')]
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+from .cache import abump_version, acurrent_version, bump_version, current_version, get_local, local_sessions
+
+
+# Версия должна пережить локальные записи, прочитанные до её смены.
+VERSION_TIMEOUT = settings.SESSION_CACHE_LOCAL_TIMEOUT * 2
+
+
+class SessionStore(CachedDBStore):
+    """
+    Сессии cached_db с дополнительным LRU-кэшем в памяти процесса. Изменение
+    или удаление сессии меняет её версию в общем кэше, и локальные копии в
+    других процессах перестают использоваться.
+    """
+
+    def load(self):
+        key = self.cache_key
+        version = current_version(key)
+        data = get_local(local_sessions, key, version)
+        if data is None:
+            data = super().load()
+            if data:
+                local_sessions.set(key, (version, data))
+        return dict(data)
+
+    async def aload(self):
+        key = await self.acache_key()
+        version = await acurrent_version(key)
+        data = get_local(local_sessions, key, version)
+        if data is None:
+            data = await super().aload()
+            if data:
+                local_sessions.set(key, (version, data))
+        return dict(data)
+
+    def save(self, must_create=False):
+        super().save(must_create)
+        self._invalidate(self.cache_key)
+
+    def delete(self, session_key=None):
+        if session_key is None and self.session_key is None:
+            return
+        self._invalidate(self.cache_key_prefix + (session_key or self.session_key))
+        super().delete(session_key)
+
+    async def asave(self, must_create=False):
+        await super().asave(must_create)
+        await self._ainvalidate(await self.acache_key())
+
+    async def adelete(self, session_key=None):
+        if session_key is None and self.session_key is None:
+            return
+        await self._ainvalidate(self.cache_key_prefix + (session_key or self.session_key))
+        await super().adelete(session_key)
+
+    def _invalidate(self, key):
+        bump_version(key, VERSION_TIMEOUT)
+        local_sessions.delete(key)
+
+    async def _ainvalidate(self, key):
+        await abump_version(key, VERSION_TIMEOUT)
+        local_sessions.delete(key)
@@ -0,0 +1,134 @@
+from django.contrib.auth import get_user
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory
+
+import pytest
+
+from accounts.cache import USER_CACHE_KEY, bump_version, local_sessions, local_users
+from accounts.checks import check_shared_cache
+from accounts.sessions import SessionStore
+
+
+@pytest.fixture
+def user(db):
+    """Создание пользователя для тестов."""
+    return User.objects.create_user(username='cached_user', password='cachedpass')
+
+
+@pytest.fixture
+def session_request(client, user):
+    """Запрос с сессией залогиненного пользователя."""
+    client.login(username='cached_user', password='cachedpass')
+    request = RequestFactory().get('/')
+    request.session = SessionStore(client.session.session_key)
+    return request
+
+
+def make_request(session_key):
+    request = RequestFactory().get('/')
+    request.session = SessionStore(session_key)
+    return request
+
+
+@pytest.mark.django_db
+def test_user_resolved_without_queries(session_request, django_assert_num_queries):
+    """Тест: после прогрева кэша пользователь сессии определяется без запросов к БД."""
+    assert get_user(session_request).username == 'cached_user'
+
+    with django_assert_num_queries(0):
+        user = get_user(make_request(session_request.session.session_key))
+    assert user.username == 'cached_user'
+
+
+@pytest.mark.django_db
+def test_user_resolved_from_shared_cache(session_request, django_assert_num_queries):
+    """Тест: при пустом локальном LRU данные берутся из общего кэша."""
+    get_user(session_request)
+    local_users.clear()
+    local_sessions.clear()
+
+    with django_assert_num_queries(0):
+        user = get_user(make_request(session_request.session.session_key))
+    assert user.username == 'cached_user'
+
+
+@pytest.mark.django_db
+def test_user_save_invalidates_cache(session_request, user):
+    """Тест сброса кэша при сохранении пользователя."""
+    get_user(session_request)
+    user.first_name = 'Новое имя'
+    user.save()
+
+    assert local_users.get(USER_CACHE_KEY.format(user.pk)) is None
+    assert get_user(make_request(session_request.session.session_key)).first_name == 'Новое имя'
+
+
+@pytest.mark.django_db
+def test_logout_invalidates_cache(client, session_request, user):
+    """Тест сброса кэша пользователя и сессии при выходе."""
+    get_user(session_request)
+    session_key = session_request.session.session_key
+    client.post('/accounts/logout/')
+
+    assert local_users.get(USER_CACHE_KEY.format(user.pk)) is None
+    assert not get_user(make_request(session_key)).is_authenticated
+
+
+@pytest.mark.django_db
+def test_invalidation_reaches_other_processes(session_request, user):
+    """Тест: сброс в другом процессе (смена версии в общем кэше) отменяет локальную копию."""
+    get_user(session_request)
+    key = USER_CACHE_KEY.format(user.pk)
+    assert local_users.get(key) is not None
+
+    User.objects.filter(pk=user.pk).update(first_name='Из другого процесса')
+    bump_version(key, 60)
+    cache.delete(key)
+
+    assert get_user(make_request(session_request.session.session_key)).first_name == 'Из другого процесса'
+
+
+@pytest.mark.django_db
+def test_session_change_reaches_other_processes(session_request):
+    """Тест: изменённая в другом процессе сессия не читается из локального LRU."""
+    session_key = session_request.session.session_key
+    store = SessionStore(session_key)
+    store.load()
+    stale = local_sessions.get(store.cache_key)
+
+    other = SessionStore(session_key)
+    other['marker'] = 'changed'
+    other.save()
+    # Локальный LRU этого процесса о сохранении не знает.
+    local_sessions.set(store.cache_key, stale)
+
+    assert SessionStore(session_key).load()['marker'] == 'changed'
+
+
+@pytest.mark.django_db
+def test_inactive_user_rejected_on_cache_hit(session_request, user):
+    """Тест: пользователь из кэша проходит ту же проверку is_active, что и из БД."""
+    get_user(session_request)
+    cached = local_users.get(USER_CACHE_KEY.format(user.pk))[1]
+    cached.is_active = False
+
+    assert not get_user(make_request(session_request.session.session_key)).is_authenticated
+
+
+def test_process_local_cache_rejected(settings):
+    """Тест: с LocMemCache кэши пользователей и сессий не проходят системную проверку."""
+    settings.DEBUG = False
+    assert [error.id for error in check_shared_cache(None)] == ['accounts.E001']
+
+    settings.DEBUG = True
+    assert [error.id for error in check_shared_cache(None)] == ['accounts.W001']
+
+
+def test_shared_cache_accepted(settings):
+    """Тест: с общим кэшем проверка проходит."""
+    settings.DEBUG = False
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/0',
+    }}
+    assert check_shared_cache(None) == []
@@ -2,8 +2,11 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import reverse_lazy
 from django.views import generic
 
+from barter_platform.throttling import ThrottleMixin
 
-class SignUpView(generic.CreateView):
+
+class SignUpView(ThrottleMixin, generic.CreateView):
+    throttle_scope = 'registration'
     form_class = UserCreationForm
     success_url = reverse_lazy('ads:ad_list')
     template_name = 'registration/signup.html'
@@ -1,13 +1,64 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
 
+from .bulk import set_proposals_status
 from .models import Ad, ExchangeProposal
+from .pagination import WindowedPaginator
 
 
 @admin.register(Ad)
 class AdAdmin(admin.ModelAdmin):
-    list_display = ['title', 'created_at']
+    list_display = [
+        'title', 'user', 'category', 'condition', 'received_proposals_count', 'created_at', 'expires_at', 'is_active',
+    ]
+    list_filter = ['is_active', 'condition', 'category']
+    list_select_related = ['user']
+    search_fields = ['=id', '^title']
+    raw_id_fields = ['user']
+    readonly_fields = [
+        'received_proposals_count', 'sent_proposals_count', 'pending_proposals_count', 'last_proposal_at',
+    ]
+    show_full_result_count = False
+    paginator = WindowedPaginator
+
+
+def _set_status(modeladmin, request, queryset, status):
+    updated = set_proposals_status(queryset, status)
+    modeladmin.message_user(request, f'Обновлено предложений: {updated}', messages.SUCCESS)
 
 
 @admin.register(ExchangeProposal)
-class ExchangeProposal(admin.ModelAdmin):
-    pass
+class ExchangeProposalAdmin(admin.ModelAdmin):
+    list_display = ['id', 'ad_sender', 'ad_receiver', 'status', 'created_at']
+    list_filter = ['status']
+    list_select_related = ['ad_sender', 'ad_receiver']
+    search_fields = ['=id']
+    autocomplete_fields = ['ad_sender', 'ad_receiver']
+    show_full_result_count = False
+    paginator = WindowedPaginator
+    actions = ['mark_accepted', 'mark_rejected', 'mark_pending']
+    delete_batch_size = 500
+
+    @admin.action(description='Принять выбранные предложения', permissions=['change'])
+    def mark_accepted(self, request, queryset):
+        _set_status(self, request, queryset, 'accepted')
+
+    @admin.action(description='Отклонить выбранные предложения', permissions=['change'])
+    def mark_rejected(self, request, queryset):
+        _set_status(self, request, queryset, 'rejected')
+
+    @admin.action(description='Вернуть выбранные предложения в ожидание', permissions=['change'])
+    def mark_pending(self, request, queryset):
+        _set_status(self, request, queryset, 'pending')
+
+    def delete_queryset(self, request, queryset):
+        """
+        Удаление после стандартной страницы подтверждения. Объекты удаляются
+        пачками по id, каждая в своей транзакции, чтобы большая выборка не
+        загружалась целиком и не держала блокировки; счётчики, журнал
+        изменений и сводки обновляют сигналы удаления.
+        """
+        ids = list(queryset.values_list('pk', flat=True))
+        for start in range(0, len(ids), self.delete_batch_size):
+            with transaction.atomic():
+                ExchangeProposal.objects.filter(pk__in=ids[start:start + self.delete_batch_size]).delete()
@@ -5,6 +5,9 @@ from .api_views import (
     AdListCreateView,
     ExchangeProposalListCreate,
     ExchangeProposalDeleteUpdate,
+    ChangesFeedView,
+    BatchView,
+    MySummaryView,
 )
 
 
@@ -12,5 +15,8 @@ urlpatterns = [
     path('ads/', AdListCreateView.as_view(), name='ads_list_create'),
     path('ads/<int:pk>/', AdUpdateDeleteView.as_view(), name='ad_update_delete'),
     path('proposals/', ExchangeProposalListCreate.as_view(), name='proposals_list_create'),
-    path('proposals/<int:pk>/', ExchangeProposalDeleteUpdate.as_view(), name='proposal_delete_update')
+    path('proposals/<int:pk>/', ExchangeProposalDeleteUpdate.as_view(), name='proposal_delete_update'),
+    path('changes/', ChangesFeedView.as_view(), name='changes_feed'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('me/summary/', MySummaryView.as_view(), name='my_summary'),
 ]
@@ -1,39 +1,107 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Q
 
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from rest_framework import status
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from barter_platform.idempotency import IDEMPOTENCY_KEY_PARAMETER, idempotent
+
+from .batch import IDS_DESCRIPTION, fetch_by_ids, run_batch
+from .changes import ExpiredToken, InvalidToken, changes_since, latest_token
+from .concurrency import VersionConflict, if_match_version, version_etag
 from .models import Ad, ExchangeProposal
+from .ownership import get_owned_object
+from .pagination import ProposalCursorPagination
 from .serializers import (
+    AdFilterSerializer,
     AdSerializer,
+    BatchRequestSerializer,
+    ExchangeProposalFilterSerializer,
     ExchangeProposalSerializer,
     SpecialExchangeProposalSerializer,
 )
+from .summary import get_user_summary
+from .trending import trending
 
 
 User = get_user_model()
 
+IF_MATCH_PARAMETER = OpenApiParameter(
+    'If-Match',
+    OpenApiTypes.STR,
+    location=OpenApiParameter.HEADER,
+    description='ETag из предыдущего ответа: изменение применится, только если объект с тех пор не меняли',
+)
+
+
+def with_etag(response, instance):
+    response['ETag'] = version_etag(instance)
+    return response
+
+
+def save_if_match(request, serializer):
+    """
+    Сохраняет объект одним условным UPDATE по версии из If-Match. Если объект
+    успели изменить, возвращает 412 вместо перезаписи чужих изменений.
+    """
+    expected = if_match_version(request, serializer.instance)
+    if expected is not None:
+        serializer.instance.expect_version(expected)
+    try:
+        serializer.save()
+    except VersionConflict:
+        return Response(
+            {'detail': 'Объект изменён другим запросом, получите актуальную версию.'},
+            status=status.HTTP_412_PRECONDITION_FAILED,
+        )
+    return with_etag(Response(serializer.data, status=status.HTTP_200_OK), serializer.instance)
+
 
 class AdListCreateView(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
+    throttle_scope = 'ads_create'
 
     @extend_schema(
         tags=['Объявления'],
         summary='Получить все объявления',
-        description='Получение всех объявлений',
+        description=(
+            'Получение всех объявлений или только перечисленных в параметре ids. '
+            'С sort=trending — первые limit объявлений по рейтингу «в тренде».'
+        ),
+        parameters=[
+            AdFilterSerializer,
+            OpenApiParameter('ids', OpenApiTypes.STR, description=IDS_DESCRIPTION),
+        ],
         responses={
             200: OpenApiResponse(
                 response=AdSerializer(many=True),
                 description='Объявления успешно получены'
             ),
+            400: OpenApiResponse(description='Неверные параметры фильтрации'),
         }
     )
     def get(self, request):
-        ads = Ad.objects.all().order_by('id')
+        if 'ids' in request.query_params:
+            return Response(fetch_by_ids(Ad.objects.all(), AdSerializer, request.query_params['ids']))
+
+        filters = AdFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+        category = filters.validated_data.get('category')
+
+        if filters.validated_data.get('sort') == 'trending':
+            ads = trending(Ad.objects.active(), category)[:filters.validated_data['limit']]
+            return Response(AdSerializer(ads, many=True).data)
+
+        ads = Ad.objects.active().order_by('id')
+        if category:
+            ads = ads.filter(category=category)
         if not ads.exists():
             raise NotFound('Объявления не найдены.')
         serializer = AdSerializer(ads, many=True)
@@ -44,11 +112,13 @@ class AdListCreateView(APIView):
         summary='Создать новое объявление',
         description='Только авторизованный пользователь может создать объявление.',
         request=AdSerializer,
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={
             201: OpenApiResponse(response=AdSerializer, description='Объявление успешно создано'),
             400: OpenApiResponse(description='Неверные данные')
         }
     )
+    @idempotent
     def post(self, request):
         serializer = AdSerializer(data=request.data)
         if serializer.is_valid():
@@ -61,32 +131,48 @@ class AdUpdateDeleteView(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     @staticmethod
-    def get_object(pk, user):
+    def get_object(request, pk):
         try:
-            ad = Ad.objects.get(pk=pk)
-            if ad.user != user:
-                raise PermissionError('Вы не можете выполнить это действие с чужим объявлением.')
-            return ad
+            ad = get_owned_object(request, Ad.objects.all(), pk)
         except Ad.DoesNotExist:
             raise Ad.DoesNotExist('Объявление с указанным ID не найдено.')
+        if not ad.is_owner:
+            raise PermissionError('Вы не можете выполнить это действие с чужим объявлением.')
+        return ad
+
+    @extend_schema(
+        tags=['Объявления'],
+        summary='Получить объявление',
+        description='Получение объявления; заголовок ETag содержит его версию',
+        responses={
+            200: OpenApiResponse(response=AdSerializer, description='Объявление успешно получено'),
+            404: OpenApiResponse(description='Объявление с указанным ID не найдено')
+        }
+    )
+    def get(self, request, pk):
+        ad = Ad.objects.filter(pk=pk).first()
+        if ad is None:
+            return Response({'detail': 'Объявление с указанным ID не найдено.'}, status=status.HTTP_404_NOT_FOUND)
+        return with_etag(Response(AdSerializer(ad).data), ad)
 
     @extend_schema(
         tags=['Объявления'],
         summary='Редактировать объявление',
         description='Редактирование объявления',
         request=AdSerializer,
+        parameters=[IF_MATCH_PARAMETER],
         responses={
             201: OpenApiResponse(response=AdSerializer, description='Объявление успешно отредактировано'),
-            400: OpenApiResponse(description='Неверные данные')
+            400: OpenApiResponse(description='Неверные данные'),
+            412: OpenApiResponse(description='Объявление изменено после получения ETag'),
         }
     )
     def patch(self, request, pk):
         try:
-            ad = self.get_object(pk, request.user)
+            ad = self.get_object(request, pk)
             serializer = AdSerializer(ad, data=request.data, partial=True)
             if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_200_OK)
+                return save_if_match(request, serializer)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Ad.DoesNotExist as e:
             return Response({'detail': str(e)}, status=status.HTTP_404_NOT_FOUND)
@@ -105,7 +191,7 @@ class AdUpdateDeleteView(APIView):
     )
     def delete(self, request, pk):
         try:
-            ad = self.get_object(pk, request.user)
+            ad = self.get_object(request, pk)
             ad.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Ad.DoesNotExist as e:
@@ -116,31 +202,79 @@ class AdUpdateDeleteView(APIView):
 
 class ExchangeProposalListCreate(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
+    throttle_scope = 'proposals_create'
+
+    @staticmethod
+    def get_queryset(user, filters):
+        """Предложения с участием пользователя: отправленные с его объявлений или на них."""
+        if not user.is_authenticated:
+            return ExchangeProposal.objects.none()
+
+        own_ads = Ad.objects.filter(user=user).values('pk')
+        direction = filters.get('direction')
+        if direction == 'incoming':
+            queryset = ExchangeProposal.objects.filter(ad_receiver__in=own_ads)
+        elif direction == 'outgoing':
+            queryset = ExchangeProposal.objects.filter(ad_sender__in=own_ads)
+        else:
+            queryset = ExchangeProposal.objects.filter(Q(ad_sender__in=own_ads) | Q(ad_receiver__in=own_ads))
+
+        if 'status' in filters:
+            queryset = queryset.filter(status=filters['status'])
+        if 'ad_sender' in filters:
+            queryset = queryset.filter(ad_sender_id=filters['ad_sender'])
+        if 'ad_receiver' in filters:
+            queryset = queryset.filter(ad_receiver_id=filters['ad_receiver'])
+        if 'created_after' in filters:
+            queryset = queryset.filter(created_at__gt=filters['created_after'])
+        return queryset
 
     @extend_schema(
         tags=['Предложения обмена'],
-        summary='Получить все предложения обмена',
-        description='Получить все предложения обмена',
+        summary='Получить предложения обмена',
+        description=(
+            'Предложения, в которых участвуют объявления текущего пользователя, с курсорной пагинацией. '
+            'Параметр ids возвращает только перечисленные предложения.'
+        ),
         request=None,
+        parameters=[
+            ExchangeProposalFilterSerializer,
+            OpenApiParameter('ids', OpenApiTypes.STR, description=IDS_DESCRIPTION),
+        ],
         responses={
-            200: OpenApiResponse(description='Предложения успешно получены',),
+            200: OpenApiResponse(
+                response=ExchangeProposalSerializer(many=True),
+                description='Предложения успешно получены',
+            ),
+            400: OpenApiResponse(description='Неверные параметры фильтрации'),
         }
     )
     def get(self, request):
-        exchange_proposals = ExchangeProposal.objects.all()
-        serializer = ExchangeProposalSerializer(exchange_proposals, many=True)
-        return Response(serializer.data)
+        filters = ExchangeProposalFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.get_queryset(request.user, filters.validated_data)
+
+        if 'ids' in request.query_params:
+            return Response(fetch_by_ids(queryset, ExchangeProposalSerializer, request.query_params['ids']))
+
+        paginator = ProposalCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = ExchangeProposalSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @extend_schema(
         tags=['Предложения обмена'],
         summary='Создать новое предложение обмена',
         description='Создание нового предложения обмена',
         request=ExchangeProposalSerializer,
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={
             201: OpenApiResponse(response=ExchangeProposalSerializer, description='Предложение успешно создано'),
             400: OpenApiResponse(description='Неверные данные')
         }
     )
+    @idempotent
     def post(self, request):
         serializer = ExchangeProposalSerializer(data=request.data)
         if serializer.is_valid():
@@ -165,8 +299,10 @@ class ExchangeProposalDeleteUpdate(APIView):
     )
     def delete(self, request, pk):
         try:
-            exchange_proposal = ExchangeProposal.objects.get(pk=pk)
-            if request.user != exchange_proposal.ad_sender.user:
+            exchange_proposal = get_owned_object(
+                request, ExchangeProposal.objects.all(), pk, owner_field='ad_sender__user'
+            )
+            if not exchange_proposal.is_owner:
                 return Response(
                     {'detail': 'Вы не можете удалить чужое предложение.'},
                     status=status.HTTP_403_FORBIDDEN
@@ -183,24 +319,44 @@ class ExchangeProposalDeleteUpdate(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+    @extend_schema(
+        tags=['Предложения обмена'],
+        summary='Получить предложение обмена',
+        description='Предложение доступно отправителю и получателю; заголовок ETag содержит его версию',
+        responses={
+            200: OpenApiResponse(response=ExchangeProposalSerializer, description='Предложение успешно получено'),
+            404: OpenApiResponse(description='Предложение с указанным ID не найдено'),
+        }
+    )
+    def get(self, request, pk):
+        proposal = ExchangeProposal.objects.filter(
+            Q(ad_sender__user=request.user) | Q(ad_receiver__user=request.user), pk=pk
+        ).first()
+        if proposal is None:
+            return Response({'detail': 'Предложение с указанным ID не найдено.'}, status=status.HTTP_404_NOT_FOUND)
+        return with_etag(Response(ExchangeProposalSerializer(proposal).data), proposal)
+
     @extend_schema(
         tags=['Предложения обмена'],
         summary='Обновить статус предложение обмена',
         description='Обновить статус предложения может пользователь, получивший предложение',
         request=SpecialExchangeProposalSerializer,
+        parameters=[IF_MATCH_PARAMETER],
         responses={
             200: OpenApiResponse(description='Статус предложения успешно обновлен'),
             400: OpenApiResponse(description='Неверные данные'),
             404: OpenApiResponse(description='Объявление с указанным ID не найдено'),
             403: OpenApiResponse(description='Доступ запрещён'),
-
+            412: OpenApiResponse(description='Предложение изменено после получения ETag'),
         }
     )
     def patch(self, request, pk):
         allowed_field = 'status'
         try:
-            exchange_proposal = ExchangeProposal.objects.get(pk=pk)
-            if request.user != exchange_proposal.ad_receiver.user:
+            exchange_proposal = get_owned_object(
+                request, ExchangeProposal.objects.all(), pk, owner_field='ad_receiver__user'
+            )
+            if not exchange_proposal.is_owner:
                 return Response(
                     {'detail': 'Вы не можете обновить статус предложения.'},
                     status=status.HTTP_403_FORBIDDEN
@@ -214,8 +370,7 @@ class ExchangeProposalDeleteUpdate(APIView):
 
             serializer = ExchangeProposalSerializer(exchange_proposal, data=request.data, partial=True)
             if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_200_OK)
+                return save_if_match(request, serializer)
 
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -224,3 +379,82 @@ class ExchangeProposalDeleteUpdate(APIView):
                 {'detail': 'Предложение с указанным ID не найдено.'},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+
+class ChangesFeedView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        tags=['Синхронизация'],
+        summary='Получить изменения',
+        description=(
+            'Возвращает объявления и предложения, созданные или изменённые после токена since, '
+            'и id удалённых. Без since возвращает только текущий токен.'
+        ),
+        parameters=[
+            OpenApiParameter('since', OpenApiTypes.STR, description='Токен из поля next предыдущего ответа'),
+        ],
+        responses={
+            200: OpenApiResponse(description='Изменения успешно получены'),
+            400: OpenApiResponse(description='Неверный токен'),
+            410: OpenApiResponse(description='Токен устарел, нужна полная синхронизация'),
+        }
+    )
+    def get(self, request):
+        token = request.query_params.get('since')
+        if not token:
+            return Response({'next': latest_token(), 'has_more': False})
+
+        try:
+            changes = changes_since(token, request.user, settings.CHANGES_FEED_PAGE_SIZE)
+        except InvalidToken as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ExpiredToken as e:
+            return Response({'detail': str(e)}, status=status.HTTP_410_GONE)
+
+        changes['ads'] = AdSerializer(changes['ads'], many=True).data
+        changes['proposals'] = ExchangeProposalSerializer(changes['proposals'], many=True).data
+        return Response(changes)
+
+
+class BatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        tags=['Пакетные запросы'],
+        summary='Выполнить несколько запросов',
+        description=(
+            'Выполняет несколько запросов к API объявлений и предложений за один HTTP-запрос. '
+            'С atomic=true изменения применяются в одной транзакции и откатываются при любой ошибке. '
+            'Условные заголовки (If-Match и т. п.) и Idempotency-Key пакета во вложенные запросы '
+            'не передаются: каждый запрос указывает их в своём поле headers.'
+        ),
+        request=BatchRequestSerializer,
+        responses={
+            200: OpenApiResponse(description='Ответы на вложенные запросы в порядке их следования'),
+            400: OpenApiResponse(description='Неверные данные'),
+        }
+    )
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        responses = run_batch(
+            request, serializer.validated_data['requests'], atomic=serializer.validated_data['atomic']
+        )
+        return Response({'responses': responses})
+
+
+class MySummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        tags=['Объявления'],
+        summary='Сводка текущего пользователя',
+        description='Объявления пользователя и число входящих и исходящих предложений по статусам',
+        responses={
+            200: OpenApiResponse(description='Сводка успешно получена'),
+        }
+    )
+    def get(self, request):
+        return Response(get_user_summary(request.user))
@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .changes import record_changes
+from .models import (
+    Ad,
+    AdFingerprint,
+    AdLSHBucket,
+    AdTrend,
+    ArchivedAd,
+    ArchivedExchangeProposal,
+    ExchangeProposal,
+    SavedSearchMatch,
+)
+from .summary import invalidate_ad_summaries, invalidate_summaries
+
+
+CLOSED_STATUSES = ('accepted', 'rejected')
+
+AD_FIELDS = [
+    'id', 'user_id', 'title', 'description', 'image_url', 'thumbnail', 'category', 'condition',
+    'created_at', 'updated_at', 'received_proposals_count', 'sent_proposals_count', 'version',
+]
+PROPOSAL_FIELDS = ['id', 'ad_sender_id', 'ad_receiver_id', 'comment', 'status', 'created_at', 'updated_at']
+
+
+def cold_proposals(now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=settings.ARCHIVE_PROPOSALS_AFTER_DAYS)
+    return ExchangeProposal.objects.filter(status__in=CLOSED_STATUSES, updated_at__lt=cutoff)
+
+
+def cold_ads(now=None):
+    """Старые объявления, на которые не ссылается ни одно предложение в основной таблице."""
+    cutoff = (now or timezone.now()) - timedelta(days=settings.ARCHIVE_ADS_AFTER_DAYS)
+    return Ad.objects.filter(created_at__lt=cutoff, updated_at__lt=cutoff).exclude(
+        Exists(ExchangeProposal.objects.filter(ad_sender=OuterRef('pk')))
+    ).exclude(
+        Exists(ExchangeProposal.objects.filter(ad_receiver=OuterRef('pk')))
+    )
+
+
+def _delete_rows(model, ids):
+    """
+    Удаляет строки явным DELETE в обход сборщика удаления Django. Это
+    намеренно: строки не пропадают, а переезжают в архив, и сигналы
+    post_delete уменьшили бы счётчики объявлений и записали бы в журнал
+    изменений лишние события. Каскадов и SET_NULL здесь тоже нет, поэтому
+    все ссылки на строки убирает before_delete в _move_batch (новый внешний
+    ключ на Ad или ExchangeProposal нужно добавить в _detach_ads).
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE id IN ({placeholders})', ids)
+
+
+def _move_batch(queryset, archive_model, fields, batch_size, before_delete=None):
+    """
+    Переносит одну пачку строк в архивную таблицу и удаляет их из основной
+    одним DELETE, без сигналов: счётчики объявлений остаются прежними.
+    Ссылки на удаляемые строки из других таблиц убирает before_delete(ids).
+    """
+    with transaction.atomic():
+        rows = list(
+            queryset.order_by('id').select_for_update(skip_locked=True).values(*fields)[:batch_size]
+        )
+        if not rows:
+            return []
+        archive_model.objects.bulk_create(archive_model(**row) for row in rows)
+        ids = [row['id'] for row in rows]
+        if before_delete is not None:
+            before_delete(ids)
+        _delete_rows(queryset.model, ids)
+        record_changes(queryset.model, ids, 'delete')
+    return rows
+
+
+def archive_proposals(batch_size=1000, max_batches=None, now=None):
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = _move_batch(cold_proposals(now), ArchivedExchangeProposal, PROPOSAL_FIELDS, batch_size)
+        if not rows:
+            break
+        invalidate_ad_summaries({row['ad_sender_id'] for row in rows} | {row['ad_receiver_id'] for row in rows})
+        moved += len(rows)
+        batches += 1
+    return moved
+
+
+def _detach_ads(ad_ids):
+    AdLSHBucket.objects.filter(ad_id__in=ad_ids).delete()
+    AdFingerprint.objects.filter(ad_id__in=ad_ids).delete()
+    SavedSearchMatch.objects.filter(ad_id__in=ad_ids).delete()
+    AdTrend.objects.filter(ad_id__in=ad_ids).delete()
+    Ad.objects.filter(duplicate_of__in=ad_ids).update(duplicate_of=None)
+
+
+def archive_ads(batch_size=1000, max_batches=None, now=None):
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = _move_batch(cold_ads(now), ArchivedAd, AD_FIELDS, batch_size, before_delete=_detach_ads)
+        if not rows:
+            break
+        invalidate_summaries(row['user_id'] for row in rows)
+        moved += len(rows)
+        batches += 1
+    return moved
+
+
+def get_proposal_with_archive(pk):
+    """Предложение из основной таблицы, а если его там нет — из архива."""
+    proposal = (
+        ExchangeProposal.objects.select_related('ad_sender__user', 'ad_receiver__user')
+        .filter(pk=pk)
+        .first()
+    )
+    return proposal or ArchivedExchangeProposal.objects.filter(pk=pk).first()
@@ -0,0 +1,160 @@
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework.exceptions import ValidationError
+
+
+IDS_DESCRIPTION = 'Список id через запятую; объекты возвращаются в том же порядке'
+
+
+def parse_ids(raw):
+    """'3,1,3' -> [3, 1]: без повторов, в порядке запроса."""
+    try:
+        ids = [int(part) for part in raw.split(',') if part.strip()]
+    except ValueError:
+        raise ValidationError({'ids': 'Ожидается список целых чисел через запятую.'})
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValidationError({'ids': 'Список id пуст.'})
+    if len(ids) > settings.API_MAX_IDS_PER_REQUEST:
+        raise ValidationError(
+            {'ids': f'Можно запросить не более {settings.API_MAX_IDS_PER_REQUEST} id за раз.'}
+        )
+    return ids
+
+
+def fetch_by_ids(queryset, serializer_class, raw_ids):
+    """Одним запросом загружает объекты по id, сохраняя порядок и сообщая об отсутствующих."""
+    ids = parse_ids(raw_ids)
+    objects = queryset.in_bulk(ids)
+    return {
+        'results': serializer_class([objects[pk] for pk in ids if pk in objects], many=True).data,
+        'missing': [pk for pk in ids if pk not in objects],
+    }
+
+
+BATCH_PREFIX = '/api'
+
+# Заголовки пакета, которые не относятся к вложенным запросам: условия
+# If-* и ключ идемпотентности каждый запрос передаёт сам в своих headers.
+PARENT_ONLY_HEADERS = {
+    'HTTP_IDEMPOTENCY_KEY',
+    'HTTP_IF_MATCH',
+    'HTTP_IF_NONE_MATCH',
+    'HTTP_IF_MODIFIED_SINCE',
+    'HTTP_IF_UNMODIFIED_SINCE',
+    'HTTP_IF_RANGE',
+}
+# Заголовки ответа, которые описывают сам HTTP-ответ и в пакете не нужны.
+OMITTED_RESPONSE_HEADERS = {'content-type', 'content-length', 'vary', 'allow'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(settings.BATCH_MAX_WORKERS, thread_name_prefix='batch')
+    return _executor
+
+
+def _error(status_code, detail):
+    return {'status': status_code, 'headers': {}, 'body': {'detail': detail}}
+
+
+def _build_subrequest(parent, method, path, query, body, headers):
+    payload = json.dumps(body).encode() if body is not None else b''
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = path
+    sub.META = {
+        key: value for key, value in parent.META.items() if key not in PARENT_ONLY_HEADERS
+    }
+    sub.META.update({f'HTTP_{name.upper().replace("-", "_")}': value for name, value in headers.items()})
+    sub.META.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+    })
+    sub.GET = QueryDict(query)
+    sub.COOKIES = parent.COOKIES
+    sub._stream = io.BytesIO(payload)
+    sub._read_started = False
+    # Пользователь уже определён при разборе самого пакета: вложенные запросы
+    # не проходят аутентификацию и проверку CSRF повторно.
+    sub.user = parent.user
+    sub._force_auth_user = parent.user
+    return sub
+
+
+def run_subrequest(parent, spec):
+    """Выполняет один вложенный запрос к маршрутам ads.api_urls в текущем процессе."""
+    url = urlsplit(spec['path'])
+    if not url.path.startswith(f'{BATCH_PREFIX}/'):
+        return _error(404, 'Маршрут не найден.')
+    try:
+        match = resolve(url.path.removeprefix(BATCH_PREFIX), urlconf='ads.api_urls')
+    except Resolver404:
+        return _error(404, 'Маршрут не найден.')
+    if match.url_name == 'batch':
+        return _error(400, 'Вложенные пакеты запросов не поддерживаются.')
+
+    sub = _build_subrequest(parent, spec['method'], url.path, url.query, spec.get('body'), spec.get('headers', {}))
+    sub.resolver_match = match
+    response = match.func(sub, *match.args, **match.kwargs)
+    return {
+        'status': response.status_code,
+        'headers': {
+            name: value for name, value in response.items() if name.lower() not in OMITTED_RESPONSE_HEADERS
+        },
+        'body': getattr(response, 'data', None),
+    }
+
+
+def _run_in_thread(parent, spec):
+    close_old_connections()
+    try:
+        return run_subrequest(parent, spec)
+    finally:
+        close_old_connections()
+
+
+def run_batch(parent, specs, atomic=False):
+    """
+    Выполняет вложенные запросы по порядку. Подряд идущие GET-запросы
+    независимы и выполняются параллельно; изменяющие запросы — по одному.
+    В режиме atomic всё выполняется в одной транзакции, которая
+    откатывается, если хотя бы один запрос завершился ошибкой.
+    """
+    if atomic:
+        with transaction.atomic():
+            results = [run_subrequest(parent, spec) for spec in specs]
+            if any(result['status'] >= 400 for result in results):
+                transaction.set_rollback(True)
+        return results
+
+    results = []
+    reads = []
+    for spec in specs + [None]:
+        if spec is not None and spec['method'] == 'GET':
+            reads.append(spec)
+            continue
+        if len(reads) > 1 and settings.BATCH_MAX_WORKERS > 1:
+            results += _get_executor().map(_run_in_thread, [parent] * len(reads), reads)
+        else:
+            results += [run_subrequest(parent, read) for read in reads]
+        reads = []
+        if spec is not None:
+            results.append(run_subrequest(parent, spec))
+    return results
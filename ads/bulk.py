@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .changes import record_changes
+from .counters import recount_ad_counters
+from .events import publish_proposal_events
+from .models import Ad, ArchivedExchangeProposal, ExchangeProposal
+from .summary import invalidate_ad_summaries
+
+
+def set_proposals_status(proposals, status):
+    """
+    Меняет статус выборки предложений: сначала читает их id, затем обновляет
+    одним UPDATE по id. Сигналы при этом не срабатывают, поэтому журнал
+    изменений, счётчики, сводки и события для SSE обновляются здесь.
+    """
+    with transaction.atomic():
+        rows = list(proposals.values_list('pk', 'ad_sender_id', 'ad_receiver_id', 'status'))
+        proposal_ids = [pk for pk, *_ in rows]
+        ad_ids = {ad_id for _, sender_id, receiver_id, _ in rows for ad_id in (sender_id, receiver_id)}
+        updated = ExchangeProposal.objects.filter(pk__in=proposal_ids).update(
+            status=status, updated_at=timezone.now(), version=F('version') + 1
+        )
+        record_changes(ExchangeProposal, proposal_ids, 'upsert')
+        recount_ad_counters(
+            Ad.objects.filter(pk__in=ad_ids), ExchangeProposal.objects.all(), ArchivedExchangeProposal.objects.all()
+        )
+        invalidate_ad_summaries(ad_ids)
+        publish_proposal_events(
+            [
+                (pk, sender_id, receiver_id, status)
+                for pk, sender_id, receiver_id, old_status in rows
+                if old_status != status
+            ],
+            'proposal_status_changed',
+        )
+    return updated
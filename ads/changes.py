@@ -0,0 +1,167 @@
+from datetime import timedelta
+from itertools import takewhile
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Ad, ArchivedAd, ArchivedExchangeProposal, ChangeLogEntry, ExchangeProposal
+
+
+CHANGE_MODELS = {
+    Ad: 'ad',
+    ExchangeProposal: 'proposal',
+}
+
+
+class ExpiredToken(Exception):
+    pass
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def record_changes(model, object_ids, action):
+    """
+    Записывает изменения в журнал. Записи о предложениях адресуются участникам:
+    каждому пользователю по своей записи, чтобы чужие предложения, в том числе
+    id удалённых, не попадали в его ленту.
+    """
+    if model is ExchangeProposal:
+        record_proposal_changes(proposal_participants(object_ids), action)
+        return
+    ChangeLogEntry.objects.bulk_create(
+        ChangeLogEntry(model=CHANGE_MODELS[model], object_id=object_id, action=action)
+        for object_id in object_ids
+    )
+
+
+def proposal_participants(proposal_ids):
+    """Тройки (id, объявление отправителя, объявление получателя), в том числе из архива."""
+    fields = ('id', 'ad_sender_id', 'ad_receiver_id')
+    rows = list(ExchangeProposal.objects.filter(id__in=proposal_ids).values_list(*fields))
+    missing = set(proposal_ids) - {row[0] for row in rows}
+    if missing:
+        rows += ArchivedExchangeProposal.objects.filter(id__in=missing).values_list(*fields)
+    return rows
+
+
+def record_proposal_changes(proposals, action):
+    """proposals — тройки (id, ad_sender_id, ad_receiver_id); удалённые строки тоже подходят."""
+    proposals = list(proposals)
+    ad_ids = {ad_id for _, sender_id, receiver_id in proposals for ad_id in (sender_id, receiver_id)}
+    owners = dict(Ad.objects.filter(id__in=ad_ids).values_list('id', 'user_id'))
+    if ad_ids - owners.keys():
+        owners.update(ArchivedAd.objects.filter(id__in=ad_ids - owners.keys()).values_list('id', 'user_id'))
+    ChangeLogEntry.objects.bulk_create(
+        ChangeLogEntry(model='proposal', object_id=proposal_id, action=action, user_id=user_id)
+        for proposal_id, sender_id, receiver_id in proposals
+        for user_id in {owners.get(sender_id), owners.get(receiver_id)} - {None}
+    )
+
+
+def make_token(sequence):
+    return str(sequence)
+
+
+def parse_token(token):
+    """
+    Токен — id последней полученной записи журнала (у старых токенов после точки
+    шло время выдачи, оно не используется). Токен устарел, если записи после
+    него уже удалены prune_changelog, то есть он меньше наименьшего сохранённого
+    id без единицы.
+    """
+    try:
+        sequence = int(token.partition('.')[0])
+    except ValueError:
+        raise InvalidToken('Неверный токен синхронизации.')
+    if sequence < 0:
+        raise InvalidToken('Неверный токен синхронизации.')
+    oldest = ChangeLogEntry.objects.order_by('id').values_list('id', flat=True).first()
+    if oldest is not None and sequence < oldest - 1:
+        raise ExpiredToken('Токен синхронизации устарел, выполните полную синхронизацию.')
+    return sequence
+
+
+def latest_token():
+    last = ChangeLogEntry.objects.order_by('-id').values_list('id', flat=True).first()
+    return make_token(last or 0)
+
+
+def changes_since(token, user, limit):
+    """
+    Возвращает изменения после токена: актуальные объекты и id удалённых.
+    Несколько изменений одного объекта сворачиваются в одно. Записи моложе
+    CHANGES_FEED_SAFETY_LAG секунд попадут в следующий ответ.
+    """
+    since = parse_token(token)
+    visible = Q(model='ad')
+    if user.is_authenticated:
+        visible |= Q(user_id=user.pk)
+    entries = list(
+        ChangeLogEntry.objects.filter(visible, id__gt=since)
+        .order_by('id')
+        .values_list('id', 'model', 'object_id', 'action', 'created_at')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Свежие записи придерживаются: транзакция с меньшим id может ещё не
+    # зафиксироваться, и курсор не должен её перескочить.
+    settled_before = timezone.now() - timedelta(seconds=settings.CHANGES_FEED_SAFETY_LAG)
+    settled = list(takewhile(lambda entry: entry[4] <= settled_before, entries))
+    if len(settled) < len(entries):
+        has_more = False
+    entries = settled
+
+    latest = {}
+    for _, model, object_id, action, _ in entries:
+        latest[(model, object_id)] = action
+
+    upserts = {'ad': [], 'proposal': []}
+    deleted = {'ad': [], 'proposal': []}
+    for (model, object_id), action in latest.items():
+        (upserts if action == 'upsert' else deleted)[model].append(object_id)
+
+    ads = Ad.objects.in_bulk(upserts['ad'])
+    proposals_queryset = ExchangeProposal.objects.none()
+    if user.is_authenticated:
+        proposals_queryset = ExchangeProposal.objects.filter(
+            Q(ad_sender__user=user) | Q(ad_receiver__user=user)
+        )
+    proposals = proposals_queryset.in_bulk(upserts['proposal'])
+
+    deleted['ad'] += [pk for pk in upserts['ad'] if pk not in ads]
+
+    return {
+        'next': make_token(entries[-1][0] if entries else since),
+        'has_more': has_more,
+        'ads': [ads[pk] for pk in upserts['ad'] if pk in ads],
+        'proposals': [proposals[pk] for pk in upserts['proposal'] if pk in proposals],
+        'deleted': deleted,
+    }
+
+
+def prune_changelog(batch_size=10000):
+    """
+    Удаляет записи старше CHANGELOG_RETENTION_DAYS. Удаляется только начало
+    журнала по id, а последняя запись остаётся всегда: по наименьшему
+    сохранённому id parse_token узнаёт устаревшие токены.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.CHANGELOG_RETENTION_DAYS)
+    boundary = (
+        ChangeLogEntry.objects.filter(created_at__gte=cutoff).order_by('id').values_list('id', flat=True).first()
+        or ChangeLogEntry.objects.order_by('-id').values_list('id', flat=True).first()
+    )
+    deleted = 0
+    while boundary is not None:
+        ids = list(
+            ChangeLogEntry.objects.filter(id__lt=boundary)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        deleted += ChangeLogEntry.objects.filter(id__in=ids).delete()[0]
+    return deleted
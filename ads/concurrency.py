@@ -0,0 +1,64 @@
+"""
+Оптимистическая блокировка по полю version. Каждый UPDATE увеличивает
+версию в самой БД (version = version + 1), поэтому два одновременных
+сохранения не получат одинаковую версию с разным содержимым. Если перед
+сохранением задать объекту ожидаемую версию (expect_version), UPDATE
+выполняется с условием WHERE version = <ожидаемая>, и при чужом изменении
+вместо перезаписи выбрасывается VersionConflict. Сигналы сохранения
+срабатывают как обычно.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils.http import parse_etags, quote_etag
+
+
+class VersionConflict(Exception):
+    pass
+
+
+class VersionedModelMixin:
+
+    def expect_version(self, version):
+        self._expected_version = version
+
+    def save(self, *args, **kwargs):
+        # Новая версия читается после UPDATE, пока строка заблокирована; конфликт
+        # откатывает только точку сохранения, внешняя транзакция остаётся рабочей.
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().save(*args, **kwargs)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        version_field = self._meta.get_field('version')
+        values = [value for value in values if value[0] is not version_field]
+        values.append((version_field, None, F('version') + 1))
+        expected = self.__dict__.pop('_expected_version', None)
+        if expected is not None:
+            base_qs = base_qs.filter(version=expected)
+        if not super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update):
+            if expected is not None:
+                raise VersionConflict(f'Версия {expected} устарела.')
+            return False
+        if expected is not None:
+            self.version = expected + 1
+        else:
+            self.version = base_qs.filter(pk=pk_val).values_list('version', flat=True).get()
+        return True
+
+
+def version_etag(obj):
+    return quote_etag(str(obj.version))
+
+
+def if_match_version(request, obj):
+    """
+    Версия, которую клиент передал в If-Match: None, если заголовка нет или
+    он равен «*», и 0, если ни один тег не совпал с текущей версией объекта
+    (версии начинаются с 1, так что условный UPDATE с ней не пройдёт).
+    """
+    header = request.headers.get('If-Match')
+    if not header:
+        return None
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return None
+    return obj.version if version_etag(obj) in etags else 0
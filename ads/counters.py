@@ -0,0 +1,86 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .changes import record_changes
+from .models import Ad
+
+
+def _increment(field, delta):
+    if delta > 0:
+        return F(field) + delta
+    return Greatest(F(field) + delta, Value(0))
+
+
+def update_ad_counters(ad_id, received=0, sent=0, pending=0, touch=False):
+    changes = {}
+    for field, delta in (
+        ('received_proposals_count', received),
+        ('sent_proposals_count', sent),
+        ('pending_proposals_count', pending),
+    ):
+        if delta:
+            changes[field] = _increment(field, delta)
+    if touch:
+        changes['last_proposal_at'] = timezone.now()
+    if changes and Ad.objects.filter(pk=ad_id).update(**changes):
+        record_changes(Ad, [ad_id], 'upsert')
+
+
+def proposal_created(proposal):
+    is_pending = proposal.status == 'pending'
+    update_ad_counters(proposal.ad_receiver_id, received=1, pending=int(is_pending), touch=True)
+    update_ad_counters(proposal.ad_sender_id, sent=1, touch=True)
+
+
+def proposal_status_changed(proposal, old_status):
+    pending = int(proposal.status == 'pending') - int(old_status == 'pending')
+    update_ad_counters(proposal.ad_receiver_id, pending=pending, touch=True)
+    update_ad_counters(proposal.ad_sender_id, touch=True)
+
+
+def proposal_deleted(proposal):
+    is_pending = proposal.status == 'pending'
+    update_ad_counters(proposal.ad_receiver_id, received=-1, pending=-int(is_pending))
+    update_ad_counters(proposal.ad_sender_id, sent=-1)
+
+
+def _count(proposals, field, **filters):
+    return Coalesce(
+        Subquery(
+            proposals.filter(**{field: OuterRef('pk')}, **filters)
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def _last_created_at(proposals, sender_field, receiver_field):
+    return Subquery(
+        proposals.filter(Q(**{receiver_field: OuterRef('pk')}) | Q(**{sender_field: OuterRef('pk')}))
+        .order_by('-created_at')
+        .values('created_at')[:1]
+    )
+
+
+def recount_ad_counters(ads, proposals, archived):
+    """
+    Пересчитывает счётчики предложений для выборки объявлений одним UPDATE.
+    Архивные предложения (archived) учитываются в общих количествах; ожидающих среди них нет.
+    """
+    last_proposal_at = Coalesce(
+        _last_created_at(proposals, 'ad_sender', 'ad_receiver'),
+        _last_created_at(archived, 'ad_sender_id', 'ad_receiver_id'),
+    )
+    ad_ids = list(ads.values_list('pk', flat=True))
+    updated = Ad.objects.filter(pk__in=ad_ids).update(
+        received_proposals_count=_count(proposals, 'ad_receiver') + _count(archived, 'ad_receiver_id'),
+        sent_proposals_count=_count(proposals, 'ad_sender') + _count(archived, 'ad_sender_id'),
+        pending_proposals_count=_count(proposals, 'ad_receiver', status='pending'),
+        last_proposal_at=last_proposal_at,
+    )
+    record_changes(Ad, ad_ids, 'upsert')
+    return updated
@@ -0,0 +1,150 @@
+"""
+Поиск почти одинаковых объявлений. Текст разбивается на шинглы по 5 символов,
+по ним считается MinHash-сигнатура из DEDUP_NUM_PERM чисел, а сигнатура
+режется на DEDUP_BANDS полос. Хэш каждой полосы — ключ корзины LSH: объявления
+с общей корзиной становятся кандидатами, и для них сравниваются сигнатуры.
+Поиск обходится DEDUP_BANDS обращениями к индексу вместо просмотра таблицы;
+замеры на заполненной таблице — команда benchmark_dedup.
+"""
+import functools
+import hashlib
+import random
+import re
+import struct
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Ad, AdFingerprint, AdLSHBucket
+
+
+SHINGLE_SIZE = 5
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+NON_WORD = re.compile(r'\W+')
+DUPLICATE_MESSAGE = 'Похожее объявление уже опубликовано.'
+
+
+def _permutations(count):
+    generator = random.Random(20240601)
+    return [
+        (generator.randrange(1, MERSENNE_PRIME), generator.randrange(0, MERSENNE_PRIME))
+        for _ in range(count)
+    ]
+
+
+PERMUTATIONS = _permutations(settings.DEDUP_NUM_PERM)
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def shingles(text):
+    normalized = NON_WORD.sub(' ', text.lower()).strip()
+    if len(normalized) <= SHINGLE_SIZE:
+        return {_hash64(normalized.encode())}
+    return {
+        _hash64(normalized[i:i + SHINGLE_SIZE].encode())
+        for i in range(len(normalized) - SHINGLE_SIZE + 1)
+    }
+
+
+def ad_text(title, description):
+    return f'{title} {description}'
+
+
+@functools.lru_cache(maxsize=1024)
+def minhash(text):
+    """MinHash-сигнатура текста: по минимуму каждой хэш-функции, 32 бита на число."""
+    hashes = shingles(text)
+    return tuple(
+        min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in hashes)
+        for a, b in PERMUTATIONS
+    )
+
+
+def pack(signature):
+    return struct.pack(f'<{len(signature)}I', *signature)
+
+
+def unpack(data):
+    data = bytes(data)
+    return struct.unpack(f'<{len(data) // 4}I', data)
+
+
+def band_keys(signature):
+    """Ключи корзин LSH: по одному знаковому 64-битному числу на полосу."""
+    rows = len(signature) // settings.DEDUP_BANDS
+    keys = []
+    for band in range(settings.DEDUP_BANDS):
+        chunk = pack(signature[band * rows:(band + 1) * rows])
+        digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def similarity(first, second):
+    """Оценка коэффициента Жаккара по доле совпавших чисел сигнатур."""
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+def index_ads(ads):
+    """Сохраняет сигнатуры и корзины LSH для пачки объявлений. Возвращает {id: сигнатура}."""
+    signatures = {ad.pk: minhash(ad_text(ad.title, ad.description)) for ad in ads}
+    with transaction.atomic():
+        AdFingerprint.objects.bulk_create(
+            [AdFingerprint(ad_id=pk, signature=pack(signature)) for pk, signature in signatures.items()],
+            update_conflicts=True,
+            unique_fields=['ad'],
+            update_fields=['signature'],
+        )
+        AdLSHBucket.objects.filter(ad_id__in=signatures).delete()
+        AdLSHBucket.objects.bulk_create(
+            AdLSHBucket(ad_id=pk, key=key)
+            for pk, signature in signatures.items()
+            for key in band_keys(signature)
+        )
+    return signatures
+
+
+def index_ad(ad):
+    return index_ads([ad])[ad.pk]
+
+
+def find_duplicates(title, description, exclude_pk=None, signature=None):
+    """
+    Возвращает [(id объявления, сходство)] по убыванию сходства для объявлений,
+    похожих не меньше чем на DEDUP_THRESHOLD.
+    """
+    if signature is None:
+        signature = minhash(ad_text(title, description))
+    candidates = AdLSHBucket.objects.filter(key__in=band_keys(signature))
+    if exclude_pk is not None:
+        candidates = candidates.exclude(ad_id=exclude_pk)
+    # При переполнении остаются кандидаты с наибольшим числом общих полос:
+    # именно у них сходство сигнатур, скорее всего, выше.
+    candidate_ids = [
+        row['ad_id']
+        for row in candidates.values('ad_id').annotate(shared=Count('key')).order_by('-shared', 'ad_id')[
+            :settings.DEDUP_MAX_CANDIDATES
+        ]
+    ]
+
+    duplicates = []
+    for ad_id, stored in AdFingerprint.objects.filter(ad_id__in=candidate_ids).values_list('ad_id', 'signature'):
+        score = similarity(signature, unpack(stored))
+        if score >= settings.DEDUP_THRESHOLD:
+            duplicates.append((ad_id, score))
+    return sorted(duplicates, key=lambda item: (-item[1], item[0]))
+
+
+def flag_duplicate(ad, signature):
+    """Помечает объявление как похожее на более раннее (или снимает пометку)."""
+    duplicates = find_duplicates(ad.title, ad.description, exclude_pk=ad.pk, signature=signature)
+    duplicate_of_id = next((ad_id for ad_id, _ in duplicates if ad_id < ad.pk), None)
+    if duplicate_of_id != ad.duplicate_of_id:
+        Ad.objects.filter(pk=ad.pk).update(duplicate_of_id=duplicate_of_id)
+        ad.duplicate_of_id = duplicate_of_id
+    return duplicate_of_id
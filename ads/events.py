@@ -0,0 +1,239 @@
+import asyncio
+import json
+import logging
+import queue as sync_queue
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+class EventHub:
+    """Раздаёт события подписчикам (SSE-соединениям) текущего процесса."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id, loop=None):
+        loop = loop or asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[user_id].add((loop, queue))
+        return queue
+
+    def subscribe_sync(self, user_id):
+        """Подписка для потока WSGI: обычная потокобезопасная очередь."""
+        queue = sync_queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[user_id].add((None, queue))
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.difference_update({item for item in subscribers if item[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def dispatch(self, user_id, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            if loop is None:
+                self._put(queue, message)
+            else:
+                loop.call_soon_threadsafe(self._put, queue, message)
+
+    @staticmethod
+    def _put(queue, message):
+        try:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+        except (asyncio.QueueEmpty, asyncio.QueueFull, sync_queue.Empty, sync_queue.Full):
+            # Очередь синхронного подписчика разбирают параллельно: событие
+            # в переполненной очереди можно потерять, клиент всё равно обновит список.
+            pass
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class LocalBroker:
+    """
+    Брокер в пределах одного процесса: для разработки и тестов. Брокеры,
+    работающие между процессами, переопределяют start и publish.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def start(self):
+        pass
+
+    def publish(self, user_id, message):
+        self.hub.dispatch(user_id, message)
+
+
+class PostgresBroker(LocalBroker):
+    """Брокер поверх LISTEN/NOTIFY PostgreSQL, работает между воркерами."""
+
+    channel = 'proposal_events'
+    poll_timeout = 5
+
+    def __init__(self, hub):
+        super().__init__(hub)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._listen, name='proposal-events', daemon=True)
+            self._thread.start()
+
+    def publish(self, user_id, message):
+        payload = json.dumps({'user_id': user_id, 'message': message})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def _listen(self):
+        while True:
+            try:
+                self._listen_once()
+            except Exception:
+                logger.exception('Соединение брокера событий потеряно, переподключение')
+                time.sleep(self.poll_timeout)
+
+    def _listen_once(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        params = connection.get_connection_params()
+        params.pop('cursor_factory', None)
+        conn = psycopg2.connect(**params)
+        try:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN {self.channel}')
+            while True:
+                if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    payload = json.loads(conn.notifies.pop(0).payload)
+                    self.hub.dispatch(payload['user_id'], payload['message'])
+        finally:
+            conn.close()
+
+
+hub = EventHub(queue_size=settings.PROPOSAL_EVENTS_QUEUE_SIZE)
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker = import_string(settings.PROPOSAL_EVENTS_BROKER)(hub)
+                broker.start()
+                _broker = broker
+    return _broker
+
+
+def publish_proposal_event(proposal, event):
+    """Отправляет событие о предложении владельцам обоих объявлений после коммита."""
+    publish_proposal_events(
+        [(proposal.pk, proposal.ad_sender_id, proposal.ad_receiver_id, proposal.status)], event
+    )
+
+
+def publish_proposal_events(rows, event):
+    """
+    То же для пачки предложений, заданных кортежами (pk, ad_sender_id,
+    ad_receiver_id, status): владельцы объявлений читаются одним запросом.
+    """
+    from .models import Ad
+
+    messages = []
+    ad_ids = set()
+    for pk, sender_id, receiver_id, status in rows:
+        recipients = [receiver_id] if event == 'proposal_created' else [receiver_id, sender_id]
+        message = {
+            'event': event,
+            'proposal': pk,
+            'status': status,
+            'ad_sender': sender_id,
+            'ad_receiver': receiver_id,
+        }
+        messages.append((message, recipients))
+        ad_ids.update(recipients)
+    if not messages:
+        return
+
+    def publish():
+        broker = get_broker()
+        owners = dict(Ad.objects.filter(pk__in=ad_ids).values_list('pk', 'user_id'))
+        for message, recipients in messages:
+            user_ids = {owners[ad_id] for ad_id in recipients if ad_id in owners}
+            for user_id in user_ids:
+                broker.publish(user_id, message)
+
+    transaction.on_commit(publish)
+
+
+def _format(message):
+    return f'event: {message["event"]}\ndata: {json.dumps(message)}\n\n'
+
+
+async def event_stream(user_id):
+    """
+    Поток событий для ASGI. Закрывается через PROPOSAL_EVENTS_MAX_DURATION
+    секунд, после чего EventSource переподключается через retry.
+    """
+    get_broker()
+    queue = hub.subscribe(user_id)
+    deadline = time.monotonic() + settings.PROPOSAL_EVENTS_MAX_DURATION
+    try:
+        yield f'retry: {settings.PROPOSAL_EVENTS_RETRY * 1000}\n\n'
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                message = await asyncio.wait_for(queue.get(), min(settings.PROPOSAL_EVENTS_HEARTBEAT, remaining))
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            yield _format(message)
+    finally:
+        hub.unsubscribe(user_id, queue)
+
+
+def sync_event_stream(user_id):
+    """
+    Поток событий для WSGI (runserver): держит поток воркера не дольше
+    PROPOSAL_EVENTS_MAX_DURATION секунд. Асинхронный поток WSGI-сервер
+    собрал бы в список целиком и не отправил бы ни байта.
+    """
+    get_broker()
+    queue = hub.subscribe_sync(user_id)
+    deadline = time.monotonic() + settings.PROPOSAL_EVENTS_MAX_DURATION
+    try:
+        yield f'retry: {settings.PROPOSAL_EVENTS_RETRY * 1000}\n\n'
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                message = queue.get(timeout=min(settings.PROPOSAL_EVENTS_HEARTBEAT, remaining))
+            except sync_queue.Empty:
+                yield ': ping\n\n'
+                continue
+            yield _format(message)
+    finally:
+        hub.unsubscribe(user_id, queue)
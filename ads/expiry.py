@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .bulk import set_proposals_status
+from .changes import record_changes
+from .models import Ad, ExchangeProposal
+from .summary import invalidate_summaries
+
+
+def expire_batch(batch_size=500, now=None):
+    """
+    Снимает с публикации одну пачку истёкших объявлений и отклоняет их
+    ожидающие предложения. Пачка выбирается по частичному индексу
+    ad_active_expires_idx, а строки блокируются только на время короткой транзакции.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        ads = list(
+            Ad.objects.active()
+            .filter(expires_at__lte=now)
+            .order_by('expires_at')
+            .select_for_update(skip_locked=True)
+            .values_list('id', 'user_id')[:batch_size]
+        )
+        if not ads:
+            return 0
+        ad_ids = [ad_id for ad_id, _ in ads]
+        Ad.objects.filter(id__in=ad_ids).update(is_active=False, updated_at=now, version=F('version') + 1)
+        record_changes(Ad, ad_ids, 'upsert')
+        set_proposals_status(
+            ExchangeProposal.objects.filter(
+                Q(ad_sender__in=ad_ids) | Q(ad_receiver__in=ad_ids), status='pending'
+            ),
+            'rejected',
+        )
+        invalidate_summaries(user_id for _, user_id in ads)
+    return len(ads)
+
+
+def sweep_expired_ads(batch_size=500, max_batches=None, now=None):
+    expired = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = expire_batch(batch_size, now)
+        if not count:
+            break
+        expired += count
+        batches += 1
+    return expired
@@ -1,9 +1,34 @@
 from django import forms
+from django.conf import settings
 
-from .models import Ad, ExchangeProposal
+from .dedup import DUPLICATE_MESSAGE, find_duplicates
+from .models import Ad, ExchangeProposal, SavedSearch
+from .percolator import trigrams
+from .widgets import AdAutocompleteWidget
 
 
-class AdForm(forms.ModelForm):
+class VersionedFormMixin:
+    """
+    Скрытое поле с версией объекта на момент открытия формы: сохранение
+    пройдёт, только если с тех пор объект никто не менял.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['version'] = forms.IntegerField(
+            widget=forms.HiddenInput,
+            required=False,
+            initial=self.instance.version if self.instance.pk else None,
+        )
+
+    def save(self, commit=True):
+        version = self.cleaned_data.get('version')
+        if self.instance.pk and version is not None:
+            self.instance.expect_version(version)
+        return super().save(commit)
+
+
+class AdForm(VersionedFormMixin, forms.ModelForm):
     class Meta:
         model = Ad
         fields = ['title', 'description', 'image_url', 'category', 'condition']
@@ -22,6 +47,14 @@ class AdForm(forms.ModelForm):
             'condition': forms.Select(attrs={'class': 'form-control'}),
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        title, description = cleaned_data.get('title'), cleaned_data.get('description')
+        if settings.DEDUP_REJECT and title and description:
+            if find_duplicates(title, description, exclude_pk=self.instance.pk):
+                raise forms.ValidationError(DUPLICATE_MESSAGE)
+        return cleaned_data
+
 
 class ExchangeProposalForm(forms.ModelForm):
     class Meta:
@@ -34,7 +67,7 @@ class ExchangeProposalForm(forms.ModelForm):
         }
         widgets = {
             'ad_sender': forms.Select(attrs={'class': 'form-control'}),
-            'ad_receiver': forms.Select(attrs={'class': 'form-control'}),
+            'ad_receiver': AdAutocompleteWidget(attrs={'class': 'form-control'}),
             'comment': forms.Textarea(attrs={'class': 'form-control', 'placeholder': 'Коментарий'}),
         }
 
@@ -42,11 +75,11 @@ class ExchangeProposalForm(forms.ModelForm):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         if user:
-            self.fields['ad_sender'].queryset = Ad.objects.filter(user=user)
-            self.fields['ad_receiver'].queryset = Ad.objects.exclude(user=user)
+            self.fields['ad_sender'].queryset = Ad.objects.active().filter(user=user)
+            self.fields['ad_receiver'].queryset = Ad.objects.active().exclude(user=user)
 
 
-class ExchangeProposalStatusForm(forms.ModelForm):
+class ExchangeProposalStatusForm(VersionedFormMixin, forms.ModelForm):
     class Meta:
         model = ExchangeProposal
         fields = ['status']
@@ -56,3 +89,35 @@ class ExchangeProposalStatusForm(forms.ModelForm):
         widgets = {
             'status': forms.Select(attrs={'class': 'form-control'}),
         }
+
+
+class SavedSearchForm(forms.ModelForm):
+    class Meta:
+        model = SavedSearch
+        fields = ['query', 'category', 'condition']
+        widgets = {
+            'query': forms.TextInput(attrs={'class': 'form-control'}),
+            'category': forms.TextInput(attrs={'class': 'form-control'}),
+            'condition': forms.Select(attrs={'class': 'form-control'}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop('user')
+        super().__init__(*args, **kwargs)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if (
+            not trigrams(cleaned_data.get('query', ''))
+            and not cleaned_data.get('category')
+            and not cleaned_data.get('condition')
+        ):
+            # Такой поиск подходил бы под каждое новое объявление.
+            raise forms.ValidationError(
+                'Укажите ключевые слова не короче трёх символов, категорию или состояние.'
+            )
+        if self.user.saved_searches.count() >= settings.SAVED_SEARCHES_PER_USER:
+            raise forms.ValidationError(
+                f'Можно сохранить не больше {settings.SAVED_SEARCHES_PER_USER} поисков.'
+            )
+        return cleaned_data
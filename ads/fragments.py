@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from barter_platform.cache import LocalLRUCache
+
+
+local_fragments = LocalLRUCache(
+    max_size=settings.FRAGMENT_CACHE_LOCAL_SIZE,
+    timeout=settings.FRAGMENT_CACHE_LOCAL_TIMEOUT,
+)
+
+
+def fragment_key(name, obj, *vary_on):
+    """Ключ фрагмента зависит от версии объекта, поэтому старые фрагменты не нужно удалять."""
+    suffix = ':'.join(str(value) for value in vary_on)
+    return f'ads.fragment:{name}:{obj.pk}:{obj.version}:{suffix}'
+
+
+def render_fragments(name, template_name, objects, context_name, vary_on=lambda obj: ()):
+    """
+    Возвращает список (объект, html) для объектов с полем version. Фрагменты
+    ищутся в памяти процесса, затем одним get_many в общем кэше; шаблон
+    рендерится только для остальных. vary_on — значения вне версии, от которых
+    зависит разметка.
+    """
+    objects = list(objects)
+    keys = {obj.pk: fragment_key(name, obj, *vary_on(obj)) for obj in objects}
+    fragments = {}
+    for pk, key in keys.items():
+        html = local_fragments.get(key)
+        if html is not None:
+            fragments[pk] = html
+
+    missing = {keys[obj.pk]: obj for obj in objects if obj.pk not in fragments}
+    if missing:
+        for key, html in cache.get_many(missing).items():
+            fragments[missing.pop(key).pk] = html
+            local_fragments.set(key, html)
+
+    rendered = {}
+    for key, obj in missing.items():
+        html = render_to_string(template_name, {context_name: obj})
+        fragments[obj.pk] = rendered[key] = html
+        local_fragments.set(key, html)
+    if rendered:
+        cache.set_many(rendered, settings.FRAGMENT_CACHE_TIMEOUT)
+
+    return [(obj, mark_safe(fragments[obj.pk])) for obj in objects]
+
+
+def render_ad_fragments(name, template_name, ads, vary_on=lambda ad: ()):
+    return render_fragments(name, template_name, ads, 'ad', vary_on)
+
+
+def render_proposal_fragments(name, template_name, proposals):
+    """Разметка предложения выводит заголовки обоих объявлений, поэтому зависит и от их версий."""
+    return render_fragments(
+        name, template_name, proposals, 'proposal',
+        vary_on=lambda proposal: (proposal.ad_sender.version, proposal.ad_receiver.version),
+    )
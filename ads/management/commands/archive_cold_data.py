@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from ads.archive import archive_ads, archive_proposals
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит в архив закрытые предложения старше ARCHIVE_PROPOSALS_AFTER_DAYS '
+        'и объявления без предложений старше ARCHIVE_ADS_AFTER_DAYS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-batches', type=int, default=None, help='Ограничить объём работы за один запуск')
+
+    def handle(self, *args, batch_size, max_batches, **options):
+        proposals = archive_proposals(batch_size=batch_size, max_batches=max_batches)
+        ads = archive_ads(batch_size=batch_size, max_batches=max_batches)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено в архив предложений: {proposals}, объявлений: {ads}'
+        ))
@@ -0,0 +1,92 @@
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ads.dedup import band_keys, find_duplicates, index_ads, minhash, similarity, unpack
+from ads.models import Ad, AdFingerprint, AdLSHBucket
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет MinHash/LSH на синтетических объявлениях в БД: скорость расчёта сигнатур и '
+        'индексации, число кандидатов, полноту и скорость find_duplicates и выигрыш перед полным '
+        'перебором. Всё выполняется в транзакции, которая в конце откатывается'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=20000, help='Число объявлений')
+        parser.add_argument('--queries', type=int, default=200, help='Число подброшенных дубликатов')
+        parser.add_argument('--edits', type=int, default=2, help='Сколько слов меняется в дубликате')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки при заполнении таблиц')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, count, queries, edits, batch_size, seed, **options):
+        with transaction.atomic():
+            self.run(count, queries, edits, batch_size, seed)
+            transaction.set_rollback(True)
+
+    def run(self, count, queries, edits, batch_size, seed):
+        generator = random.Random(seed)
+        letters = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+        vocabulary = [
+            ''.join(generator.choices(letters, k=generator.randint(3, 10))) for _ in range(5000)
+        ]
+
+        def make_text():
+            return ' '.join(generator.choices(vocabulary, k=30))
+
+        texts = [make_text() for _ in range(count)]
+
+        started = time.perf_counter()
+        for text in texts:
+            minhash(text)
+        signing = time.perf_counter() - started
+
+        user = get_user_model().objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:12]}')
+        ads = Ad.objects.bulk_create(
+            (Ad(user=user, title='', description=text, category='benchmark', condition='new') for text in texts),
+            batch_size=batch_size,
+        )
+        started = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            index_ads(ads[offset:offset + batch_size])
+        indexing = time.perf_counter() - started
+
+        found = candidates_total = 0
+        lsh_time = 0.0
+        for _ in range(queries):
+            original = generator.randrange(count)
+            words = texts[original].split()
+            for position in generator.sample(range(len(words)), edits):
+                words[position] = generator.choice(vocabulary)
+            description = ' '.join(words)
+
+            started = time.perf_counter()
+            matches = find_duplicates('', description)
+            lsh_time += time.perf_counter() - started
+
+            keys = band_keys(minhash(description))
+            candidates_total += AdLSHBucket.objects.filter(key__in=keys).values('ad_id').distinct().count()
+            found += ads[original].pk in {ad_id for ad_id, _ in matches}
+
+        signature = minhash(description)
+        started = time.perf_counter()
+        for stored in AdFingerprint.objects.values_list('signature', flat=True).iterator():
+            similarity(signature, unpack(stored))
+        brute_force = time.perf_counter() - started
+
+        self.stdout.write(f'Объявлений: {count}, дубликатов: {queries}, изменено слов: {edits}')
+        self.stdout.write(f'Сигнатура: {signing / count * 1e6:.0f} мкс на объявление')
+        self.stdout.write(f'Индексация: {indexing / count * 1e6:.0f} мкс на объявление')
+        self.stdout.write(
+            f'Кандидатов на запрос: {candidates_total / queries:.1f} '
+            f'(проверяется не больше {settings.DEDUP_MAX_CANDIDATES})'
+        )
+        self.stdout.write(f'Найдено дубликатов: {found / queries:.1%}')
+        self.stdout.write(f'find_duplicates: {lsh_time / queries * 1e3:.3f} мс на запрос')
+        self.stdout.write(f'Полный перебор таблицы: {brute_force * 1e3:.1f} мс на запрос')
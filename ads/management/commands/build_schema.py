@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from barter_platform.schema import render_schema, stale_formats, write_schema
+
+
+class Command(BaseCommand):
+    help = 'Генерирует схему OpenAPI в SCHEMA_ROOT, откуда её отдаёт /api/schema/'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить, что сохранённая схема совпадает с кодом',
+        )
+
+    def handle(self, *args, check, **options):
+        rendered = render_schema()
+        if check:
+            stale = stale_formats(rendered)
+            if stale:
+                raise CommandError(f'Схема устарела ({", ".join(stale)}): выполните build_schema')
+            self.stdout.write(self.style.SUCCESS('Схема актуальна'))
+            return
+        write_schema(rendered)
+        self.stdout.write(self.style.SUCCESS('Схема сохранена'))
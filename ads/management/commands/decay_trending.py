@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ads import trending
+
+
+class Command(BaseCommand):
+    help = 'Уменьшает рейтинги «в тренде» за время с прошлого запуска и удаляет близкие к нулю'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--rebuild', action='store_true', help='Пересчитать рейтинги по предложениям')
+
+    def handle(self, *args, batch_size, rebuild, **options):
+        if rebuild:
+            total = trending.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Пересчитано рейтингов: {total}'))
+            return
+        updated, pruned = trending.decay(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Обновлено рейтингов: {updated}, удалено: {pruned}'))
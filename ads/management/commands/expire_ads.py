@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ads.expiry import sweep_expired_ads
+
+
+class Command(BaseCommand):
+    help = 'Снимает с публикации истёкшие объявления и отклоняет их ожидающие предложения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, default=None, help='Ограничить объём работы за один запуск')
+
+    def handle(self, *args, batch_size, max_batches, **options):
+        expired = sweep_expired_ads(batch_size=batch_size, max_batches=max_batches)
+        self.stdout.write(self.style.SUCCESS(f'Снято с публикации объявлений: {expired}'))
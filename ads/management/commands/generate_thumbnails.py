@@ -0,0 +1,31 @@
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from ads.models import Ad
+from ads.thumbnails import pipeline
+
+
+class Command(BaseCommand):
+    help = 'Проверяет ссылки на изображения объявлений и создаёт миниатюры'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Обработать и уже готовые изображения')
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, batch_size, **options):
+        ads = Ad.objects.exclude(image_url__isnull=True).exclude(image_url='')
+        if not options['all']:
+            ads = ads.exclude(image_status__in=['ready', 'invalid'])
+
+        processed = 0
+        last_id = 0
+        while True:
+            batch = list(ads.filter(id__gt=last_id).order_by('id').values_list('id', 'image_url')[:batch_size])
+            if not batch:
+                break
+            wait([pipeline.submit(ad_id, image_url) for ad_id, image_url in batch])
+            processed += len(batch)
+            last_id = batch[-1][0]
+
+        self.stdout.write(self.style.SUCCESS(f'Обработано изображений: {processed}'))
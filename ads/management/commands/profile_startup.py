@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from barter_platform.startup import app_module, import_cost, parse_importtime
+
+
+class Command(BaseCommand):
+    help = 'Показывает стоимость импорта и AppConfig.ready каждого приложения при холодном запуске'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Сколько самых тяжёлых модулей вывести')
+
+    def handle(self, *args, top, **options):
+        # Отдельный процесс, чтобы замерить именно холодный запуск с текущими настройками.
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'barter_platform.startup'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+        report = json.loads(result.stdout)
+        timings = parse_importtime(result.stderr)
+
+        self.stdout.write(f'{"Приложение":<45}{"импорт, мс":>12}{"ready, мс":>12}')
+        for entry in report['installed_apps']:
+            module = report['app_names'].get(entry) or app_module(entry)
+            ready = report['ready'].get(module, 0)
+            self.stdout.write(f'{entry:<45}{import_cost(timings, module):>12.1f}{ready:>12.1f}')
+
+        self.stdout.write('')
+        self.stdout.write(f'django.setup(): {report["setup"]:.1f} мс')
+        self.stdout.write(f'{settings.ROOT_URLCONF}: {report["urlconf"]:.1f} мс')
+        self.stdout.write(f'Всего импортов: {sum(timings.values()) / 1000:.1f} мс')
+
+        self.stdout.write('')
+        self.stdout.write('Самые тяжёлые модули (собственное время импорта):')
+        for name, self_time in sorted(timings.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f'{self_time / 1000:>10.1f} мс  {name}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ads.changes import prune_changelog
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из журнала изменений записи старше CHANGELOG_RETENTION_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, batch_size, **options):
+        deleted = prune_changelog(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Удалено записей журнала: {deleted}'))
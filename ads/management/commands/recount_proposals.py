@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from ads.counters import recount_ad_counters
+from ads.models import Ad, ArchivedExchangeProposal, ExchangeProposal
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики предложений и дату последней активности объявлений'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, batch_size, **options):
+        max_id = Ad.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        updated = 0
+        for start in range(0, max_id, batch_size):
+            ads = Ad.objects.filter(id__gt=start, id__lte=start + batch_size)
+            updated += recount_ad_counters(
+                ads, ExchangeProposal.objects.all(), ArchivedExchangeProposal.objects.all()
+            )
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано объявлений: {updated}'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from ads.dedup import flag_duplicate, index_ads
+from ads.models import Ad
+
+
+class Command(BaseCommand):
+    help = 'Индексирует объявления для поиска дубликатов и помечает почти одинаковые'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--reindex', action='store_true', help='Пересчитать уже сохранённые сигнатуры')
+
+    def handle(self, *args, batch_size, reindex, **options):
+        queryset = Ad.objects.only('id', 'title', 'description', 'duplicate_of_id').order_by('id')
+        if not reindex:
+            queryset = queryset.filter(fingerprint__isnull=True)
+
+        indexed = flagged = 0
+        last_id = 0
+        while True:
+            ads = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not ads:
+                break
+            last_id = ads[-1].pk
+            signatures = index_ads(ads)
+            indexed += len(ads)
+
+            for ad in ads:
+                flagged += flag_duplicate(ad, signatures[ad.pk]) is not None
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано объявлений: {indexed}, похожих на более ранние: {flagged}'
+        ))
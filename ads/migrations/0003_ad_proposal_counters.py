@@ -0,0 +1,76 @@
+# Generated by Django 5.2 on 2026-10-19 15:11
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_proposal_counters(apps, schema_editor):
+    # Логика пересчёта зафиксирована здесь, а не импортируется из ads.counters:
+    # миграция не должна зависеть от того, как код приложения меняется дальше.
+    Ad = apps.get_model('ads', 'Ad')
+    ExchangeProposal = apps.get_model('ads', 'ExchangeProposal')
+
+    def count(field, **filters):
+        return Coalesce(
+            Subquery(
+                ExchangeProposal.objects.filter(**{field: OuterRef('pk')}, **filters)
+                .order_by()
+                .values(field)
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0,
+        )
+
+    Ad.objects.update(
+        received_proposals_count=count('ad_receiver'),
+        sent_proposals_count=count('ad_sender'),
+        pending_proposals_count=count('ad_receiver', status='pending'),
+        last_proposal_at=Subquery(
+            ExchangeProposal.objects.filter(Q(ad_receiver=OuterRef('pk')) | Q(ad_sender=OuterRef('pk')))
+            .order_by('-created_at')
+            .values('created_at')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0002_alter_ad_options_alter_exchangeproposal_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='last_proposal_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последняя активность'),
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='pending_proposals_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Ожидающих предложений'),
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='received_proposals_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Получено предложений'),
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='sent_proposals_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Отправлено предложений'),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(fields=['-received_proposals_count'], name='ad_received_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(fields=['-last_proposal_at'], name='ad_last_proposal_idx'),
+        ),
+        migrations.RunPython(fill_proposal_counters, migrations.RunPython.noop),
+    ]
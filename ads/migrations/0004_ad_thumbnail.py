@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0003_ad_proposal_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Обрабатывается'), ('ready', 'Готово'), ('invalid', 'Недоступно')], max_length=20, verbose_name='Статус изображения'),
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='thumbnail',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Миниатюра'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19 15:40
+
+from django.db import migrations
+
+
+def create_title_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS ad_title_upper_prefix_idx '
+            'ON ads_ad (UPPER(title::text) text_pattern_ops, id)'
+        )
+
+
+def drop_title_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS ad_title_upper_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0004_ad_thumbnail'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_title_index, drop_title_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-19 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0007_changes_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exchangeproposal',
+            index=models.Index(fields=['ad_sender', '-created_at'], name='proposal_sender_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exchangeproposal',
+            index=models.Index(fields=['ad_receiver', '-created_at'], name='proposal_receiver_created_idx'),
+        ),
+    ]
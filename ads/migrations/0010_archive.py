@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-19 15:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0009_ad_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedExchangeProposal',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('ad_sender_id', models.BigIntegerField(db_index=True, verbose_name='Объявление отправителя')),
+                ('ad_receiver_id', models.BigIntegerField(db_index=True, verbose_name='Объявление получателя')),
+                ('comment', models.TextField(verbose_name='Коментарий')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('accepted', 'Принята'), ('rejected', 'Отклонена')], max_length=50, verbose_name='Статус предложения')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(verbose_name='Дата изменения')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+            ],
+            options={
+                'verbose_name': 'Архивное предложение',
+                'verbose_name_plural': 'Архивные предложения',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedAd',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255, verbose_name='Заголовок')),
+                ('description', models.TextField(verbose_name='Описание')),
+                ('image_url', models.URLField(blank=True, null=True, verbose_name='URL изображения')),
+                ('thumbnail', models.CharField(blank=True, max_length=100, verbose_name='Миниатюра')),
+                ('category', models.CharField(max_length=50, verbose_name='Категория')),
+                ('condition', models.CharField(choices=[('new', 'Новый'), ('used', 'Б/У')], max_length=50, verbose_name='Состояние')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(verbose_name='Дата изменения')),
+                ('received_proposals_count', models.PositiveIntegerField(default=0, verbose_name='Получено предложений')),
+                ('sent_proposals_count', models.PositiveIntegerField(default=0, verbose_name='Отправлено предложений')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='Версия')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_ads', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Архивное объявление',
+                'verbose_name_plural': 'Архивные объявления',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 15:45
+
+import ads.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0010_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ad',
+            name='expires_at',
+            field=models.DateTimeField(default=ads.models.default_expires_at, verbose_name='Активно до'),
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='is_active',
+            field=models.BooleanField(default=True, verbose_name='Активно'),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['expires_at'], name='ad_active_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['id'], name='ad_active_id_idx'),
+        ),
+    ]
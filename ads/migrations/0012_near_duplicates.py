@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-19 15:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0011_ad_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdFingerprint',
+            fields=[
+                ('ad', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='ads.ad', verbose_name='Объявление')),
+                ('signature', models.BinaryField(verbose_name='Сигнатура')),
+            ],
+            options={
+                'verbose_name': 'Отпечаток объявления',
+                'verbose_name_plural': 'Отпечатки объявлений',
+            },
+        ),
+        migrations.AddField(
+            model_name='ad',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='ads.ad', verbose_name='Похоже на объявление'),
+        ),
+        migrations.CreateModel(
+            name='AdLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True, verbose_name='Ключ корзины')),
+                ('ad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='ads.ad', verbose_name='Объявление')),
+            ],
+            options={
+                'verbose_name': 'Корзина LSH',
+                'verbose_name_plural': 'Корзины LSH',
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2 on 2026-10-19 15:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0012_near_duplicates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(blank=True, max_length=255, verbose_name='Ключевые слова')),
+                ('category', models.CharField(blank=True, max_length=50, verbose_name='Категория')),
+                ('condition', models.CharField(blank=True, choices=[('new', 'Новый'), ('used', 'Б/У')], max_length=50, verbose_name='Состояние')),
+                ('anchor', models.CharField(blank=True, editable=False, max_length=3, verbose_name='Опорная триграмма')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Сохранённый поиск',
+                'verbose_name_plural': 'Сохранённые поиски',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedSearchMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('notified_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата уведомления')),
+                ('ad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_matches', to='ads.ad', verbose_name='Объявление')),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='ads.savedsearch', verbose_name='Сохранённый поиск')),
+            ],
+            options={
+                'verbose_name': 'Совпадение сохранённого поиска',
+                'verbose_name_plural': 'Совпадения сохранённых поисков',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='savedsearch',
+            index=models.Index(fields=['anchor', 'category', 'condition'], name='saved_search_anchor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedsearchmatch',
+            index=models.Index(condition=models.Q(('notified_at__isnull', True)), fields=['search'], name='saved_search_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='savedsearchmatch',
+            constraint=models.UniqueConstraint(fields=('search', 'ad'), name='saved_search_match_unique'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19 15:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0013_saved_searches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdTrend',
+            fields=[
+                ('ad', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='ads.ad', verbose_name='Объявление')),
+                ('category', models.CharField(max_length=50, verbose_name='Категория')),
+                ('score', models.FloatField(default=0, verbose_name='Рейтинг')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг объявления',
+                'verbose_name_plural': 'Рейтинги объявлений',
+                'indexes': [models.Index(fields=['-score'], name='ad_trend_score_idx'), models.Index(fields=['category', '-score'], name='ad_trend_category_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-19 16:17
+
+from django.db import migrations, models
+
+
+def reset_changelog(apps, schema_editor):
+    # У прежних записей о предложениях нет получателя, и отдавать их в ленту
+    # нельзя. Журнал очищается до последней записи: выданные раньше токены
+    # становятся устаревшими, и клиенты выполняют полную синхронизацию.
+    ChangeLogEntry = apps.get_model('ads', 'ChangeLogEntry')
+    last = ChangeLogEntry.objects.order_by('-id').values_list('id', flat=True).first()
+    if last is not None:
+        ChangeLogEntry.objects.filter(id__lt=last).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0015_proposal_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelogentry',
+            name='user_id',
+            field=models.BigIntegerField(blank=True, db_index=True, help_text='Для предложений — участник, которому видна запись; у объявлений не заполняется.', null=True, verbose_name='ID пользователя'),
+        ),
+        migrations.RunPython(reset_changelog, migrations.RunPython.noop),
+    ]
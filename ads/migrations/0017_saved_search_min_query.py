@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0016_changelog_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='savedsearch',
+            name='query',
+            field=models.CharField(blank=True, help_text='Без ключевых слов от трёх символов нужно указать категорию или состояние.', max_length=255, verbose_name='Ключевые слова'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 16:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0017_saved_search_min_query'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adtrend',
+            name='decayed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Рейтинг приведён к моменту'),
+        ),
+    ]
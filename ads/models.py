@@ -1,9 +1,27 @@
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.db import models
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .concurrency import VersionedModelMixin
+
+
+def default_expires_at():
+    return timezone.now() + timedelta(days=settings.AD_LIFETIME_DAYS)
 
 
-class Ad(models.Model):
+class AdQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(is_active=True)
+
+
+class Ad(VersionedModelMixin, models.Model):
     user = models.ForeignKey(
         User,
         verbose_name='Пользователь',
@@ -22,6 +40,21 @@ class Ad(models.Model):
         blank=True,
         null=True,
     )
+    thumbnail = models.CharField(
+        verbose_name='Миниатюра',
+        max_length=100,
+        blank=True,
+    )
+    image_status = models.CharField(
+        verbose_name='Статус изображения',
+        max_length=20,
+        choices=(
+            ('pending', 'Обрабатывается'),
+            ('ready', 'Готово'),
+            ('invalid', 'Недоступно'),
+        ),
+        blank=True,
+    )
     category = models.CharField(
         verbose_name='Категория',
         max_length=50,
@@ -35,11 +68,63 @@ class Ad(models.Model):
         verbose_name='Дата создания',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+    received_proposals_count = models.PositiveIntegerField(
+        verbose_name='Получено предложений',
+        default=0,
+    )
+    sent_proposals_count = models.PositiveIntegerField(
+        verbose_name='Отправлено предложений',
+        default=0,
+    )
+    pending_proposals_count = models.PositiveIntegerField(
+        verbose_name='Ожидающих предложений',
+        default=0,
+    )
+    last_proposal_at = models.DateTimeField(
+        verbose_name='Последняя активность',
+        blank=True,
+        null=True,
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=1,
+        editable=False,
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='Активно до',
+        default=default_expires_at,
+    )
+    is_active = models.BooleanField(
+        verbose_name='Активно',
+        default=True,
+    )
+    duplicate_of = models.ForeignKey(
+        'self',
+        verbose_name='Похоже на объявление',
+        on_delete=models.SET_NULL,
+        related_name='duplicates',
+        blank=True,
+        null=True,
+    )
+
+    objects = AdQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Объявление'
         verbose_name_plural = 'Объявления'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-received_proposals_count'], name='ad_received_count_idx'),
+            models.Index(fields=['-last_proposal_at'], name='ad_last_proposal_idx'),
+            models.Index(fields=['category'], name='ad_category_idx'),
+            models.Index(fields=['condition'], name='ad_condition_idx'),
+            models.Index(fields=['expires_at'], condition=models.Q(is_active=True), name='ad_active_expires_idx'),
+            models.Index(fields=['id'], condition=models.Q(is_active=True), name='ad_active_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -47,8 +132,25 @@ class Ad(models.Model):
     def get_absolute_url(self):
         return reverse('ads:ad_detail', kwargs={'pk': self.pk})
 
+    def renew(self):
+        self.expires_at = default_expires_at()
+        self.is_active = True
+        self.save(update_fields=['expires_at', 'is_active', 'version', 'updated_at'])
+
+    @property
+    def thumbnail_url(self) -> str | None:
+        if self.thumbnail:
+            return default_storage.url(self.thumbnail)
+        return None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_image_url = instance.__dict__.get('image_url')
+        return instance
 
-class ExchangeProposal(models.Model):
+
+class ExchangeProposal(VersionedModelMixin, models.Model):
     ad_sender = models.ForeignKey(
         Ad,
         verbose_name='Объявление отправителя',
@@ -78,14 +180,389 @@ class ExchangeProposal(models.Model):
         verbose_name='Дата создания',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=1,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Предложение'
         verbose_name_plural = 'Предложения'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status'], name='proposal_status_idx'),
+            models.Index(fields=['ad_sender', '-created_at'], name='proposal_sender_created_idx'),
+            models.Index(fields=['ad_receiver', '-created_at'], name='proposal_receiver_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'Предложение обмена от {self.ad_sender} - {self.ad_receiver}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def get_absolute_url(self):
+        return reverse('ads:proposal_detail', kwargs={'pk': self.pk})
+
+
+class ChangeLogEntry(models.Model):
+    model = models.CharField(
+        verbose_name='Модель',
+        max_length=20,
+        choices=(('ad', 'Объявление'), ('proposal', 'Предложение')),
+    )
+    object_id = models.BigIntegerField(
+        verbose_name='ID объекта',
+    )
+    action = models.CharField(
+        verbose_name='Действие',
+        max_length=10,
+        choices=(('upsert', 'Создание или изменение'), ('delete', 'Удаление')),
+    )
+    user_id = models.BigIntegerField(
+        verbose_name='ID пользователя',
+        help_text='Для предложений — участник, которому видна запись; у объявлений не заполняется.',
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now_add=True,
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'Запись журнала изменений'
+        verbose_name_plural = 'Журнал изменений'
+        ordering = ['id']
+
+    def __str__(self):
+        return f'{self.model} #{self.object_id}: {self.action}'
+
+
+class ArchivedAd(models.Model):
+    """Старое объявление без активных предложений, перенесённое из основной таблицы."""
+
+    is_archived = True
+
+    id = models.BigIntegerField(
+        primary_key=True,
+    )
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='archived_ads',
+    )
+    title = models.CharField(
+        verbose_name='Заголовок',
+        max_length=255,
+    )
+    description = models.TextField(
+        verbose_name='Описание',
+    )
+    image_url = models.URLField(
+        verbose_name='URL изображения',
+        blank=True,
+        null=True,
+    )
+    thumbnail = models.CharField(
+        verbose_name='Миниатюра',
+        max_length=100,
+        blank=True,
+    )
+    category = models.CharField(
+        verbose_name='Категория',
+        max_length=50,
+    )
+    condition = models.CharField(
+        verbose_name='Состояние',
+        max_length=50,
+        choices=(('new', 'Новый'), ('used', 'Б/У')),
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+    )
+    received_proposals_count = models.PositiveIntegerField(
+        verbose_name='Получено предложений',
+        default=0,
+    )
+    sent_proposals_count = models.PositiveIntegerField(
+        verbose_name='Отправлено предложений',
+        default=0,
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=1,
+    )
+    archived_at = models.DateTimeField(
+        verbose_name='Дата архивации',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = 'Архивное объявление'
+        verbose_name_plural = 'Архивные объявления'
+
+    def __str__(self):
+        return self.title
+
+    thumbnail_url = Ad.thumbnail_url
+
+    def get_absolute_url(self):
+        return reverse('ads:ad_detail', kwargs={'pk': self.pk})
+
+
+class AdFingerprint(models.Model):
+    """MinHash-сигнатура текста объявления (см. ads.dedup)."""
+
+    ad = models.OneToOneField(
+        Ad,
+        verbose_name='Объявление',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='fingerprint',
+    )
+    signature = models.BinaryField(
+        verbose_name='Сигнатура',
+    )
+
+    class Meta:
+        verbose_name = 'Отпечаток объявления'
+        verbose_name_plural = 'Отпечатки объявлений'
+
+
+class AdLSHBucket(models.Model):
+    """Корзина LSH: объявления с общей корзиной — кандидаты в дубликаты."""
+
+    ad = models.ForeignKey(
+        Ad,
+        verbose_name='Объявление',
+        on_delete=models.CASCADE,
+        related_name='lsh_buckets',
+    )
+    key = models.BigIntegerField(
+        verbose_name='Ключ корзины',
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'Корзина LSH'
+        verbose_name_plural = 'Корзины LSH'
+
+
+class AdTrend(models.Model):
+    """
+    Рейтинг «в тренде»: число полученных предложений с затуханием (см.
+    ads.trending). Строки есть только у объявлений с ненулевым рейтингом.
+    """
+
+    ad = models.OneToOneField(
+        Ad,
+        verbose_name='Объявление',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend',
+    )
+    category = models.CharField(
+        verbose_name='Категория',
+        max_length=50,
+    )
+    score = models.FloatField(
+        verbose_name='Рейтинг',
+        default=0,
+    )
+    decayed_at = models.DateTimeField(
+        verbose_name='Рейтинг приведён к моменту',
+        default=timezone.now,
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг объявления'
+        verbose_name_plural = 'Рейтинги объявлений'
+        indexes = [
+            models.Index(fields=['-score'], name='ad_trend_score_idx'),
+            models.Index(fields=['category', '-score'], name='ad_trend_category_score_idx'),
+        ]
+
+
+class SavedSearch(models.Model):
+    """
+    Сохранённый поиск по списку объявлений. Новые объявления проверяются по
+    сохранённым поискам (см. ads.percolator), а не наоборот.
+    """
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='saved_searches',
+    )
+    query = models.CharField(
+        verbose_name='Ключевые слова',
+        max_length=255,
+        blank=True,
+        help_text='Без ключевых слов от трёх символов нужно указать категорию или состояние.',
+    )
+    category = models.CharField(
+        verbose_name='Категория',
+        max_length=50,
+        blank=True,
+    )
+    condition = models.CharField(
+        verbose_name='Состояние',
+        max_length=50,
+        choices=(('new', 'Новый'), ('used', 'Б/У')),
+        blank=True,
+    )
+    anchor = models.CharField(
+        verbose_name='Опорная триграмма',
+        max_length=3,
+        blank=True,
+        editable=False,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = 'Сохранённый поиск'
+        verbose_name_plural = 'Сохранённые поиски'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['anchor', 'category', 'condition'], name='saved_search_anchor_idx'),
+        ]
+
+    def __str__(self):
+        if self.query:
+            return self.query
+        return ', '.join(value for value in (self.category, self.get_condition_display()) if value)
+
+    def get_absolute_url(self):
+        params = {'q': self.query, 'category': self.category, 'condition': self.condition}
+        return f"{reverse('ads:ad_list')}?{urlencode({name: value for name, value in params.items() if value})}"
+
+
+class SavedSearchMatch(models.Model):
+    """Новое объявление, подошедшее под сохранённый поиск: очередь уведомлений."""
+
+    search = models.ForeignKey(
+        SavedSearch,
+        verbose_name='Сохранённый поиск',
+        on_delete=models.CASCADE,
+        related_name='matches',
+    )
+    ad = models.ForeignKey(
+        Ad,
+        verbose_name='Объявление',
+        on_delete=models.CASCADE,
+        related_name='search_matches',
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+    notified_at = models.DateTimeField(
+        verbose_name='Дата уведомления',
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = 'Совпадение сохранённого поиска'
+        verbose_name_plural = 'Совпадения сохранённых поисков'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['search', 'ad'], name='saved_search_match_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['search'], condition=models.Q(notified_at__isnull=True), name='saved_search_pending_idx'),
+        ]
+
+
+def get_ad_with_archive(pk):
+    """Объявление из основной таблицы, а если его там нет — из архива."""
+    for model in (Ad, ArchivedAd):
+        ad = model.objects.select_related('user').filter(pk=pk).first()
+        if ad is not None:
+            return ad
+    return None
+
+
+class ArchivedExchangeProposal(models.Model):
+    """
+    Закрытое предложение, перенесённое из основной таблицы. Объявления
+    хранятся по id: они могут быть как в основной таблице, так и в архиве.
+    """
+
+    is_archived = True
+
+    id = models.BigIntegerField(
+        primary_key=True,
+    )
+    ad_sender_id = models.BigIntegerField(
+        verbose_name='Объявление отправителя',
+        db_index=True,
+    )
+    ad_receiver_id = models.BigIntegerField(
+        verbose_name='Объявление получателя',
+        db_index=True,
+    )
+    comment = models.TextField(
+        verbose_name='Коментарий',
+    )
+    status = models.CharField(
+        verbose_name='Статус предложения',
+        max_length=50,
+        choices=(
+            ('pending', 'Ожидает'),
+            ('accepted', 'Принята'),
+            ('rejected', 'Отклонена')
+        ),
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+    )
+    archived_at = models.DateTimeField(
+        verbose_name='Дата архивации',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = 'Архивное предложение'
+        verbose_name_plural = 'Архивные предложения'
+        ordering = ['-created_at']
 
     def __str__(self):
         return f'Предложение обмена от {self.ad_sender} - {self.ad_receiver}'
 
+    # Объявления ищутся сначала в основной таблице, затем в архиве (ArchivedAd).
+    # None означает, что объявление удалено совсем, а не перенесено в архив:
+    # внешнего ключа здесь нет, и архивное предложение его переживает.
+
+    @cached_property
+    def ad_sender(self):
+        return get_ad_with_archive(self.ad_sender_id)
+
+    @cached_property
+    def ad_receiver(self):
+        return get_ad_with_archive(self.ad_receiver_id)
+
     def get_absolute_url(self):
         return reverse('ads:proposal_detail', kwargs={'pk': self.pk})
@@ -0,0 +1,48 @@
+from django.db.models import BooleanField, Case, Q, Value, When
+from django.http import Http404
+
+
+def with_ownership(queryset, owner_field, user):
+    """Добавляет к выборке признак is_owner, вычисляемый в SQL."""
+    if user.is_authenticated:
+        is_owner = Case(
+            When(Q(**{owner_field: user.pk}), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    else:
+        is_owner = Value(False, output_field=BooleanField())
+    return queryset.select_related(owner_field).annotate(is_owner=is_owner)
+
+
+def get_owned_object(request, queryset, pk, owner_field='user'):
+    """
+    Получает объект вместе с владельцем и признаком is_owner одним запросом.
+    Результат запоминается в рамках запроса, повторные вызовы не обращаются к БД.
+    """
+    resolved = getattr(request, '_owned_objects', None)
+    if resolved is None:
+        resolved = request._owned_objects = {}
+
+    key = (queryset.model._meta.label, str(pk), owner_field)
+    if key not in resolved:
+        resolved[key] = with_ownership(queryset, owner_field, request.user).get(pk=pk)
+    return resolved[key]
+
+
+class OwnedObjectMixin:
+    """Примесь для DetailView-подобных представлений с проверкой владельца."""
+
+    owner_field = 'user'
+
+    def get_object(self, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        try:
+            return get_owned_object(self.request, queryset, pk, self.owner_field)
+        except queryset.model.DoesNotExist:
+            raise Http404(f'{queryset.model._meta.verbose_name} не найдено.')
+
+    def test_func(self):
+        return self.get_object().is_owner
@@ -0,0 +1,151 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+
+
+def estimated_count(queryset, relation=None):
+    """
+    Оценка числа строк таблицы по статистике планировщика PostgreSQL. Вместо
+    таблицы можно передать частичный индекс (relation): его reltuples — оценка
+    числа строк, подходящих под условие индекса.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [relation or queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+def cached_count(queryset):
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f'{sql}{params}'.encode()).hexdigest()
+    return cache.get_or_set(
+        f'ads.pagination.count:{digest}',
+        queryset.count,
+        settings.PAGINATION_COUNT_CACHE_TIMEOUT,
+    )
+
+
+class WindowedPage(Page):
+
+    @property
+    def page_window(self):
+        """Номера страниц вокруг текущей; None обозначает пропуск."""
+        window = self.paginator.window
+        last = self.paginator.num_pages
+        start = max(self.number - window, 1)
+        end = min(self.number + window, last)
+
+        pages = list(range(start, end + 1))
+        if start > 1:
+            pages = [1] + ([None] if start > 2 else []) + pages
+        if end < last and not self.paginator.count_is_estimated:
+            pages = pages + ([None] if end < last - 1 else []) + [last]
+        elif end < last:
+            pages.append(None)
+        return pages
+
+
+class WindowedPaginator(Paginator):
+    """
+    Пагинатор, который выводит только окно ссылок вокруг текущей страницы.
+    Для больших таблиц без фильтров использует оценку числа строк, а точные
+    подсчёты для отфильтрованных выборок кэширует.
+
+    base_queryset задаёт фильтр по умолчанию (например, только активные
+    объявления), который не считается фильтром: выборка с теми же условиями
+    оценивается по статистике estimate_relation — частичного индекса с тем же
+    условием.
+    """
+
+    window = 2
+    count_is_estimated = False
+
+    def __init__(self, *args, base_queryset=None, estimate_relation=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.base_queryset = base_queryset
+        self.estimate_relation = estimate_relation
+
+    def is_unfiltered(self, queryset):
+        if self.base_queryset is None:
+            return not queryset.query.where
+        return queryset.query.where == self.base_queryset.query.where
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if self.is_unfiltered(queryset):
+            estimate = estimated_count(queryset, self.estimate_relation)
+            if estimate is not None and estimate >= settings.PAGINATION_ESTIMATE_THRESHOLD:
+                self.count_is_estimated = True
+                return estimate
+        return cached_count(queryset)
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # Оценка может быть меньше реального числа строк: дальние страницы не запрещаем.
+            if self.count_is_estimated and int(number) > 1:
+                return int(number)
+            raise
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+class CountlessPage(Page):
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    @property
+    def page_window(self):
+        return [self.number]
+
+
+class CountlessPaginator(Paginator):
+    """Пагинатор «вперёд/назад» без COUNT(*): читает на одну строку больше страницы."""
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        items = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not items and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        return CountlessPage(items[:self.per_page], number, self, has_next=len(items) > self.per_page)
+
+
+class ProposalCursorPagination(CursorPagination):
+    """Курсорная пагинация API предложений: без OFFSET и COUNT(*)."""
+
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,85 @@
+"""
+Сопоставление новых объявлений с сохранёнными поисками («перколятор»).
+
+Поиск в списке объявлений — подстрока q в заголовке или описании плюс
+точные category и condition. Любая подстрока длиной от трёх символов
+содержит каждую свою триграмму, поэтому сохранённый поиск индексируется
+одной опорной триграммой запроса (anchor). Для нового объявления выбираются
+поиски, чья опорная триграмма встречается в его тексте, а категория и
+состояние совпадают или не заданы; кандидаты проверяются точным условием.
+У поиска без запроса от трёх символов опора пустая, и он индексируется
+категорией и состоянием: такие поиски выбираются по anchor = '' и тем же
+условиям на category и condition. Поиск совсем без условий не сохраняется
+(см. SavedSearchForm) — он был бы кандидатом для каждого объявления.
+Стоимость сопоставления зависит от текста объявления и числа подходящих
+поисков, а не от общего числа сохранённых поисков.
+
+Уведомления показываются на странице сохранённых поисков и отмечаются
+доставленными только по отдельному POST-запросу (acknowledge_notifications).
+"""
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import SavedSearch, SavedSearchMatch
+
+
+def trigrams(text):
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def choose_anchor(query):
+    """
+    Опорная триграмма запроса: из его триграмм — та, под которой сохранено
+    меньше всего поисков, чтобы корзины индекса оставались небольшими.
+    У запроса короче трёх символов триграмм нет, и опора пустая.
+    """
+    grams = trigrams(query)
+    if not grams:
+        return ''
+    used = dict(
+        SavedSearch.objects.filter(anchor__in=grams)
+        .values('anchor').annotate(total=Count('id')).values_list('anchor', 'total')
+    )
+    return min(sorted(grams), key=lambda gram: used.get(gram, 0))
+
+
+def matches(search_query, ad):
+    query = search_query.lower()
+    return query in ad.title.lower() or query in ad.description.lower()
+
+
+def candidate_searches(ad):
+    anchors = trigrams(ad.title) | trigrams(ad.description) | {''}
+    return (
+        SavedSearch.objects
+        .filter(anchor__in=anchors, category__in=[ad.category, ''], condition__in=[ad.condition, ''])
+        .exclude(user_id=ad.user_id)
+        .values_list('id', 'query')
+    )
+
+
+def percolate(ad):
+    """Ставит в очередь уведомления по всем сохранённым поискам, под которые подходит объявление."""
+    search_ids = [search_id for search_id, query in candidate_searches(ad) if matches(query, ad)]
+    SavedSearchMatch.objects.bulk_create(
+        [SavedSearchMatch(search_id=search_id, ad=ad) for search_id in search_ids],
+        ignore_conflicts=True,
+    )
+    return search_ids
+
+
+def pending_notifications(user, limit):
+    """Новые совпадения пользователя; чтение их не отмечает."""
+    return list(
+        SavedSearchMatch.objects.filter(search__user=user, notified_at__isnull=True)
+        .select_related('search', 'ad')
+        .order_by('id')[:limit]
+    )
+
+
+def acknowledge_notifications(user, last_id):
+    """Отмечает доставленными совпадения пользователя до last_id включительно — те, что он видел."""
+    return SavedSearchMatch.objects.filter(
+        search__user=user, notified_at__isnull=True, id__lte=last_id
+    ).update(notified_at=timezone.now())
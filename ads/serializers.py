@@ -1,24 +1,74 @@
+from django.conf import settings
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
+from .dedup import DUPLICATE_MESSAGE, find_duplicates
 from .models import Ad, ExchangeProposal
 
 
 class AdSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ad
-        fields = ['id', 'user', 'title', 'description', 'image_url', 'category', 'condition', 'created_at']
-        read_only_fields = ['id', 'user', 'created_at']
+        fields = [
+            'id', 'user', 'title', 'description', 'image_url', 'category', 'condition', 'created_at',
+            'received_proposals_count', 'sent_proposals_count', 'pending_proposals_count', 'last_proposal_at',
+            'thumbnail_url', 'image_status', 'expires_at', 'is_active', 'version',
+        ]
+        read_only_fields = [
+            'id', 'user', 'created_at',
+            'received_proposals_count', 'sent_proposals_count', 'pending_proposals_count', 'last_proposal_at',
+            'image_status', 'expires_at', 'is_active', 'version',
+        ]
+
+    def validate(self, attrs):
+        if settings.DEDUP_REJECT:
+            title = attrs.get('title', getattr(self.instance, 'title', ''))
+            description = attrs.get('description', getattr(self.instance, 'description', ''))
+            exclude_pk = self.instance.pk if self.instance is not None else None
+            if find_duplicates(title, description, exclude_pk=exclude_pk):
+                raise serializers.ValidationError(DUPLICATE_MESSAGE)
+        return attrs
 
 
 class ExchangeProposalSerializer(serializers.ModelSerializer):
+    ad_sender = serializers.PrimaryKeyRelatedField(queryset=Ad.objects.active())
+    ad_receiver = serializers.PrimaryKeyRelatedField(queryset=Ad.objects.active())
+
     class Meta:
         model = ExchangeProposal
-        fields = ['id', 'ad_sender', 'ad_receiver', 'comment', 'status', 'created_at']
-        read_only_fields = ['created_at']
+        fields = ['id', 'ad_sender', 'ad_receiver', 'comment', 'status', 'created_at', 'version']
+        read_only_fields = ['created_at', 'version']
+
+
+class AdFilterSerializer(serializers.Serializer):
+    category = serializers.CharField(max_length=50, required=False)
+    sort = serializers.ChoiceField(choices=['trending'], required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=settings.TRENDING_API_LIMIT)
+
+
+class ExchangeProposalFilterSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=['pending', 'accepted', 'rejected'], required=False)
+    ad_sender = serializers.IntegerField(required=False)
+    ad_receiver = serializers.IntegerField(required=False)
+    direction = serializers.ChoiceField(choices=['incoming', 'outgoing'], required=False)
+    created_after = serializers.DateTimeField(required=False)
 
 
 class SpecialExchangeProposalSerializer(serializers.ModelSerializer):
     class Meta:
         model = ExchangeProposal
         fields = ['status']
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=['GET', 'POST', 'PATCH', 'DELETE'])
+    path = serializers.CharField(max_length=2000)
+    headers = serializers.DictField(child=serializers.CharField(max_length=2000), required=False)
+    body = serializers.JSONField(required=False)
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = serializers.ListField(
+        child=BatchSubRequestSerializer(), min_length=1, max_length=settings.BATCH_MAX_REQUESTS
+    )
+    atomic = serializers.BooleanField(default=False)
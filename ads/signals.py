@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, dedup, events, percolator, summary, trending
+from .changes import record_changes, record_proposal_changes
+from .models import Ad, AdTrend, ExchangeProposal, SavedSearch
+from .thumbnails import pipeline
+
+
+@receiver(pre_save, sender=Ad)
+def reset_thumbnail(sender, instance, **kwargs):
+    if instance.image_url != getattr(instance, '_loaded_image_url', None):
+        instance.thumbnail = ''
+        instance.image_status = 'pending' if instance.image_url else ''
+
+
+@receiver(post_save, sender=Ad)
+def schedule_thumbnail(sender, instance, **kwargs):
+    image_url = instance.image_url
+    if image_url and image_url != getattr(instance, '_loaded_image_url', None):
+        transaction.on_commit(lambda: pipeline.submit(instance.pk, image_url))
+    instance._loaded_image_url = image_url
+
+
+@receiver(post_save, sender=Ad)
+def index_text(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    dedup.flag_duplicate(instance, dedup.index_ad(instance))
+
+
+@receiver(post_save, sender=Ad)
+def match_saved_searches(sender, instance, created, **kwargs):
+    if created and instance.is_active:
+        percolator.percolate(instance)
+
+
+@receiver(post_save, sender=Ad)
+def sync_trend_category(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'category' not in update_fields):
+        return
+    AdTrend.objects.filter(ad=instance).exclude(category=instance.category).update(category=instance.category)
+
+
+@receiver(pre_save, sender=SavedSearch)
+def set_anchor(sender, instance, **kwargs):
+    instance.anchor = percolator.choose_anchor(instance.query)
+
+
+@receiver(post_save, sender=ExchangeProposal)
+def proposal_saved(sender, instance, created, **kwargs):
+    old_status = getattr(instance, '_loaded_status', None)
+    instance._loaded_status = instance.status
+    if created:
+        counters.proposal_created(instance)
+        trending.record_proposal(instance.ad_receiver_id)
+        events.publish_proposal_event(instance, 'proposal_created')
+    elif old_status is not None and old_status != instance.status:
+        counters.proposal_status_changed(instance, old_status)
+        events.publish_proposal_event(instance, 'proposal_status_changed')
+
+
+@receiver(post_delete, sender=ExchangeProposal)
+def proposal_deleted(sender, instance, **kwargs):
+    counters.proposal_deleted(instance)
+
+
+@receiver(post_save, sender=Ad)
+def log_ad_upsert(sender, instance, **kwargs):
+    record_changes(sender, [instance.pk], 'upsert')
+
+
+@receiver(post_delete, sender=Ad)
+def log_ad_delete(sender, instance, **kwargs):
+    record_changes(sender, [instance.pk], 'delete')
+
+
+@receiver(post_save, sender=ExchangeProposal)
+def log_proposal_upsert(sender, instance, **kwargs):
+    record_proposal_changes([(instance.pk, instance.ad_sender_id, instance.ad_receiver_id)], 'upsert')
+
+
+@receiver(post_delete, sender=ExchangeProposal)
+def log_proposal_delete(sender, instance, **kwargs):
+    # Строки уже нет, участники берутся из удалённого экземпляра.
+    record_proposal_changes([(instance.pk, instance.ad_sender_id, instance.ad_receiver_id)], 'delete')
+
+
+@receiver(post_save, sender=Ad)
+@receiver(post_delete, sender=Ad)
+def invalidate_ad_summary(sender, instance, **kwargs):
+    summary.invalidate_summaries([instance.user_id])
+
+
+@receiver(post_save, sender=ExchangeProposal)
+@receiver(post_delete, sender=ExchangeProposal)
+def invalidate_proposal_summaries(sender, instance, **kwargs):
+    summary.invalidate_ad_summaries([instance.ad_sender_id, instance.ad_receiver_id])
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Ad, ExchangeProposal
+
+
+SUMMARY_CACHE_KEY = 'ads.summary:{}'
+STATUSES = ('pending', 'accepted', 'rejected')
+
+
+def _proposal_counts(user):
+    """Входящие и исходящие предложения пользователя по статусам одним запросом."""
+    aggregates = {}
+    for direction, field in (('incoming', 'ad_receiver__user'), ('outgoing', 'ad_sender__user')):
+        for status in STATUSES:
+            aggregates[f'{direction}_{status}'] = Count('id', filter=Q(**{field: user, 'status': status}))
+    counts = ExchangeProposal.objects.filter(
+        Q(ad_sender__user=user) | Q(ad_receiver__user=user)
+    ).aggregate(**aggregates)
+    return {
+        direction: {status: counts[f'{direction}_{status}'] for status in STATUSES}
+        for direction in ('incoming', 'outgoing')
+    }
+
+
+def get_user_summary(user):
+    from .serializers import AdSerializer
+
+    key = SUMMARY_CACHE_KEY.format(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        summary = {
+            'ads': AdSerializer(Ad.objects.filter(user=user).order_by('-created_at'), many=True).data,
+            **_proposal_counts(user),
+        }
+        cache.set(key, summary, settings.USER_SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_summaries(user_ids):
+    cache.delete_many([SUMMARY_CACHE_KEY.format(user_id) for user_id in set(user_ids)])
+
+
+def invalidate_ad_summaries(ad_ids):
+    """Сбрасывает сводки владельцев объявлений (например, после изменения их предложений)."""
+    invalidate_summaries(Ad.objects.filter(pk__in=ad_ids).values_list('user_id', flat=True))
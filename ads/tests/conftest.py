@@ -1,7 +1,12 @@
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
 
 import pytest
 
+from ads import events
+from ads.fragments import local_fragments
+from barter_platform.throttling import engine
 from ads.models import Ad
 
 
@@ -29,4 +34,25 @@ def ad_receiver(db, user_receiver):
 def client_logged_in(client, user_sender):
     """Логиним клиента как отправителя для использования в тестах."""
     client.login(username='sender_user', password='senderpass')
-    return client
\ No newline at end of file
+    return client
+
+@pytest.fixture
+def api_client(user_sender):
+    """API-клиент, авторизованный как отправитель."""
+    client = APIClient()
+    client.force_authenticate(user=user_sender)
+    return client
+
+@pytest.fixture(autouse=True)
+def local_event_broker(settings, monkeypatch):
+    """Локальный брокер событий вместо LISTEN/NOTIFY PostgreSQL."""
+    settings.PROPOSAL_EVENTS_BROKER = 'ads.events.LocalBroker'
+    monkeypatch.setattr(events, '_broker', None)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Очистка кэша, фрагментов и корзин ограничения частоты между тестами."""
+    cache.clear()
+    local_fragments.clear()
+    engine.clear()
@@ -0,0 +1,83 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+import pytest
+
+from ads.admin import ExchangeProposalAdmin
+from ads.models import ExchangeProposal
+
+
+@pytest.fixture
+def admin_client_logged_in(client, db):
+    """Клиент, залогиненный под суперпользователем."""
+    User.objects.create_superuser(username='admin_user', password='adminpass')
+    client.login(username='admin_user', password='adminpass')
+    return client
+
+
+@pytest.fixture
+def proposals(ad_sender, ad_receiver):
+    """Несколько ожидающих предложений."""
+    return [
+        ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver, comment=str(number))
+        for number in range(3)
+    ]
+
+
+@pytest.mark.django_db
+def test_proposal_changelist_uses_select_related(admin_client_logged_in, proposals, django_assert_max_num_queries):
+    """Тест: число запросов списка предложений не зависит от числа строк."""
+    url = reverse('admin:ads_exchangeproposal_changelist')
+    admin_client_logged_in.get(url)
+    with django_assert_max_num_queries(8):
+        response = admin_client_logged_in.get(url)
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_proposal_change_form_has_no_ad_dropdowns(admin_client_logged_in, proposals):
+    """Тест: форма предложения не выводит выпадающие списки всех объявлений."""
+    response = admin_client_logged_in.get(
+        reverse('admin:ads_exchangeproposal_change', args=[proposals[0].pk])
+    )
+    assert response.status_code == 200
+    assert 'admin-autocomplete' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_mass_status_change_recounts_counters(admin_client_logged_in, proposals, ad_receiver):
+    """Тест массовой смены статуса одним UPDATE с пересчётом счётчиков."""
+    response = admin_client_logged_in.post(reverse('admin:ads_exchangeproposal_changelist'), {
+        'action': 'mark_accepted',
+        '_selected_action': [proposal.pk for proposal in proposals[:2]],
+    })
+    assert response.status_code == 302
+    assert ExchangeProposal.objects.filter(status='accepted').count() == 2
+    ad_receiver.refresh_from_db()
+    assert ad_receiver.pending_proposals_count == 1
+
+
+@pytest.mark.django_db
+def test_mass_delete_recounts_counters(admin_client_logged_in, proposals, ad_sender, ad_receiver, monkeypatch):
+    """Тест массового удаления: страница подтверждения, затем удаление пачками с пересчётом счётчиков."""
+    url = reverse('admin:ads_exchangeproposal_changelist')
+    data = {'action': 'delete_selected', '_selected_action': [proposal.pk for proposal in proposals]}
+    response = admin_client_logged_in.post(url, data)
+    assert response.status_code == 200
+    assert ExchangeProposal.objects.count() == 3
+
+    monkeypatch.setattr(ExchangeProposalAdmin, 'delete_batch_size', 2)
+    response = admin_client_logged_in.post(url, {**data, 'post': 'yes'})
+    assert response.status_code == 302
+    assert not ExchangeProposal.objects.exists()
+    ad_sender.refresh_from_db()
+    ad_receiver.refresh_from_db()
+    assert ad_receiver.received_proposals_count == 0
+    assert ad_sender.sent_proposals_count == 0
+
+
+@pytest.mark.django_db
+def test_ad_changelist_search(admin_client_logged_in, ad_sender, ad_receiver):
+    """Тест поиска объявлений в админке по началу заголовка."""
+    response = admin_client_logged_in.get(reverse('admin:ads_ad_changelist'), {'q': 'Sender'})
+    assert list(response.context['cl'].result_list) == [ad_sender]
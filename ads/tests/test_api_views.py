@@ -100,6 +100,49 @@ class ExchangeProposalAPITestCase(APITestCase):
         response = self.client.get(self.list_create_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_get_exchange_proposals_scoped_to_user(self):
+        """Тест: аноним и посторонний пользователь не видят чужих предложений."""
+        self.assertEqual(self.client.get(self.list_create_url).data['results'], [])
+
+        stranger = User.objects.create_user(username='stranger', password='password123')
+        self.client.force_authenticate(user=stranger)
+        self.assertEqual(self.client.get(self.list_create_url).data['results'], [])
+
+        self.client.force_authenticate(user=self.user)
+        results = self.client.get(self.list_create_url).data['results']
+        self.assertEqual([item['id'] for item in results], [self.proposal.id])
+
+    def test_filter_exchange_proposals(self):
+        """Тест фильтрации предложений по направлению и статусу."""
+        incoming = ExchangeProposal.objects.create(ad_sender=self.ad2, ad_receiver=self.ad1, status='accepted')
+        self.client.force_authenticate(user=self.user)
+
+        def ids(**params):
+            response = self.client.get(self.list_create_url, params)
+            return [item['id'] for item in response.data['results']]
+
+        self.assertEqual(ids(), [incoming.id, self.proposal.id])
+        self.assertEqual(ids(direction='incoming'), [incoming.id])
+        self.assertEqual(ids(direction='outgoing'), [self.proposal.id])
+        self.assertEqual(ids(status='pending'), [self.proposal.id])
+        self.assertEqual(ids(ad_sender=self.ad2.id), [incoming.id])
+        self.assertEqual(ids(created_after=incoming.created_at.isoformat()), [])
+
+        response = self.client.get(self.list_create_url, {'direction': 'sideways'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_exchange_proposals_cursor_pagination(self):
+        """Тест курсорной пагинации списка предложений."""
+        for _ in range(2):
+            ExchangeProposal.objects.create(ad_sender=self.ad1, ad_receiver=self.ad2)
+        self.client.force_authenticate(user=self.user)
+
+        first = self.client.get(self.list_create_url, {'page_size': 2}).data
+        self.assertEqual(len(first['results']), 2)
+        second = self.client.get(first['next']).data
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next'])
+
     def test_create_exchange_proposal_authenticated(self):
         """Тест создания предложения обмена аутентифицированным пользователем."""
         self.client.force_authenticate(user=self.user)
@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+
+from ads.archive import archive_ads, archive_proposals
+from ads.counters import recount_ad_counters
+from ads.models import Ad, ArchivedAd, ArchivedExchangeProposal, ChangeLogEntry, ExchangeProposal
+
+
+def age(queryset, days):
+    moment = timezone.now() - timedelta(days=days)
+    queryset.update(created_at=moment, updated_at=moment)
+
+
+@pytest.fixture
+def old_proposals(ad_sender, ad_receiver):
+    """Закрытое и ожидающее предложения полугодовой давности."""
+    closed = ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver, status='accepted')
+    pending = ExchangeProposal.objects.create(ad_sender=ad_receiver, ad_receiver=ad_sender)
+    age(ExchangeProposal.objects.all(), 200)
+    age(Ad.objects.all(), 200)
+    return closed, pending
+
+
+@pytest.mark.django_db
+def test_only_closed_old_proposals_archived(old_proposals):
+    """Тест: в архив уходят только закрытые старые предложения."""
+    closed, pending = old_proposals
+    assert archive_proposals(batch_size=1) == 1
+
+    assert list(ExchangeProposal.objects.values_list('pk', flat=True)) == [pending.pk]
+    archived = ArchivedExchangeProposal.objects.get()
+    assert (archived.pk, archived.status) == (closed.pk, 'accepted')
+    assert ChangeLogEntry.objects.filter(object_id=closed.pk, action='delete').exists()
+
+
+@pytest.mark.django_db
+def test_ads_archived_after_their_proposals(old_proposals, ad_sender, ad_receiver):
+    """Тест: объявление уходит в архив, только когда на него не ссылаются активные предложения."""
+    _, pending = old_proposals
+    archive_proposals()
+    assert archive_ads() == 0
+
+    pending.status = 'rejected'
+    pending.save()
+    age(ExchangeProposal.objects.all(), 200)
+    archive_proposals()
+    assert archive_ads(batch_size=1, max_batches=1) == 1
+    assert archive_ads() == 1
+    assert not Ad.objects.exists()
+    archived = ArchivedAd.objects.get(pk=ad_receiver.pk)
+    assert (archived.received_proposals_count, archived.sent_proposals_count) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_counters_survive_archiving_and_recount(old_proposals, ad_sender):
+    """Тест: пересчёт счётчиков учитывает архивные предложения."""
+    archive_proposals()
+    recount_ad_counters(
+        Ad.objects.all(), ExchangeProposal.objects.all(), ArchivedExchangeProposal.objects.all()
+    )
+    ad_sender.refresh_from_db()
+    assert (ad_sender.sent_proposals_count, ad_sender.received_proposals_count) == (1, 1)
+    assert ad_sender.pending_proposals_count == 1
+
+
+@pytest.mark.django_db
+def test_archived_objects_remain_readable(client, old_proposals, ad_sender):
+    """Тест: страницы архивных предложений и объявлений по-прежнему открываются."""
+    closed, pending = old_proposals
+    pending.status = 'rejected'
+    pending.save()
+    age(ExchangeProposal.objects.all(), 200)
+    call_command('archive_cold_data', stdout=None)
+
+    response = client.get(reverse('ads:proposal_detail', kwargs={'pk': closed.pk}))
+    assert response.status_code == 200
+    assert 'Sender Ad' in response.content.decode()
+
+    response = client.get(reverse('ads:ad_detail', kwargs={'pk': ad_sender.pk}))
+    assert response.status_code == 200
+    assert 'перенесено в архив' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_archived_proposal_outlives_deleted_ad(client, old_proposals, ad_sender, ad_receiver):
+    """Тест: если объявление удалено совсем, архивное предложение показывается без него."""
+    closed, _ = old_proposals
+    archive_proposals()
+    ad_receiver.delete()
+
+    archived = ArchivedExchangeProposal.objects.get(pk=closed.pk)
+    assert (archived.ad_sender, archived.ad_receiver) == (ad_sender, None)
+    response = client.get(reverse('ads:proposal_detail', kwargs={'pk': closed.pk}))
+    assert 'объявление удалено' in response.content.decode()
+
+
+def test_archive_handles_all_references():
+    """Тест: архивация убирает все ссылки на объявления — DELETE идёт в обход каскадов."""
+    references = {
+        (relation.related_model.__name__, relation.field.name)
+        for model in (Ad, ExchangeProposal)
+        for relation in model._meta.related_objects
+    }
+    # Предложения архивируются раньше объявлений (cold_ads), остальное убирает _detach_ads.
+    assert references == {
+        ('Ad', 'duplicate_of'),
+        ('ExchangeProposal', 'ad_sender'),
+        ('ExchangeProposal', 'ad_receiver'),
+        ('AdFingerprint', 'ad'),
+        ('AdLSHBucket', 'ad'),
+        ('AdTrend', 'ad'),
+        ('SavedSearchMatch', 'ad'),
+    }
@@ -0,0 +1,81 @@
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+import pytest
+
+from ads.models import Ad
+
+
+def batch(client, requests, **options):
+    return client.post(reverse('batch'), {'requests': requests, **options}, format='json')
+
+
+@pytest.mark.django_db
+def test_batch_runs_subrequests_in_order(api_client, ad_sender, ad_receiver):
+    """Тест: пакет выполняет чтение и запись и возвращает ответы по порядку."""
+    response = batch(api_client, [
+        {'method': 'GET', 'path': f'/api/ads/?ids={ad_receiver.pk},{ad_sender.pk}'},
+        {'method': 'POST', 'path': '/api/ads/', 'body': {
+            'title': 'New', 'description': 'Desc', 'category': 'books', 'condition': 'new',
+        }},
+        {'method': 'PATCH', 'path': f'/api/ads/{ad_receiver.pk}/', 'body': {'title': 'Stolen'}},
+        {'method': 'GET', 'path': '/api/unknown/'},
+    ])
+
+    assert response.status_code == 200
+    statuses = [item['status'] for item in response.data['responses']]
+    assert statuses == [200, 201, 403, 404]
+    first = response.data['responses'][0]['body']['results']
+    assert [ad['id'] for ad in first] == [ad_receiver.pk, ad_sender.pk]
+    assert Ad.objects.get(title='New').user == ad_sender.user
+
+
+@pytest.mark.django_db
+def test_atomic_batch_rolls_back_on_error(api_client, ad_sender):
+    """Тест: в режиме atomic ошибка одного запроса откатывает весь пакет."""
+    response = batch(api_client, [
+        {'method': 'PATCH', 'path': f'/api/ads/{ad_sender.pk}/', 'body': {'title': 'Changed'}},
+        {'method': 'POST', 'path': '/api/ads/', 'body': {'title': ''}},
+    ], atomic=True)
+
+    assert [item['status'] for item in response.data['responses']] == [200, 400]
+    ad_sender.refresh_from_db()
+    assert ad_sender.title == 'Sender Ad'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_reads_run_concurrently(api_client, ad_sender, settings):
+    """Тест: независимые GET-запросы выполняются в пуле потоков."""
+    settings.BATCH_MAX_WORKERS = 2
+    response = batch(api_client, [
+        {'method': 'GET', 'path': f'/api/ads/?ids={ad_sender.pk}'},
+        {'method': 'GET', 'path': '/api/proposals/'},
+    ])
+    assert [item['status'] for item in response.data['responses']] == [200, 200]
+    assert response.data['responses'][0]['body']['results'][0]['title'] == 'Sender Ad'
+
+
+@pytest.mark.django_db
+def test_batch_validation(api_client, settings):
+    """Тест: вложенные пакеты и неверные методы отклоняются."""
+    nested = batch(api_client, [{'method': 'POST', 'path': '/api/batch/', 'body': {}}])
+    assert nested.data['responses'][0]['status'] == 400
+    assert batch(api_client, [{'method': 'PUT', 'path': '/api/ads/'}]).status_code == 400
+    assert APIClient().post(reverse('batch'), {'requests': []}, format='json').status_code in (401, 403)
+
+
+@pytest.mark.django_db
+def test_batch_headers_are_per_subrequest(api_client, ad_sender):
+    """Тест: If-Match пакета не попадает во вложенные запросы, свои заголовки и ETag у каждого свои."""
+    path = f'/api/ads/{ad_sender.pk}/'
+    response = api_client.post(reverse('batch'), {'requests': [
+        {'method': 'PATCH', 'path': path, 'body': {'title': 'First'}},
+        {'method': 'PATCH', 'path': path, 'headers': {'If-Match': '"1"'}, 'body': {'title': 'Stale'}},
+    ]}, format='json', HTTP_IF_MATCH='"0"')
+
+    first, second = response.data['responses']
+    assert first['status'] == 200
+    assert first['headers']['ETag'] == '"2"'
+    assert second['status'] == 412
+    ad_sender.refresh_from_db()
+    assert ad_sender.title == 'First'
@@ -0,0 +1,43 @@
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+import pytest
+
+from ads.models import Ad, ExchangeProposal
+
+
+@pytest.mark.django_db
+def test_ads_fetched_by_ids_in_requested_order(user_sender, django_assert_num_queries):
+    """Тест: объявления по списку id одним запросом, в порядке запроса, с отсутствующими."""
+    ads = Ad.objects.bulk_create(
+        Ad(title=f'Ad {number}', description='Description', user=user_sender) for number in range(3)
+    )
+    ids = f'{ads[2].pk},{ads[0].pk},999999,{ads[2].pk}'
+
+    with django_assert_num_queries(1):
+        response = APIClient().get(reverse('ads_list_create'), {'ids': ids})
+
+    assert response.status_code == 200
+    assert [ad['id'] for ad in response.data['results']] == [ads[2].pk, ads[0].pk]
+    assert response.data['missing'] == [999999]
+
+
+@pytest.mark.django_db
+def test_proposals_fetched_by_ids(ad_sender, ad_receiver, user_sender):
+    """Тест: предложения по списку id, только с участием пользователя."""
+    proposal = ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver, comment='Hi')
+    client = APIClient()
+    client.force_authenticate(user=user_sender)
+    response = client.get(reverse('proposals_list_create'), {'ids': f'{proposal.pk},0'})
+    assert [item['id'] for item in response.data['results']] == [proposal.pk]
+    assert response.data['missing'] == [0]
+
+
+@pytest.mark.django_db
+def test_ids_are_validated(settings):
+    """Тест: мусор и превышение лимита id отклоняются с кодом 400."""
+    settings.API_MAX_IDS_PER_REQUEST = 2
+    client = APIClient()
+    assert client.get(reverse('ads_list_create'), {'ids': '1,x'}).status_code == 400
+    assert client.get(reverse('ads_list_create'), {'ids': ''}).status_code == 400
+    assert client.get(reverse('ads_list_create'), {'ids': '1,2,3'}).status_code == 400
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+
+from ads.changes import make_token, prune_changelog
+from ads.models import Ad, ChangeLogEntry, ExchangeProposal
+
+
+@pytest.fixture(autouse=True)
+def no_safety_lag(settings):
+    """Свежие записи отдаются сразу, кроме теста самой задержки."""
+    settings.CHANGES_FEED_SAFETY_LAG = 0
+
+
+def fetch_changes(client, since=None):
+    params = {'since': since} if since is not None else {}
+    return client.get(reverse('changes_feed'), params)
+
+
+@pytest.mark.django_db
+def test_changes_feed_returns_upserts_and_tombstones(api_client, ad_sender, user_sender):
+    """Тест: лента возвращает изменённые объявления и id удалённых."""
+    token = fetch_changes(api_client).data['next']
+
+    ad_sender.title = 'Updated title'
+    ad_sender.save()
+    doomed = Ad.objects.create(title='Doomed', description='Description', user=user_sender)
+    doomed_id = doomed.pk
+    doomed.delete()
+
+    response = fetch_changes(api_client, token)
+    assert response.status_code == 200
+    assert [ad['title'] for ad in response.data['ads']] == ['Updated title']
+    assert response.data['deleted']['ad'] == [doomed_id]
+    assert not response.data['has_more']
+
+    response = fetch_changes(api_client, response.data['next'])
+    assert response.data['ads'] == []
+    assert response.data['deleted'] == {'ad': [], 'proposal': []}
+
+
+@pytest.mark.django_db
+def test_changes_feed_pages_with_has_more(api_client, user_sender, settings):
+    """Тест: при большом числе изменений лента отдаётся страницами."""
+    settings.CHANGES_FEED_PAGE_SIZE = 2
+    token = fetch_changes(api_client).data['next']
+    for number in range(3):
+        Ad.objects.create(title=f'Ad {number}', description='Description', user=user_sender)
+
+    first = fetch_changes(api_client, token)
+    assert first.data['has_more']
+    assert [ad['title'] for ad in first.data['ads']] == ['Ad 0', 'Ad 1']
+
+    second = fetch_changes(api_client, first.data['next'])
+    assert not second.data['has_more']
+    assert [ad['title'] for ad in second.data['ads']] == ['Ad 2']
+
+
+@pytest.mark.django_db
+def test_changes_feed_hides_foreign_proposals(api_client, ad_sender, ad_receiver, user_receiver):
+    """Тест: в ленту попадают только предложения с участием пользователя."""
+    token = fetch_changes(api_client).data['next']
+    own = ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver, comment='Mine')
+    other_ad = Ad.objects.create(title='Other', description='Description', user=user_receiver)
+    ExchangeProposal.objects.create(ad_sender=other_ad, ad_receiver=ad_receiver, comment='Foreign')
+
+    response = fetch_changes(api_client, token)
+    assert [proposal['id'] for proposal in response.data['proposals']] == [own.pk]
+
+
+@pytest.mark.django_db
+def test_changes_feed_hides_foreign_tombstones(api_client, ad_receiver, user_receiver):
+    """Тест: id удалённых чужих предложений в ленту не попадают."""
+    token = fetch_changes(api_client).data['next']
+    other_ad = Ad.objects.create(title='Other', description='Description', user=user_receiver)
+    ExchangeProposal.objects.create(ad_sender=other_ad, ad_receiver=ad_receiver).delete()
+
+    response = fetch_changes(api_client, token)
+    assert response.data['deleted']['proposal'] == []
+
+
+@pytest.mark.django_db
+def test_changes_feed_includes_counter_updates(api_client, ad_sender, ad_receiver):
+    """Тест: изменение счётчиков предложений попадает в ленту как изменение объявлений."""
+    token = fetch_changes(api_client).data['next']
+    ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver)
+
+    response = fetch_changes(api_client, token)
+    counts = {ad['id']: ad['received_proposals_count'] for ad in response.data['ads']}
+    assert counts == {ad_sender.pk: 0, ad_receiver.pk: 1}
+
+
+@pytest.mark.django_db
+def test_changes_feed_holds_back_fresh_entries(api_client, user_sender, settings):
+    """Тест: записи моложе CHANGES_FEED_SAFETY_LAG не отдаются, и курсор их не перескакивает."""
+    settings.CHANGES_FEED_SAFETY_LAG = 60
+    token = fetch_changes(api_client).data['next']
+    Ad.objects.create(title='Fresh', description='Description', user=user_sender)
+
+    response = fetch_changes(api_client, token)
+    assert response.data['ads'] == []
+    assert response.data['next'] == token
+
+    ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+    response = fetch_changes(api_client, token)
+    assert [ad['title'] for ad in response.data['ads']] == ['Fresh']
+
+
+@pytest.mark.django_db
+def test_changes_feed_rejects_bad_tokens(api_client, user_sender, settings):
+    """Тест: токен, после которого записи уже удалены, даёт 410, испорченный — 400."""
+    token = fetch_changes(api_client).data['next']
+    for number in range(3):
+        Ad.objects.create(title=f'Ad {number}', description='Description', user=user_sender)
+    ChangeLogEntry.objects.update(
+        created_at=timezone.now() - timedelta(days=settings.CHANGELOG_RETENTION_DAYS + 1)
+    )
+
+    assert prune_changelog() == 2
+    assert fetch_changes(api_client, token).status_code == 410
+    assert fetch_changes(api_client, 'garbage').status_code == 400
+    assert fetch_changes(api_client, fetch_changes(api_client).data['next']).status_code == 200
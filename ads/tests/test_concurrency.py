@@ -0,0 +1,86 @@
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+import pytest
+
+from ads.bulk import set_proposals_status
+from ads.concurrency import VersionConflict
+from ads.models import Ad, ExchangeProposal
+
+
+@pytest.mark.django_db
+def test_ad_etag_and_if_match(api_client, ad_sender):
+    """Тест: PATCH с актуальным ETag проходит и возвращает новый, с устаревшим — 412."""
+    url = reverse('ad_update_delete', kwargs={'pk': ad_sender.pk})
+    etag = api_client.get(url)['ETag']
+    assert etag == f'"{ad_sender.version}"'
+
+    response = api_client.patch(url, {'title': 'First'}, HTTP_IF_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] == f'"{ad_sender.version + 1}"'
+    assert response.data['version'] == ad_sender.version + 1
+
+    response = api_client.patch(url, {'title': 'Second'}, HTTP_IF_MATCH=etag)
+    assert response.status_code == 412
+    ad_sender.refresh_from_db()
+    assert ad_sender.title == 'First'
+
+    assert api_client.patch(url, {'title': 'Third'}).status_code == 200
+    assert api_client.patch(url, {'title': 'Fourth'}, HTTP_IF_MATCH='*').status_code == 200
+
+
+@pytest.mark.django_db
+def test_concurrent_write_loses(ad_sender):
+    """Тест: условный UPDATE не перезаписывает изменение, сделанное после чтения."""
+    stale = Ad.objects.get(pk=ad_sender.pk)
+    Ad.objects.get(pk=ad_sender.pk).save()
+
+    stale.title = 'Stale'
+    stale.expect_version(stale.version)
+    with pytest.raises(VersionConflict):
+        stale.save()
+    assert Ad.objects.get(pk=ad_sender.pk).title == 'Sender Ad'
+
+
+@pytest.mark.django_db
+def test_proposal_if_match(ad_sender, ad_receiver, user_receiver):
+    """Тест: статус предложения меняется только по актуальному ETag, массовые изменения меняют версию."""
+    proposal = ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver)
+    client = APIClient()
+    client.force_authenticate(user=user_receiver)
+    url = reverse('proposal_delete_update', kwargs={'pk': proposal.pk})
+    etag = client.get(url)['ETag']
+
+    response = client.patch(url, {'status': 'accepted'}, HTTP_IF_MATCH=etag)
+    assert response.status_code == 200
+
+    response = client.patch(url, {'status': 'rejected'}, HTTP_IF_MATCH=etag)
+    assert response.status_code == 412
+    proposal.refresh_from_db()
+    assert proposal.status == 'accepted'
+
+    etag = client.get(url)['ETag']
+    set_proposals_status(ExchangeProposal.objects.filter(pk=proposal.pk), 'pending')
+    assert client.patch(url, {'status': 'rejected'}, HTTP_IF_MATCH=etag).status_code == 412
+
+
+@pytest.mark.django_db
+def test_update_view_detects_conflict(client_logged_in, ad_sender):
+    """Тест: форма редактирования с устаревшей версией не перезаписывает объявление."""
+    url = reverse('ads:update_ad', kwargs={'pk': ad_sender.pk})
+    form = client_logged_in.get(url).context['form']
+    assert form['version'].value() == ad_sender.version
+
+    ad_sender.title = 'Changed elsewhere'
+    ad_sender.save()
+
+    data = {'title': 'Mine', 'description': 'Description', 'category': 'c', 'condition': 'new',
+            'version': form['version'].value()}
+    response = client_logged_in.post(url, data)
+    assert response.status_code == 200
+    assert response.context['form'].non_field_errors()
+    ad_sender.refresh_from_db()
+    assert ad_sender.title == 'Changed elsewhere'
+
+    data['version'] = ad_sender.version
+    assert client_logged_in.post(url, data).status_code == 302
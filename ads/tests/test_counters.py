@@ -0,0 +1,55 @@
+from django.core.management import call_command
+from django.urls import reverse
+
+import pytest
+
+from ads.models import Ad, ExchangeProposal
+
+
+@pytest.mark.django_db
+def test_counters_follow_proposal_lifecycle(ad_sender, ad_receiver):
+    """Тест обновления счётчиков при создании, смене статуса и удалении предложения."""
+    proposal = ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver)
+    ad_sender.refresh_from_db()
+    ad_receiver.refresh_from_db()
+    assert ad_receiver.received_proposals_count == 1
+    assert ad_receiver.pending_proposals_count == 1
+    assert ad_sender.sent_proposals_count == 1
+    assert ad_receiver.last_proposal_at is not None
+
+    proposal = ExchangeProposal.objects.get(pk=proposal.pk)
+    proposal.status = 'accepted'
+    proposal.save()
+    ad_receiver.refresh_from_db()
+    assert ad_receiver.pending_proposals_count == 0
+    assert ad_receiver.received_proposals_count == 1
+
+    proposal.delete()
+    ad_sender.refresh_from_db()
+    ad_receiver.refresh_from_db()
+    assert ad_receiver.received_proposals_count == 0
+    assert ad_sender.sent_proposals_count == 0
+
+
+@pytest.mark.django_db
+def test_recount_proposals_command(ad_sender, ad_receiver):
+    """Тест восстановления счётчиков командой recount_proposals."""
+    ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver)
+    ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver, status='rejected')
+    Ad.objects.update(received_proposals_count=0, sent_proposals_count=0, pending_proposals_count=0)
+
+    call_command('recount_proposals', batch_size=1)
+
+    ad_sender.refresh_from_db()
+    ad_receiver.refresh_from_db()
+    assert ad_receiver.received_proposals_count == 2
+    assert ad_receiver.pending_proposals_count == 1
+    assert ad_sender.sent_proposals_count == 2
+
+
+@pytest.mark.django_db
+def test_ad_list_sorted_by_popularity(client, ad_sender, ad_receiver):
+    """Тест сортировки списка объявлений по числу полученных предложений."""
+    ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver)
+    response = client.get(reverse('ads:ad_list'), {'sort': 'popular', 'has_proposals': '1'})
+    assert [ad.pk for ad in response.context['ads']] == [ad_receiver.pk]
@@ -0,0 +1,129 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+import pytest
+
+from ads.archive import archive_ads
+from ads.dedup import ad_text, band_keys, find_duplicates, minhash
+from ads.models import Ad, AdFingerprint, AdLSHBucket
+
+
+DESCRIPTION = (
+    'Продаю велосипед Stels Navigator 500 в отличном состоянии, рама 18 дюймов, '
+    'дисковые тормоза, новая цепь и покрышки, в комплекте насос и фонарь.'
+)
+
+
+@pytest.mark.django_db
+def test_near_duplicate_flagged(user_sender, user_receiver):
+    """Тест: почти одинаковое объявление помечается как похожее на более раннее."""
+    original = Ad.objects.create(title='Велосипед Stels', description=DESCRIPTION, user=user_sender)
+    copy = Ad.objects.create(
+        title='Велосипед Stels!', description=DESCRIPTION.replace('насос', 'ключ'), user=user_receiver,
+    )
+    other = Ad.objects.create(title='Книги', description='Собрание сочинений Чехова, 12 томов.', user=user_receiver)
+
+    copy.refresh_from_db()
+    original.refresh_from_db()
+    assert copy.duplicate_of == original
+    assert original.duplicate_of is None
+    assert other.duplicate_of is None
+    assert [ad_id for ad_id, _ in find_duplicates(copy.title, copy.description)] == [copy.pk, original.pk]
+
+
+@pytest.mark.django_db
+def test_edit_reindexes(user_sender):
+    """Тест: после правки текста пометка пересчитывается, сохранение без текста индекс не трогает."""
+    original = Ad.objects.create(title='Велосипед Stels', description=DESCRIPTION, user=user_sender)
+    copy = Ad.objects.create(title='Велосипед Stels', description=DESCRIPTION, user=user_sender)
+    assert copy.duplicate_of_id == original.pk
+
+    copy.title, copy.description = 'Книги', 'Собрание сочинений Чехова, 12 томов.'
+    copy.save()
+    copy.refresh_from_db()
+    assert copy.duplicate_of is None
+
+    buckets = list(AdLSHBucket.objects.filter(ad=copy).values_list('id', flat=True))
+    copy.renew()
+    assert list(AdLSHBucket.objects.filter(ad=copy).values_list('id', flat=True)) == buckets
+
+
+@pytest.mark.django_db
+def test_reject_duplicates(settings, client_logged_in, user_sender):
+    """Тест: при DEDUP_REJECT дубликат не принимают ни форма, ни API."""
+    settings.DEDUP_REJECT = True
+    Ad.objects.create(title='Велосипед Stels', description=DESCRIPTION, user=user_sender)
+    data = {'title': 'Велосипед Stels', 'description': DESCRIPTION, 'condition': 'used', 'category': 'sport'}
+
+    response = client_logged_in.post(reverse('ads:ad_form'), data)
+    assert response.status_code == 200
+    assert 'Похожее объявление уже опубликовано.' in response.content.decode()
+
+    client = APIClient()
+    client.force_authenticate(user=user_sender)
+    response = client.post(reverse('ads_list_create'), data)
+    assert response.status_code == 400
+    assert Ad.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_scan_duplicates_command(user_sender):
+    """Тест: команда индексирует объявления без сигнатур и помечает дубликаты."""
+    original = Ad.objects.create(title='Велосипед Stels', description=DESCRIPTION, user=user_sender)
+    copy = Ad.objects.create(title='Велосипед Stels', description=DESCRIPTION, user=user_sender)
+    AdFingerprint.objects.all().delete()
+    AdLSHBucket.objects.all().delete()
+    Ad.objects.update(duplicate_of=None)
+
+    call_command('scan_duplicates', batch_size=1, stdout=None)
+
+    copy.refresh_from_db()
+    assert copy.duplicate_of == original
+    assert AdFingerprint.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_archiving_drops_index(user_sender):
+    """Тест: при архивации объявления удаляются его сигнатура и корзины, ссылки на него снимаются."""
+    original = Ad.objects.create(title='Велосипед Stels', description=DESCRIPTION, user=user_sender)
+    copy = Ad.objects.create(title='Велосипед Stels', description=DESCRIPTION, user=user_sender)
+    moment = timezone.now() - timedelta(days=365)
+    Ad.objects.filter(pk=original.pk).update(created_at=moment, updated_at=moment)
+
+    assert archive_ads() == 1
+
+    copy.refresh_from_db()
+    assert copy.duplicate_of is None
+    assert not AdFingerprint.objects.filter(ad_id=original.pk).exists()
+    assert not AdLSHBucket.objects.filter(ad_id=original.pk).exists()
+    assert find_duplicates(copy.title, copy.description, exclude_pk=copy.pk) == []
+
+
+@pytest.mark.django_db
+def test_candidates_ranked_by_shared_bands(settings, user_sender):
+    """Тест: при переполнении остаются кандидаты с наибольшим числом общих корзин."""
+    keys = band_keys(minhash(ad_text('Велосипед Stels', DESCRIPTION)))
+    for key in keys:
+        weak = Ad.objects.create(title='Книги', description=f'Собрание сочинений Чехова, {key} томов.', user=user_sender)
+        AdLSHBucket.objects.filter(ad=weak).delete()
+        AdLSHBucket.objects.create(ad=weak, key=key)
+    strong = Ad.objects.create(title='Велосипед Stels', description=DESCRIPTION, user=user_sender)
+    settings.DEDUP_MAX_CANDIDATES = 1
+
+    assert [ad_id for ad_id, _ in find_duplicates('Велосипед Stels', DESCRIPTION)] == [strong.pk]
+
+
+@pytest.mark.django_db
+def test_benchmark_dedup_rolls_back():
+    """Тест: замер идёт по заполненной таблице и не оставляет после себя данных."""
+    out = io.StringIO()
+    call_command('benchmark_dedup', count=30, queries=3, batch_size=10, stdout=out)
+
+    assert 'Найдено дубликатов: 100.0%' in out.getvalue()
+    assert not Ad.objects.exists()
+    assert not AdLSHBucket.objects.exists()
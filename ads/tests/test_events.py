@@ -0,0 +1,136 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+
+import pytest
+
+from ads import events
+from ads.bulk import set_proposals_status
+from ads.models import ExchangeProposal
+
+
+def test_hub_dispatches_only_to_subscribed_user():
+    """Тест доставки события только подписчикам нужного пользователя."""
+    hub = events.EventHub()
+    broker = events.LocalBroker(hub)
+
+    async def scenario():
+        queue = hub.subscribe(1)
+        other_queue = hub.subscribe(2)
+        broker.publish(1, {'event': 'proposal_created'})
+        message = await asyncio.wait_for(queue.get(), 1)
+        hub.unsubscribe(1, queue)
+        hub.unsubscribe(2, other_queue)
+        return message, other_queue.empty()
+
+    message, other_empty = asyncio.run(scenario())
+    assert message == {'event': 'proposal_created'}
+    assert other_empty
+    assert len(hub) == 0
+
+
+def test_hub_drops_oldest_message_when_queue_is_full():
+    """Тест: медленный подписчик не копит события сверх лимита очереди."""
+    hub = events.EventHub(queue_size=2)
+
+    async def scenario():
+        queue = hub.subscribe(1)
+        for number in range(3):
+            hub.dispatch(1, number)
+        await asyncio.sleep(0)
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+@pytest.mark.django_db
+def test_proposal_events_reach_owners(ad_sender, ad_receiver, user_sender, user_receiver,
+                                      django_capture_on_commit_callbacks):
+    """Тест публикации событий о создании и смене статуса предложения."""
+    loop = asyncio.new_event_loop()
+    receiver_queue = events.hub.subscribe(user_receiver.pk, loop=loop)
+    sender_queue = events.hub.subscribe(user_sender.pk, loop=loop)
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            proposal = ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver)
+        message = loop.run_until_complete(asyncio.wait_for(receiver_queue.get(), 1))
+        assert message['event'] == 'proposal_created'
+        assert message['proposal'] == proposal.pk
+        assert sender_queue.empty()
+
+        proposal.status = 'accepted'
+        with django_capture_on_commit_callbacks(execute=True):
+            proposal.save()
+        message = loop.run_until_complete(asyncio.wait_for(sender_queue.get(), 1))
+        assert message['event'] == 'proposal_status_changed'
+        assert message['status'] == 'accepted'
+    finally:
+        events.hub.unsubscribe(user_receiver.pk, receiver_queue)
+        events.hub.unsubscribe(user_sender.pk, sender_queue)
+        loop.close()
+
+
+@pytest.mark.django_db
+def test_bulk_status_change_publishes_events(ad_sender, ad_receiver, user_sender, user_receiver,
+                                             django_capture_on_commit_callbacks):
+    """Тест: массовая смена статуса тоже доходит до потока событий обоих владельцев."""
+    proposal = ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver)
+    loop = asyncio.new_event_loop()
+    receiver_queue = events.hub.subscribe(user_receiver.pk, loop=loop)
+    sender_queue = events.hub.subscribe(user_sender.pk, loop=loop)
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            set_proposals_status(ExchangeProposal.objects.filter(pk=proposal.pk), 'rejected')
+        for queue in (receiver_queue, sender_queue):
+            message = loop.run_until_complete(asyncio.wait_for(queue.get(), 1))
+            assert message['event'] == 'proposal_status_changed'
+            assert message['proposal'] == proposal.pk
+            assert message['status'] == 'rejected'
+    finally:
+        events.hub.unsubscribe(user_receiver.pk, receiver_queue)
+        events.hub.unsubscribe(user_sender.pk, sender_queue)
+        loop.close()
+
+
+@pytest.mark.django_db
+def test_proposal_events_view_requires_login():
+    """Тест: поток событий недоступен анонимному пользователю."""
+    response = async_to_sync(AsyncClient().get)(reverse('ads:proposal_events'))
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_proposal_events_view_streams_events(user_receiver):
+    """Тест: залогиненный пользователь получает поток text/event-stream."""
+    client = AsyncClient()
+    client.force_login(user_receiver)
+
+    async def first_chunk():
+        response = await client.get(reverse('ads:proposal_events'))
+        content = response.streaming_content
+        chunk = await content.__anext__()
+        await content.aclose()
+        return response, chunk
+
+    response, chunk = async_to_sync(first_chunk)()
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/event-stream'
+    assert chunk.startswith(b'retry:')
+
+
+@pytest.mark.django_db
+def test_wsgi_stream_is_bounded(settings, client, user_receiver):
+    """Тест: под WSGI поток синхронный и закрывается через PROPOSAL_EVENTS_MAX_DURATION."""
+    settings.PROPOSAL_EVENTS_MAX_DURATION = 0.2
+    settings.PROPOSAL_EVENTS_HEARTBEAT = 0.05
+    client.force_login(user_receiver)
+
+    response = client.get(reverse('ads:proposal_events'))
+    chunks = list(response.streaming_content)
+
+    assert not response.is_async
+    assert chunks[0].startswith(b'retry:')
+    assert b': ping\n\n' in chunks
+    assert len(events.hub) == 0
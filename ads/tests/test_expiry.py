@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+
+from ads.expiry import sweep_expired_ads
+from ads.models import Ad, ExchangeProposal
+
+
+def expire(*ads):
+    Ad.objects.filter(pk__in=[ad.pk for ad in ads]).update(expires_at=timezone.now() - timedelta(days=1))
+
+
+@pytest.mark.django_db
+def test_sweeper_deactivates_in_batches(ad_sender, ad_receiver, user_sender):
+    """Тест: истёкшие объявления снимаются пачками, действующие не трогаются."""
+    fresh = Ad.objects.create(title='Fresh', description='Description', user=user_sender)
+    expire(ad_sender, ad_receiver)
+
+    assert sweep_expired_ads(batch_size=1, max_batches=1) == 1
+    assert sweep_expired_ads(batch_size=1) == 1
+    assert list(Ad.objects.active()) == [fresh]
+
+
+@pytest.mark.django_db
+def test_sweeper_rejects_pending_proposals(ad_sender, ad_receiver):
+    """Тест: ожидающие предложения истёкшего объявления отклоняются, счётчики пересчитываются."""
+    pending = ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver)
+    accepted = ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver, status='accepted')
+    expire(ad_receiver)
+
+    call_command('expire_ads', stdout=None)
+
+    pending.refresh_from_db()
+    accepted.refresh_from_db()
+    ad_receiver.refresh_from_db()
+    assert (pending.status, accepted.status) == ('rejected', 'accepted')
+    assert ad_receiver.pending_proposals_count == 0
+    assert not ad_receiver.is_active
+
+
+@pytest.mark.django_db
+def test_inactive_ads_hidden_from_lists(client, ad_sender, ad_receiver):
+    """Тест: неактивные объявления не попадают в список, но открываются по ссылке."""
+    expire(ad_receiver)
+    sweep_expired_ads()
+
+    content = client.get(reverse('ads:ad_list')).content.decode()
+    assert 'Sender Ad' in content
+    assert 'Receiver Ad' not in content
+    assert client.get(reverse('ads:ad_detail', kwargs={'pk': ad_receiver.pk})).status_code == 200
+
+
+@pytest.mark.django_db
+def test_owner_can_renew_ad(client_logged_in, ad_sender):
+    """Тест: владелец продлевает объявление, и оно снова активно."""
+    expire(ad_sender)
+    sweep_expired_ads()
+
+    response = client_logged_in.post(reverse('ads:renew_ad', kwargs={'pk': ad_sender.pk}))
+    assert response.status_code == 302
+    ad_sender.refresh_from_db()
+    assert ad_sender.is_active
+    assert ad_sender.expires_at > timezone.now()
+
+
+@pytest.mark.django_db
+def test_other_user_cannot_renew_ad(client_logged_in, ad_receiver):
+    """Тест: чужое объявление продлить нельзя."""
+    response = client_logged_in.post(reverse('ads:renew_ad', kwargs={'pk': ad_receiver.pk}))
+    assert response.status_code == 403
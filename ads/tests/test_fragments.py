@@ -0,0 +1,98 @@
+from django.urls import reverse
+
+import pytest
+
+from ads import fragments
+from ads.fragments import local_fragments, render_ad_fragments
+from ads.models import Ad, ExchangeProposal
+
+
+@pytest.fixture
+def ads(db, user_sender):
+    """Создание четырёх объявлений (одна страница списка)."""
+    return [
+        Ad.objects.create(title=f'Ad {number}', description='Description', user=user_sender)
+        for number in range(4)
+    ]
+
+
+def render_cards(ads):
+    return render_ad_fragments('card', 'ads/fragments/ad_card.html', ads)
+
+
+@pytest.mark.django_db
+def test_version_bumped_on_save(ads):
+    """Тест: версия объявления растёт при каждом сохранении."""
+    ad = ads[0]
+    assert ad.version == 1
+    ad.title = 'Changed'
+    ad.save()
+    ad.refresh_from_db()
+    assert ad.version == 2
+
+
+@pytest.mark.django_db
+def test_version_bump_is_atomic(ads):
+    """Тест: два сохранения из одной исходной версии дают разные версии."""
+    first = Ad.objects.get(pk=ads[0].pk)
+    second = Ad.objects.get(pk=ads[0].pk)
+    first.title = 'First'
+    first.save()
+    second.title = 'Second'
+    second.save()
+
+    assert (first.version, second.version) == (2, 3)
+    assert Ad.objects.get(pk=ads[0].pk).version == 3
+
+
+@pytest.mark.django_db
+def test_proposal_rows_follow_ad_versions(client, ads, user_receiver):
+    """Тест: строки списка предложений кэшируются и обновляются при смене заголовка объявления."""
+    other = Ad.objects.create(title='Other', description='Description', user=user_receiver)
+    ExchangeProposal.objects.create(ad_sender=ads[0], ad_receiver=other)
+    url = reverse('ads:proposal_list')
+
+    assert 'Ad 0 к Other' in client.get(url).content.decode()
+    other.title = 'Renamed'
+    other.save()
+    assert 'Ad 0 к Renamed' in client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_fragments_rendered_once(ads, monkeypatch):
+    """Тест: неизменённые объявления не рендерятся повторно, изменённое — рендерится."""
+    rendered = []
+    original = fragments.render_to_string
+    monkeypatch.setattr(
+        fragments, 'render_to_string',
+        lambda template_name, context: rendered.append(context['ad'].pk) or original(template_name, context),
+    )
+
+    render_cards(ads)
+    assert len(rendered) == 4
+
+    ads[1].title = 'Updated'
+    ads[1].save()
+    cards = render_cards(ads)
+    assert rendered[4:] == [ads[1].pk]
+    assert 'Updated' in cards[1][1]
+
+
+@pytest.mark.django_db
+def test_fragments_shared_between_processes(ads, django_assert_num_queries):
+    """Тест: без локального кэша фрагменты берутся из общего кэша без запросов к БД."""
+    render_cards(ads)
+    local_fragments.clear()
+    with django_assert_num_queries(0):
+        cards = render_cards(ads)
+    assert [ad.pk for ad, _ in cards] == [ad.pk for ad in ads]
+
+
+@pytest.mark.django_db
+def test_ad_detail_without_user_query(client, ads, django_assert_num_queries):
+    """Тест: страница объявления загружает автора вместе с объявлением."""
+    url = reverse('ads:ad_detail', kwargs={'pk': ads[0].pk})
+    client.get(url)
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert 'sender_user' in response.content.decode()
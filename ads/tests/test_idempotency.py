@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from ads.models import Ad
+from barter_platform.idempotency import idempotency_cache_key
+
+
+class IdempotencyKeyTestCase(APITestCase):
+    def setUp(self):
+        """Настройка тестовой среды."""
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/ads/'
+        self.payload = {
+            'title': 'New Ad',
+            'description': 'Ad description',
+            'category': 'Ad category',
+            'condition': 'new'
+        }
+
+    def test_retry_returns_first_response(self):
+        """Тест: повтор с тем же ключом не создаёт дубликат и возвращает первый ответ."""
+        first = self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='key-1')
+        second = self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='key-1')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Ad.objects.count(), 1)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        """Тест: без заголовка каждый запрос выполняется."""
+        self.client.post(self.url, self.payload)
+        self.client.post(self.url, self.payload)
+        self.assertEqual(Ad.objects.count(), 2)
+
+    def test_key_reused_with_other_body(self):
+        """Тест: ключ нельзя переиспользовать для другого тела запроса."""
+        self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='key-1')
+        response = self.client.post(self.url, {**self.payload, 'title': 'Other'}, HTTP_IDEMPOTENCY_KEY='key-1')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Ad.objects.count(), 1)
+
+    def test_keys_are_scoped_by_user(self):
+        """Тест: одинаковые ключи разных пользователей не пересекаются."""
+        self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='key-1')
+        other_user = User.objects.create_user(username='otheruser', password='password123')
+        self.client.force_authenticate(user=other_user)
+        response = self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='key-1')
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Ad.objects.count(), 2)
+
+    @override_settings(IDEMPOTENCY_LOCK_TIMEOUT=0.1)
+    def test_concurrent_duplicate_is_not_executed(self):
+        """Тест: дубликат запроса, который ещё выполняется, не запускает представление."""
+        cache_key = idempotency_cache_key(f'user:{self.user.pk}', 'POST', self.url, 'key-1')
+        cache.add(f'{cache_key}:lock', 1)
+
+        response = self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='key-1')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Ad.objects.count(), 0)
+
+    def test_retry_after_first_response_stored(self):
+        """Тест: ответ, сохранённый между проверкой кэша и захватом блокировки, отдаётся повтору."""
+        first = self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='key-1')
+        cache_key = idempotency_cache_key(f'user:{self.user.pk}', 'POST', self.url, 'key-1')
+        original_get = cache.get
+        calls = []
+
+        def get_missing_first(key, *args, **kwargs):
+            # Первое чтение происходит до того, как первый запрос сохранил ответ.
+            if key == cache_key:
+                calls.append(key)
+                if len(calls) == 1:
+                    return None
+            return original_get(key, *args, **kwargs)
+
+        with mock.patch.object(cache, 'get', get_missing_first):
+            second = self.client.post(self.url, self.payload, HTTP_IDEMPOTENCY_KEY='key-1')
+
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Ad.objects.count(), 1)
+        self.assertIsNone(cache.get(f'{cache_key}:lock'))
+
+    def test_registration_retry(self):
+        """Тест: повтор регистрации с тем же ключом не возвращает ошибку занятого имени."""
+        self.client.force_authenticate(user=None)
+        payload = {'username': 'new_user', 'password': 'password123'}
+        first = self.client.post('/auth/registration/', payload, HTTP_IDEMPOTENCY_KEY='signup-1')
+        second = self.client.post('/auth/registration/', payload, HTTP_IDEMPOTENCY_KEY='signup-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data['id'], first.data['id'])
+
+    def test_anonymous_keys_are_scoped_by_ip(self):
+        """Тест: одинаковые ключи анонимных клиентов с разных адресов не пересекаются."""
+        self.client.force_authenticate(user=None)
+        payload = {'username': 'new_user', 'password': 'password123'}
+        self.client.post('/auth/registration/', payload, HTTP_IDEMPOTENCY_KEY='signup-1', REMOTE_ADDR='10.0.0.1')
+        response = self.client.post(
+            '/auth/registration/', {**payload, 'username': 'other_user'},
+            HTTP_IDEMPOTENCY_KEY='signup-1', REMOTE_ADDR='10.0.0.2',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(User.objects.filter(username='other_user').count(), 1)
@@ -0,0 +1,60 @@
+from django.urls import reverse
+
+import pytest
+
+from ads.forms import ExchangeProposalForm
+from ads.models import Ad
+
+
+@pytest.fixture
+def receiver_ads(db, user_receiver):
+    """Объявления другого пользователя для поиска."""
+    return Ad.objects.bulk_create(
+        Ad(title=f'Bike {number}', description='Description', user=user_receiver)
+        for number in range(25)
+    ) + [Ad.objects.create(title='Lamp', description='Description', user=user_receiver)]
+
+
+@pytest.mark.django_db
+def test_lookup_filters_by_prefix_and_excludes_own_ads(client_logged_in, ad_sender, receiver_ads):
+    """Тест поиска объявлений получателя по началу заголовка."""
+    response = client_logged_in.get(reverse('ads:ad_lookup'), {'q': 'lam'})
+    assert response.status_code == 200
+    assert [ad['title'] for ad in response.json()['results']] == ['Lamp']
+
+    response = client_logged_in.get(reverse('ads:ad_lookup'), {'q': 'Sender'})
+    assert response.json()['results'] == []
+
+
+@pytest.mark.django_db
+def test_lookup_is_paginated(client_logged_in, receiver_ads):
+    """Тест постраничной выдачи подсказок по курсору after."""
+    first = client_logged_in.get(reverse('ads:ad_lookup'), {'q': 'bike'}).json()
+    assert len(first['results']) == 20
+    assert first['next'] == first['results'][-1]['id']
+
+    second = client_logged_in.get(reverse('ads:ad_lookup'), {'q': 'bike', 'after': first['next']}).json()
+    assert len(second['results']) == 5
+    assert second['next'] is None
+
+
+@pytest.mark.django_db
+def test_proposal_form_does_not_render_all_ads(client_logged_in, ad_sender, receiver_ads):
+    """Тест: форма предложения не выводит список всех чужих объявлений."""
+    response = client_logged_in.get(reverse('ads:proposal_create'))
+    content = response.content.decode()
+    assert 'Bike 0' not in content
+    assert reverse('ads:ad_lookup') in content
+
+
+@pytest.mark.django_db
+def test_proposal_form_rejects_own_ad_as_receiver(user_sender, ad_sender, django_assert_max_num_queries):
+    """Тест: объявления проверяются запросами одной строки, а не загрузкой списка."""
+    form = ExchangeProposalForm(
+        data={'ad_sender': ad_sender.pk, 'ad_receiver': ad_sender.pk, 'comment': 'Comment'},
+        user=user_sender,
+    )
+    with django_assert_max_num_queries(3) as context:
+        assert not form.is_valid()
+    assert 'ad_receiver' in form.errors
+    assert all('"ads_ad"."id" = ' in query['sql'] for query in context.captured_queries)
@@ -0,0 +1,60 @@
+from django.test import RequestFactory
+from django.urls import reverse
+
+import pytest
+
+from ads.models import Ad, ExchangeProposal
+from ads.ownership import get_owned_object
+
+
+@pytest.mark.django_db
+def test_get_owned_object_is_memoized(ad_sender, user_sender, user_receiver, django_assert_num_queries):
+    """Тест: объект с признаком владельца загружается одним запросом и запоминается."""
+    request = RequestFactory().get('/')
+    request.user = user_sender
+
+    with django_assert_num_queries(1):
+        ad = get_owned_object(request, Ad.objects.all(), ad_sender.pk)
+        assert get_owned_object(request, Ad.objects.all(), ad_sender.pk) is ad
+        assert ad.is_owner
+        assert ad.user == user_sender
+
+    request = RequestFactory().get('/')
+    request.user = user_receiver
+    assert not get_owned_object(request, Ad.objects.all(), ad_sender.pk).is_owner
+
+
+@pytest.mark.django_db
+def test_proposal_owner_resolved_in_one_query(ad_sender, ad_receiver, user_receiver, django_assert_num_queries):
+    """Тест: владелец объявления-получателя проверяется в том же запросе."""
+    proposal = ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver)
+    request = RequestFactory().get('/')
+    request.user = user_receiver
+
+    with django_assert_num_queries(1):
+        obj = get_owned_object(request, ExchangeProposal.objects.all(), proposal.pk, 'ad_receiver__user')
+        assert obj.is_owner
+        assert obj.ad_receiver.user == user_receiver
+
+
+@pytest.mark.django_db
+def test_ad_update_view_non_owner_forbidden(client, ad_sender, user_receiver):
+    """Тест: чужое объявление нельзя редактировать через AdUpdateView."""
+    client.login(username='receiver_user', password='receiverpass')
+    response = client.get(reverse('ads:update_ad', args=[ad_sender.id]))
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_ad_update_view_missing_ad(client_logged_in):
+    """Тест: для несуществующего объявления AdUpdateView возвращает 404."""
+    response = client_logged_in.get(reverse('ads:update_ad', args=[999]))
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_proposal_update_view_non_receiver_forbidden(client_logged_in, ad_sender, ad_receiver):
+    """Тест: статус предложения может менять только получатель."""
+    proposal = ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver)
+    response = client_logged_in.get(reverse('ads:proposal_update', args=[proposal.id]))
+    assert response.status_code == 403
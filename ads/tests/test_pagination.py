@@ -0,0 +1,90 @@
+from django.urls import reverse
+
+import pytest
+
+from ads import pagination
+from ads.models import Ad
+from ads.pagination import CountlessPaginator, WindowedPaginator
+
+
+@pytest.fixture
+def many_ads(db, user_sender):
+    """Создание 60 объявлений (15 страниц по 4)."""
+    return Ad.objects.bulk_create(
+        Ad(title=f'Ad {number}', description='Description', category='books', user=user_sender)
+        for number in range(60)
+    )
+
+
+@pytest.mark.django_db
+def test_page_window_is_bounded(many_ads):
+    """Тест: окно страниц не зависит от общего числа страниц."""
+    paginator = WindowedPaginator(Ad.objects.order_by('id'), 4)
+    assert paginator.page(1).page_window == [1, 2, 3, None, 15]
+    assert paginator.page(8).page_window == [1, None, 6, 7, 8, 9, 10, None, 15]
+    assert paginator.page(15).page_window == [1, None, 13, 14, 15]
+
+
+@pytest.mark.django_db
+def test_filtered_count_is_cached(many_ads, django_assert_num_queries):
+    """Тест: точный подсчёт отфильтрованной выборки кэшируется."""
+    queryset = Ad.objects.filter(category='books').order_by('id')
+    assert WindowedPaginator(queryset, 4).count == 60
+
+    with django_assert_num_queries(0):
+        assert WindowedPaginator(queryset, 4).count == 60
+
+
+@pytest.mark.django_db
+def test_countless_paginator_does_not_count(many_ads, django_assert_num_queries):
+    """Тест: режим «вперёд/назад» обходится одним запросом без COUNT(*)."""
+    paginator = CountlessPaginator(Ad.objects.order_by('id'), 4)
+    with django_assert_num_queries(1) as context:
+        page = paginator.page(15)
+    assert 'COUNT' not in context.captured_queries[0]['sql']
+    assert len(page) == 4
+    assert page.has_previous()
+    assert not page.has_next()
+    assert paginator.page(1).has_next()
+
+
+@pytest.mark.django_db
+def test_ad_list_renders_page_window(client, many_ads):
+    """Тест: список объявлений выводит только окно ссылок на страницы."""
+    response = client.get(reverse('ads:ad_list'))
+    content = response.content.decode()
+    assert '?page=3' in content
+    assert '?page=15' in content
+    assert '?page=7' not in content
+
+
+@pytest.mark.django_db
+def test_ad_list_estimates_active_ads(client, many_ads, monkeypatch):
+    """Тест: список активных объявлений без фильтров берёт оценку по частичному индексу."""
+    relations = []
+
+    def fake_estimate(queryset, relation=None):
+        relations.append(relation)
+        return 50000
+
+    monkeypatch.setattr(pagination, 'estimated_count', fake_estimate)
+
+    response = client.get(reverse('ads:ad_list'))
+    paginator = response.context['paginator']
+    assert (paginator.count, paginator.count_is_estimated) == (50000, True)
+    assert relations == ['ad_active_id_idx']
+
+    response = client.get(reverse('ads:ad_list'), {'category': 'books'})
+    assert response.context['paginator'].count == 60
+    assert relations == ['ad_active_id_idx']
+
+
+@pytest.mark.django_db
+def test_ad_list_search_uses_countless_mode(client, many_ads):
+    """Тест: поиск по ключевым словам постранично без подсчёта страниц."""
+    response = client.get(reverse('ads:ad_list'), {'q': 'Ad', 'page': 2})
+    assert response.status_code == 200
+    assert isinstance(response.context['paginator'], CountlessPaginator)
+    content = response.content.decode()
+    assert 'q=Ad&amp;page=3' in content
+    assert 'page=15' not in content
@@ -0,0 +1,131 @@
+from django.urls import reverse
+
+import pytest
+
+from ads.models import Ad, SavedSearch, SavedSearchMatch
+from ads.percolator import choose_anchor, percolate
+
+
+def create_ad(user, title, description='Описание', category='sport', condition='used'):
+    return Ad.objects.create(title=title, description=description, user=user, category=category, condition=condition)
+
+
+@pytest.mark.django_db
+def test_new_ad_matches_saved_searches(user_sender, user_receiver):
+    """Тест: новое объявление ставит уведомления только по подходящим поискам."""
+    by_query = SavedSearch.objects.create(user=user_sender, query='Велосипед')
+    by_filters = SavedSearch.objects.create(user=user_sender, query='сипед', category='sport', condition='used')
+    SavedSearch.objects.create(user=user_sender, query='велосипед', condition='new')
+    SavedSearch.objects.create(user=user_sender, query='самокат')
+    SavedSearch.objects.create(user=user_receiver, query='велосипед')
+
+    ad = create_ad(user_receiver, 'Горный ВЕЛОСИПЕД')
+
+    assert set(SavedSearchMatch.objects.filter(ad=ad).values_list('search', flat=True)) == {
+        by_query.pk, by_filters.pk,
+    }
+
+
+@pytest.mark.django_db
+def test_matches_description_substring(user_sender, user_receiver):
+    """Тест: как и в списке объявлений, запрос ищется подстрокой в описании."""
+    search = SavedSearch.objects.create(user=user_sender, query='дисковые торм')
+    ad = create_ad(user_receiver, 'Велосипед', description='Рама 18", дисковые тормоза.')
+
+    assert list(SavedSearchMatch.objects.values_list('search', 'ad')) == [(search.pk, ad.pk)]
+
+
+@pytest.mark.django_db
+def test_anchor_spreads_searches(user_sender):
+    """Тест: опорная триграмма выбирается из менее занятых корзин."""
+    first = SavedSearch.objects.create(user=user_sender, query='abcd')
+    second = SavedSearch.objects.create(user=user_sender, query='abcd')
+
+    assert {first.anchor, second.anchor} == {'abc', 'bcd'}
+    assert choose_anchor('ab') == ''
+
+
+@pytest.mark.django_db
+def test_percolate_query_count(user_sender, user_receiver, django_assert_num_queries):
+    """Тест: число запросов при сопоставлении не зависит от числа сохранённых поисков."""
+    SavedSearch.objects.bulk_create(
+        SavedSearch(user=user_sender, query=f'товар {n}', anchor=choose_anchor(f'товар {n}'))
+        for n in range(200)
+    )
+    ad = create_ad(user_receiver, 'Товар 7')
+
+    with django_assert_num_queries(2):
+        matched = percolate(ad)
+    assert matched == list(SavedSearch.objects.filter(query='товар 7').values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+def test_saved_search_views(client_logged_in, user_sender, user_receiver):
+    """Тест: поиск сохраняется, уведомления гаснут только после подтверждения POST-запросом, поиск удаляется."""
+    response = client_logged_in.post(reverse('ads:saved_search_create'), {'query': 'велосипед', 'category': 'sport'})
+    assert response.status_code == 302
+    search = SavedSearch.objects.get(user=user_sender)
+    assert search.get_absolute_url() == reverse('ads:ad_list') + '?q=%D0%B2%D0%B5%D0%BB%D0%BE%D1%81%D0%B8%D0%BF%D0%B5%D0%B4&category=sport'
+
+    create_ad(user_receiver, 'Велосипед Stels')
+    for _ in range(2):
+        response = client_logged_in.get(reverse('ads:saved_search_list'))
+        assert [match.ad.title for match in response.context['notifications']] == ['Велосипед Stels']
+
+    last_id = response.context['notifications'][-1].id
+    response = client_logged_in.post(reverse('ads:saved_search_notifications_ack'), {'last_id': last_id})
+    assert response.status_code == 302
+    response = client_logged_in.get(reverse('ads:saved_search_list'))
+    assert response.context['notifications'] == []
+
+    response = client_logged_in.post(reverse('ads:saved_search_delete', kwargs={'pk': search.pk}))
+    assert response.status_code == 302
+    assert not SavedSearch.objects.exists()
+
+
+@pytest.mark.django_db
+def test_saved_search_limit(settings, client_logged_in, user_sender):
+    """Тест: больше SAVED_SEARCHES_PER_USER поисков сохранить нельзя."""
+    settings.SAVED_SEARCHES_PER_USER = 1
+    SavedSearch.objects.create(user=user_sender, query='велосипед')
+
+    response = client_logged_in.post(reverse('ads:saved_search_create'), {'query': 'самокат'})
+    assert response.status_code == 200
+    assert SavedSearch.objects.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', ['', 'ab', '  ab  '])
+def test_search_without_conditions_rejected(client_logged_in, query):
+    """Тест: поиск без триграммы, категории и состояния не сохраняется — он подходил бы под каждое объявление."""
+    response = client_logged_in.post(reverse('ads:saved_search_create'), {'query': query})
+    assert response.status_code == 200
+    assert not SavedSearch.objects.exists()
+
+
+@pytest.mark.django_db
+def test_search_by_filters_only(client_logged_in, user_sender, user_receiver):
+    """Тест: поиск только по категории или с коротким запросом индексируется категорией и состоянием."""
+    response = client_logged_in.post(reverse('ads:saved_search_create'), {'query': '', 'category': 'sport'})
+    assert response.status_code == 302
+    by_category = SavedSearch.objects.get(user=user_sender)
+    assert by_category.anchor == ''
+    assert str(by_category) == 'sport'
+    short = SavedSearch.objects.create(user=user_sender, query='ab', condition='used')
+    SavedSearch.objects.create(user=user_sender, condition='new')
+
+    ad = create_ad(user_receiver, 'Велосипед', description='Рама ab', category='sport', condition='used')
+    other = create_ad(user_receiver, 'Книги', category='books', condition='used')
+
+    assert set(SavedSearchMatch.objects.filter(ad=ad).values_list('search', flat=True)) == {
+        by_category.pk, short.pk,
+    }
+    assert not SavedSearchMatch.objects.filter(ad=other).exists()
+
+
+@pytest.mark.django_db
+def test_save_button_needs_filters(client_logged_in):
+    """Тест: кнопка сохранения поиска показывается только при заданных условиях."""
+    assert 'Сохранить поиск' not in client_logged_in.get(reverse('ads:ad_list')).content.decode()
+    response = client_logged_in.get(reverse('ads:ad_list'), {'category': 'sport'})
+    assert 'Сохранить поиск' in response.content.decode()
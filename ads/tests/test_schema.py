@@ -0,0 +1,51 @@
+import gzip
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+import pytest
+
+from barter_platform import schema
+
+
+@pytest.fixture
+def schema_root(settings, tmp_path):
+    """Отдельный каталог для схемы и пустой кэш в памяти."""
+    settings.SCHEMA_ROOT = tmp_path
+    schema.clear()
+    yield tmp_path
+    schema.clear()
+
+
+def test_schema_served_with_etag_and_gzip(client, schema_root):
+    """Тест: схема отдаётся с ETag, сжатой и с ответом 304 на повтор."""
+    response = client.get('/api/schema/', {'format': 'json'}, HTTP_ACCEPT_ENCODING='gzip')
+    assert response.status_code == 200
+    assert response['Content-Encoding'] == 'gzip'
+    assert b'"openapi"' in gzip.decompress(response.content)
+
+    etag = response['ETag']
+    assert client.get('/api/schema/', {'format': 'json'}, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get('/api/schema/').content.startswith(b'openapi:')
+
+
+def test_build_schema_writes_and_checks(schema_root):
+    """Тест: build_schema сохраняет схему, а --check находит расхождения с кодом."""
+    with pytest.raises(CommandError):
+        call_command('build_schema', '--check')
+
+    call_command('build_schema')
+    assert (schema_root / 'openapi.json.gz').exists()
+    call_command('build_schema', '--check')
+
+    (schema_root / 'openapi.yaml').write_text('openapi: 3.0.3\n')
+    with pytest.raises(CommandError):
+        call_command('build_schema', '--check')
+
+
+def test_schema_loaded_from_disk(client, schema_root):
+    """Тест: сохранённая схема отдаётся без повторной генерации."""
+    call_command('build_schema')
+    (schema_root / 'openapi.yaml').write_bytes(b'openapi: prebuilt\n')
+    (schema_root / 'openapi.yaml.gz').unlink()
+    assert client.get('/api/schema/').content == b'openapi: prebuilt\n'
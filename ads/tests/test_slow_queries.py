@@ -0,0 +1,89 @@
+from django.urls import reverse
+
+import pytest
+
+from barter_platform.slow_queries import SlowQuery, SlowQueryLog, explain_options, normalize_sql, slow_log
+
+
+@pytest.fixture
+def log_all_queries(settings):
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    slow_log.clear()
+    yield slow_log
+    slow_log.clear()
+
+
+def entry(normalized, duration):
+    return SlowQuery(normalized, normalized, [], duration, 'view', [], None, 'default')
+
+
+def test_normalize_sql():
+    """Тест: литералы и списки параметров IN сводятся к одному виду."""
+    assert normalize_sql("SELECT * FROM t WHERE a = 'x''y' AND b IN (%s, %s,%s) LIMIT 21") == (
+        'SELECT * FROM t WHERE a = ? AND b IN (...) LIMIT ?'
+    )
+
+
+def test_ring_buffer_and_worst():
+    """Тест: буфер хранит последние записи, группы сортируются по выбранной метрике."""
+    log = SlowQueryLog(size=3)
+    for normalized, duration in [('old', 100), ('a', 10), ('a', 30), ('b', 35)]:
+        log.add(entry(normalized, duration))
+
+    assert len(log) == 3
+    assert [group['normalized'] for group in log.worst('total')] == ['a', 'b']
+    assert [group['normalized'] for group in log.worst('max')] == ['b', 'a']
+    assert log.worst()[0]['example'].duration == 30
+
+
+def test_explain_interval():
+    """Тест: один и тот же запрос объясняется не чаще explain_interval."""
+    now = [0]
+    log = SlowQueryLog(explain_interval=60, clock=lambda: now[0])
+
+    assert log.should_explain('a')
+    assert not log.should_explain('a')
+    assert log.should_explain('b')
+    now[0] = 61
+    assert log.should_explain('a')
+
+
+@pytest.mark.django_db
+def test_middleware_records_view_and_stack(client, ad_sender, log_all_queries):
+    """Тест: записываются SQL, типы параметров без значений, представление и стек в коде проекта."""
+    client.get(reverse('ads:ad_list'), {'q': 'Sender'})
+
+    entries = [item for item in log_all_queries.entries() if 'ads_ad' in item.sql]
+    assert entries
+    assert {item.view for item in entries} == {'ads:ad_list'}
+    assert any('str' in item.params for item in entries)
+    assert not any('Sender' in repr(item.params) for item in entries)
+    assert any(frame.startswith('/ads/views.py') for item in entries for frame in item.stack)
+
+
+def test_explain_analyze_is_opt_in(settings):
+    """Тест: ANALYZE только по настройке и только для чтения без блокировок."""
+    assert explain_options('SELECT 1') == ''
+
+    settings.SLOW_QUERY_EXPLAIN_ANALYZE = True
+    assert explain_options('SELECT 1') == '(ANALYZE, BUFFERS)'
+    assert explain_options('SELECT * FROM t WHERE id = %s FOR UPDATE') == ''
+    assert explain_options('SELECT * FROM t FOR NO KEY UPDATE SKIP LOCKED') == ''
+    assert explain_options('UPDATE t SET a = 1') == ''
+
+
+@pytest.mark.django_db
+def test_page_is_superuser_only(client, user_sender, log_all_queries):
+    """Тест: страницу медленных запросов видят только суперпользователи."""
+    client.force_login(user_sender)
+    user_sender.is_staff = True
+    user_sender.save()
+    assert client.get(reverse('slow_queries')).status_code == 403
+
+    user_sender.is_superuser = True
+    user_sender.save()
+    client.get(reverse('ads:ad_list'))
+    response = client.get(reverse('slow_queries'), {'order': 'max'})
+    assert response.status_code == 200
+    assert response.context['order'] == 'max'
+    assert response.context['groups']
@@ -0,0 +1,62 @@
+import io
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management import call_command
+
+from barter_platform.startup import import_cost, parse_importtime
+
+
+DEFERRED_MODULES = [
+    'ads.admin',
+    'django.contrib.auth.admin',
+    'drf_spectacular.generators',
+    'drf_spectacular.views',
+    'PIL.Image',
+]
+
+
+def test_heavy_modules_are_not_loaded_at_startup():
+    """Тест: админка, генератор схемы и Pillow не загружаются при старте воркера."""
+    result = subprocess.run(
+        [sys.executable, '-m', 'barter_platform.startup'],
+        cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    modules = set(json.loads(result.stdout)['modules'])
+    assert 'ads.api_views' in modules
+    assert not modules.intersection(DEFERRED_MODULES)
+
+
+def test_system_checks_discover_admin_modules():
+    """Тест: системные проверки сами загружают admin.py, и ModelAdmin проверяются."""
+    script = (
+        'import sys, django; django.setup(); '
+        'from django.core import checks; checks.run_checks(tags=[checks.Tags.admin]); '
+        'from django.contrib import admin; from ads.models import Ad; '
+        "print('ads.admin' in sys.modules, admin.site.is_registered(Ad))"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.split() == ['True', 'True']
+
+
+def test_import_cost_sums_package_modules():
+    """Тест: стоимость импорта пакета складывается из собственного времени его модулей."""
+    timings = parse_importtime(
+        'import time: self [us] | cumulative | imported package\n'
+        'import time:      1000 |       3000 | ads\n'
+        'import time:      2000 |       2000 |   ads.models\n'
+        'import time:      5000 |       5000 | adsense\n'
+    )
+    assert import_cost(timings, 'ads') == 3.0
+
+
+def test_profile_startup_command():
+    """Тест: команда выводит стоимость запуска по приложениям."""
+    out = io.StringIO()
+    call_command('profile_startup', top=3, stdout=out)
+    assert 'django.contrib.auth' in out.getvalue()
+    assert 'barter_platform.urls' in out.getvalue()
@@ -0,0 +1,45 @@
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+import pytest
+
+from ads.models import Ad, ExchangeProposal
+
+
+@pytest.mark.django_db
+def test_summary_counts_proposals_by_status(api_client, ad_sender, ad_receiver, user_receiver):
+    """Тест: сводка считает входящие и исходящие предложения по статусам."""
+    other = Ad.objects.create(title='Other', description='Description', user=user_receiver)
+    ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad_receiver, comment='1')
+    ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=other, comment='2', status='accepted')
+    ExchangeProposal.objects.create(ad_sender=other, ad_receiver=ad_sender, comment='3', status='rejected')
+
+    response = api_client.get(reverse('my_summary'))
+
+    assert response.status_code == 200
+    assert [ad['id'] for ad in response.data['ads']] == [ad_sender.pk]
+    assert response.data['outgoing'] == {'pending': 1, 'accepted': 1, 'rejected': 0}
+    assert response.data['incoming'] == {'pending': 0, 'accepted': 0, 'rejected': 1}
+
+
+@pytest.mark.django_db
+def test_summary_is_cached_and_invalidated(api_client, ad_sender, ad_receiver, django_assert_num_queries):
+    """Тест: сводка кэшируется и сбрасывается при изменении предложений."""
+    api_client.get(reverse('my_summary'))
+    with django_assert_num_queries(0):
+        api_client.get(reverse('my_summary'))
+
+    proposal = ExchangeProposal.objects.create(ad_sender=ad_receiver, ad_receiver=ad_sender, comment='Hi')
+    assert api_client.get(reverse('my_summary')).data['incoming']['pending'] == 1
+
+    proposal.status = 'accepted'
+    proposal.save()
+    assert api_client.get(reverse('my_summary')).data['incoming'] == {
+        'pending': 0, 'accepted': 1, 'rejected': 0,
+    }
+
+
+@pytest.mark.django_db
+def test_summary_requires_authentication():
+    """Тест: анонимный пользователь не получает сводку."""
+    assert APIClient().get(reverse('my_summary')).status_code in (401, 403)
@@ -0,0 +1,126 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+import pytest
+
+from barter_platform.throttling import TokenBucketEngine, engine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_refills():
+    """Тест: корзина пропускает пачку запросов и пополняется со временем."""
+    clock = FakeClock()
+    engine = TokenBucketEngine(clock=clock)
+
+    assert all(engine.consume('key', '3/min') == 0 for _ in range(3))
+    assert engine.consume('key', '3/min') == pytest.approx(20)
+
+    clock.now = 20
+    assert engine.consume('key', '3/min') == 0
+    assert engine.consume('other', '3/min') == 0
+
+
+def test_bucket_count_is_bounded():
+    """Тест: число корзин в памяти ограничено."""
+    engine = TokenBucketEngine(max_buckets=10)
+    for number in range(100):
+        engine.consume(f'key-{number}', '1/min')
+    assert len(engine._buckets) == 10
+
+
+@pytest.mark.django_db
+def test_buckets_synced_through_shared_cache():
+    """Тест: при синхронизации учитывается расход других процессов."""
+    first = TokenBucketEngine(sync_interval=0)
+    second = TokenBucketEngine(sync_interval=0)
+
+    for _ in range(4):
+        assert first.consume('key', '5/min') == 0
+    assert second.consume('key', '5/min') == 0
+    assert second.consume('key', '5/min') > 0
+
+
+@pytest.mark.django_db
+def test_api_post_throttled(settings, user_sender):
+    """Тест: превышение лимита создания объявлений через API возвращает 429."""
+    settings.THROTTLE_RATES = {**settings.THROTTLE_RATES, 'ads_create': '2/min'}
+    client = APIClient()
+    client.force_authenticate(user=user_sender)
+    payload = {'title': 'Ad', 'description': 'Description', 'category': 'some', 'condition': 'new'}
+
+    assert client.post('/api/ads/', payload).status_code == 201
+    assert client.post('/api/ads/', payload).status_code == 201
+    response = client.post('/api/ads/', payload)
+    assert response.status_code == 429
+    assert 'Retry-After' in response
+    assert client.get('/api/ads/').status_code == 200
+
+
+@pytest.mark.django_db
+def test_registration_throttled_before_db_work(settings, django_assert_num_queries):
+    """Тест: отклонённая регистрация не обращается к БД."""
+    settings.THROTTLE_RATES = {**settings.THROTTLE_RATES, 'registration': '1/min'}
+    client = APIClient()
+    client.post('/auth/registration/', {'username': 'first', 'password': 'password123'})
+
+    with django_assert_num_queries(0):
+        response = client.post('/auth/registration/', {'username': 'second', 'password': 'password123'})
+    assert response.status_code == 429
+    assert not User.objects.filter(username='second').exists()
+
+
+@pytest.mark.django_db
+def test_html_create_view_throttled(settings, client_logged_in):
+    """Тест ограничения частоты для HTML-представления создания объявления."""
+    settings.THROTTLE_RATES = {**settings.THROTTLE_RATES, 'ads_create': '1/min'}
+    data = {'title': 'Ad', 'description': 'Description', 'category': 'some', 'condition': 'new'}
+
+    assert client_logged_in.post(reverse('ads:ad_form'), data).status_code == 302
+    response = client_logged_in.post(reverse('ads:ad_form'), data)
+    assert response.status_code == 429
+    assert response['Retry-After'] == '60'
+
+
+@pytest.mark.django_db
+def test_sync_survives_evicted_counter(monkeypatch):
+    """Тест: если счётчик вытеснен между add и incr, он создаётся заново, а расход не теряется."""
+    from django.core.cache import cache
+
+    engine = TokenBucketEngine(sync_interval=0)
+    original_incr = cache.incr
+    calls = []
+
+    def flaky_incr(key, delta=1):
+        calls.append(key)
+        if len(calls) == 1:
+            cache.delete(key)
+        return original_incr(key, delta)
+
+    monkeypatch.setattr(cache, 'incr', flaky_incr)
+    assert engine.consume('key', '5/min') == 0
+    assert len(calls) == 2
+    assert original_incr(calls[0], 0) == 1
+
+
+@pytest.mark.django_db
+def test_ip_rejection_refunds_scope_token(settings, user_sender):
+    """Тест: запрос, отклонённый по лимиту IP, не расходует лимит эндпоинта."""
+    settings.THROTTLE_RATES = {**settings.THROTTLE_RATES, 'ads_create': '2/min', 'ip': '1/min'}
+    client = APIClient()
+    client.force_authenticate(user=user_sender)
+    payload = {'title': 'Ad', 'description': 'Description', 'category': 'some', 'condition': 'new'}
+
+    assert client.post('/api/ads/', payload).status_code == 201
+    assert client.post('/api/ads/', payload).status_code == 429
+
+    bucket = engine._buckets[f'ads_create:user:{user_sender.pk}']
+    assert bucket.tokens == pytest.approx(1, abs=0.01)
@@ -0,0 +1,141 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+import pytest
+
+from ads.models import Ad
+from ads.thumbnails import ImageError, fetch_image, make_thumbnail, pipeline, process_ad_image
+
+
+def make_png(size=(800, 600)):
+    output = io.BytesIO()
+    Image.new('RGB', size, color='red').save(output, format='PNG')
+    return output.getvalue()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    routes = {
+        '/image.png': ('image/png', make_png()),
+        '/page.html': ('text/html', b'<html></html>'),
+        '/broken.png': ('image/png', b'not an image'),
+        '/huge.png': ('image/png', b'0' * 2048),
+    }
+
+    redirects = {
+        '/redirect': '/image.png',
+        '/metadata': 'http://169.254.169.254/latest/meta-data/',
+    }
+
+    def do_GET(self):
+        if self.path in self.redirects:
+            self.send_response(302)
+            self.send_header('Location', self.redirects[self.path])
+            self.end_headers()
+            return
+        if self.path not in self.routes:
+            self.send_error(404)
+            return
+        content_type, body = self.routes[self.path]
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(settings):
+    """Локальный HTTP-сервер, отдающий тестовые изображения; loopback разрешён явно."""
+    settings.THUMBNAIL_ALLOWED_NETWORKS = ['127.0.0.1/32']
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """Временный каталог для миниатюр."""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_thumbnail_created_for_valid_image(stub_server, media_root, user_sender):
+    """Тест создания миниатюры в хранилище, адресуемом по содержимому."""
+    url = f'{stub_server}/image.png'
+    ad = Ad.objects.create(title='Ad', description='Description', user=user_sender, image_url=url)
+    assert ad.image_status == 'pending'
+
+    assert process_ad_image(ad.pk, url) == 'ready'
+
+    ad.refresh_from_db()
+    assert ad.thumbnail.startswith('thumbnails/')
+    with Image.open(media_root / ad.thumbnail) as thumbnail:
+        assert max(thumbnail.size) <= 320
+
+    other = Ad.objects.create(title='Other', description='Description', user=user_sender, image_url=url)
+    process_ad_image(other.pk, url)
+    other.refresh_from_db()
+    assert other.thumbnail == ad.thumbnail
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('path', ['/page.html', '/broken.png', '/huge.png', '/missing.png'])
+def test_invalid_images_rejected(stub_server, media_root, settings, user_sender, path):
+    """Тест отклонения ссылок с неверным типом, битым содержимым, большим размером или 404."""
+    settings.THUMBNAIL_MAX_SOURCE_SIZE = 1024
+    url = f'{stub_server}{path}'
+    ad = Ad.objects.create(title='Ad', description='Description', user=user_sender, image_url=url)
+
+    assert process_ad_image(ad.pk, url) == 'invalid'
+    ad.refresh_from_db()
+    assert ad.thumbnail == ''
+
+
+@pytest.mark.django_db(transaction=True)
+def test_changed_image_url_is_processed_in_background(stub_server, media_root, user_sender):
+    """Тест: изменение ссылки на изображение ставит задачу в фоновый пул."""
+    ad = Ad.objects.create(title='Ad', description='Description', user=user_sender)
+    assert ad.image_status == ''
+
+    ad.image_url = f'{stub_server}/image.png'
+    ad.save()
+
+    pipeline._executor.shutdown(wait=True)
+    pipeline._executor = None
+    ad.refresh_from_db()
+    assert ad.image_status == 'ready'
+
+
+@pytest.mark.django_db
+def test_redirect_is_followed(stub_server, media_root, user_sender):
+    """Тест: перенаправление на разрешённый адрес проходит."""
+    url = f'{stub_server}/redirect'
+    ad = Ad.objects.create(title='Ad', description='Description', user=user_sender, image_url=url)
+
+    assert process_ad_image(ad.pk, url) == 'ready'
+
+
+@pytest.mark.parametrize('path', ['/image.png', '/metadata'])
+def test_private_addresses_blocked(stub_server, settings, path):
+    """Тест: loopback и перенаправление на адрес метаданных облака не загружаются."""
+    if path == '/image.png':
+        settings.THUMBNAIL_ALLOWED_NETWORKS = []
+    with pytest.raises(ImageError, match='недоступен'):
+        fetch_image(f'{stub_server}{path}')
+
+
+def test_pixel_limit(settings):
+    """Тест: картинка с огромным числом пикселей отклоняется до распаковки."""
+    settings.THUMBNAIL_MAX_PIXELS = 1000
+    with pytest.raises(ImageError):
+        make_thumbnail(make_png((100, 100)))
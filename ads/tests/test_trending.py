@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+import pytest
+
+from ads import trending
+from ads.models import Ad, AdTrend, ExchangeProposal
+
+
+@pytest.fixture
+def ads(user_sender, user_receiver):
+    return [
+        Ad.objects.create(title=f'Ad {n}', description='Description', user=user_receiver, category=category)
+        for n, category in enumerate(['books', 'books', 'sport'])
+    ]
+
+
+def propose(ad_sender, ad, count):
+    for _ in range(count):
+        ExchangeProposal.objects.create(ad_sender=ad_sender, ad_receiver=ad)
+
+
+@pytest.mark.django_db
+def test_proposals_update_scores(ad_sender, ads):
+    """Тест: полученные предложения увеличивают рейтинг, отправленные — нет."""
+    propose(ad_sender, ads[0], 2)
+    propose(ad_sender, ads[2], 1)
+
+    assert dict(AdTrend.objects.values_list('ad_id', 'score')) == {ads[0].pk: 2, ads[2].pk: 1}
+    assert AdTrend.objects.get(ad=ads[2]).category == 'sport'
+
+
+@pytest.mark.django_db
+def test_decay_halves_and_prunes(settings, ad_sender, ads):
+    """Тест: за период полураспада рейтинги уменьшаются вдвое, близкие к нулю удаляются."""
+    settings.TRENDING_MIN_SCORE = 0.75
+    propose(ad_sender, ads[0], 4)
+    propose(ad_sender, ads[1], 1)
+    half_life = timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+    AdTrend.objects.update(decayed_at=timezone.now() - half_life)
+
+    assert trending.decay(batch_size=1) == (2, 1)
+    assert dict(AdTrend.objects.values_list('ad_id', 'score')) == {ads[0].pk: pytest.approx(2, rel=1e-3)}
+
+    call_command('decay_trending', stdout=None)
+    assert AdTrend.objects.get().score == pytest.approx(2, rel=1e-3)
+
+
+@pytest.mark.django_db
+def test_decay_uses_elapsed_time(settings, ad_sender, ads):
+    """Тест: затухание зависит от прошедшего времени, а не от числа запусков."""
+    propose(ad_sender, ads[0], 8)
+    start = AdTrend.objects.get().decayed_at
+    half_life = timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+
+    trending.decay(now=start + half_life)
+    trending.decay(now=start + half_life)
+    assert AdTrend.objects.get().score == pytest.approx(4)
+
+    trending.decay(now=start + 3 * half_life)
+    assert AdTrend.objects.get().score == pytest.approx(1)
+
+
+@pytest.mark.django_db
+def test_rebuild_from_proposals(settings, ad_sender, ads):
+    """Тест: пересчёт учитывает возраст предложений."""
+    propose(ad_sender, ads[0], 2)
+    propose(ad_sender, ads[1], 1)
+    ExchangeProposal.objects.filter(ad_receiver=ads[0]).update(
+        created_at=timezone.now() - timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+    )
+    AdTrend.objects.all().delete()
+
+    call_command('decay_trending', rebuild=True, stdout=None)
+
+    scores = dict(AdTrend.objects.values_list('ad_id', 'score'))
+    assert scores[ads[0].pk] == pytest.approx(1, rel=1e-3)
+    assert scores[ads[1].pk] == pytest.approx(1, rel=1e-3)
+
+
+@pytest.mark.django_db
+def test_category_change_moves_score(ad_sender, ads):
+    """Тест: при смене категории объявления рейтинг переходит в новую категорию."""
+    propose(ad_sender, ads[0], 1)
+    ads[0].category = 'sport'
+    ads[0].save()
+
+    assert AdTrend.objects.get(ad=ads[0]).category == 'sport'
+
+
+@pytest.mark.django_db
+def test_trending_sort(client, ad_sender, ads):
+    """Тест: сортировка «в тренде» в списке и в API, с фильтром по категории."""
+    propose(ad_sender, ads[0], 1)
+    propose(ad_sender, ads[1], 3)
+    propose(ad_sender, ads[2], 2)
+
+    response = client.get(reverse('ads:ad_list'), {'sort': 'trending', 'category': 'books'})
+    assert [ad.pk for ad in response.context['ads']] == [ads[1].pk, ads[0].pk]
+
+    response = APIClient().get(reverse('ads_list_create'), {'sort': 'trending', 'limit': 2})
+    assert [ad['id'] for ad in response.data] == [ads[1].pk, ads[2].pk]
+
+    response = APIClient().get(reverse('ads_list_create'), {'sort': 'trending', 'limit': 1000})
+    assert response.status_code == 400
@@ -0,0 +1,200 @@
+import hashlib
+import http.client
+import io
+import ipaddress
+import logging
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.db.models import F
+
+from .changes import record_changes
+from .models import Ad
+
+
+logger = logging.getLogger(__name__)
+
+
+class ImageError(Exception):
+    pass
+
+
+class PinnedHTTPConnection(http.client.HTTPConnection):
+    """Соединение с заранее проверенным IP-адресом: DNS не опрашивается повторно."""
+
+    def __init__(self, host, address, **kwargs):
+        super().__init__(host, **kwargs)
+        self.address = address
+
+    def connect(self):
+        self.sock = socket.create_connection((self.address, self.port), self.timeout)
+
+
+class PinnedHTTPSConnection(http.client.HTTPSConnection):
+
+    def __init__(self, host, address, **kwargs):
+        self.tls_context = ssl.create_default_context()
+        super().__init__(host, context=self.tls_context, **kwargs)
+        self.address = address
+
+    def connect(self):
+        sock = socket.create_connection((self.address, self.port), self.timeout)
+        self.sock = self.tls_context.wrap_socket(sock, server_hostname=self.host)
+
+
+def public_address(host, port):
+    """
+    Адрес, к которому можно подключиться: все адреса хоста должны быть
+    публичными (или входить в THUMBNAIL_ALLOWED_NETWORKS), иначе ссылка
+    могла бы указывать на localhost, метаданные облака или внутренние сервисы.
+    """
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError) as e:
+        raise ImageError(f'Не удалось найти хост {host}: {e}.')
+    allowed = [ipaddress.ip_network(network) for network in settings.THUMBNAIL_ALLOWED_NETWORKS]
+    addresses = [ipaddress.ip_address(info[4][0]) for info in infos]
+    for address in addresses:
+        if not address.is_global and not any(address in network for network in allowed):
+            raise ImageError(f'Адрес {address} недоступен для загрузки изображений.')
+    return str(addresses[0])
+
+
+def _open(url, deadline):
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ImageError('Поддерживаются только ссылки http и https.')
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    connection_class = PinnedHTTPSConnection if parsed.scheme == 'https' else PinnedHTTPConnection
+    connection = connection_class(
+        parsed.hostname, public_address(parsed.hostname, port), port=port,
+        timeout=min(settings.THUMBNAIL_FETCH_TIMEOUT, max(deadline - time.monotonic(), 0.1)),
+    )
+    path = parsed.path or '/'
+    if parsed.query:
+        path = f'{path}?{parsed.query}'
+    connection.request('GET', path, headers={'User-Agent': 'barter-platform-thumbnailer'})
+    return connection, connection.getresponse()
+
+
+def fetch_image(url):
+    """
+    Скачивает изображение, проверяя адрес, тип содержимого и размер. Переходы
+    по перенаправлениям проверяются так же, как исходная ссылка; на всю загрузку
+    отводится не больше THUMBNAIL_FETCH_DEADLINE секунд.
+    """
+    deadline = time.monotonic() + settings.THUMBNAIL_FETCH_DEADLINE
+    try:
+        for _ in range(settings.THUMBNAIL_MAX_REDIRECTS + 1):
+            connection, response = _open(url, deadline)
+            if response.status not in (301, 302, 303, 307, 308):
+                break
+            location = response.headers.get('Location')
+            connection.close()
+            if not location:
+                raise ImageError('Перенаправление без адреса.')
+            url = urljoin(url, location)
+        else:
+            raise ImageError('Слишком много перенаправлений.')
+
+        try:
+            if response.status != 200:
+                raise ImageError(f'Сервер ответил {response.status}.')
+            content_type = response.headers.get_content_type()
+            if content_type not in settings.THUMBNAIL_ALLOWED_TYPES:
+                raise ImageError(f'Недопустимый тип содержимого: {content_type}.')
+            length = response.headers.get('Content-Length')
+            if length and int(length) > settings.THUMBNAIL_MAX_SOURCE_SIZE:
+                raise ImageError('Изображение слишком большое.')
+
+            chunks, size = [], 0
+            while chunk := response.read(64 * 1024):
+                size += len(chunk)
+                if size > settings.THUMBNAIL_MAX_SOURCE_SIZE:
+                    raise ImageError('Изображение слишком большое.')
+                if time.monotonic() > deadline:
+                    raise ImageError('Изображение загружается слишком долго.')
+                chunks.append(chunk)
+        finally:
+            connection.close()
+    except (OSError, ValueError, http.client.HTTPException) as e:
+        raise ImageError(f'Не удалось загрузить изображение: {e}.')
+    return b''.join(chunks)
+
+
+def make_thumbnail(data):
+    # Pillow нужен только фоновым потокам, не загружаем его при старте воркера.
+    from PIL import Image, UnidentifiedImageError
+
+    Image.MAX_IMAGE_PIXELS = settings.THUMBNAIL_MAX_PIXELS
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            # Размер известен из заголовка файла, до распаковки пикселей.
+            if image.width * image.height > settings.THUMBNAIL_MAX_PIXELS:
+                raise ImageError('Изображение слишком большое.')
+            image.thumbnail(settings.THUMBNAIL_SIZE)
+            output = io.BytesIO()
+            image.convert('RGB').save(output, format='JPEG', quality=80, optimize=True)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImageError(f'Файл не является изображением: {e}.')
+    return output.getvalue()
+
+
+def store_thumbnail(content):
+    """Сохраняет миниатюру по хэшу содержимого; одинаковые картинки хранятся один раз."""
+    digest = hashlib.sha256(content).hexdigest()
+    name = f'thumbnails/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+    return name
+
+
+def process_ad_image(ad_id, url):
+    try:
+        thumbnail = store_thumbnail(make_thumbnail(fetch_image(url)))
+        image_status = 'ready'
+    except ImageError as e:
+        logger.info('Изображение объявления %s отклонено: %s', ad_id, e)
+        thumbnail, image_status = '', 'invalid'
+
+    if Ad.objects.filter(pk=ad_id, image_url=url).update(
+        thumbnail=thumbnail, image_status=image_status, version=F('version') + 1
+    ):
+        record_changes(Ad, [ad_id], 'upsert')
+    return image_status
+
+
+class ThumbnailPipeline:
+    """Пул фоновых потоков, обрабатывающий изображения объявлений."""
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, ad_id, url):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='thumbnails')
+        return self._executor.submit(self._run, ad_id, url)
+
+    @staticmethod
+    def _run(ad_id, url):
+        close_old_connections()
+        try:
+            return process_ad_image(ad_id, url)
+        except Exception:
+            logger.exception('Ошибка обработки изображения объявления %s', ad_id)
+        finally:
+            close_old_connections()
+
+
+pipeline = ThumbnailPipeline(max_workers=settings.THUMBNAIL_WORKERS)
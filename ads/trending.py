@@ -0,0 +1,105 @@
+"""
+Рейтинг «в тренде» — экспоненциально затухающее число полученных
+предложений. Каждое новое предложение добавляет объявлению единицу,
+а команда decay_trending (примерно раз в TRENDING_DECAY_INTERVAL_MINUTES)
+умножает каждый рейтинг на 0.5 ** (прошло / TRENDING_HALF_LIFE_HOURS),
+где «прошло» — реальное время с прошлого затухания этой строки (decayed_at),
+и удаляет строки с рейтингом ниже TRENDING_MIN_SCORE. Пропущенный или
+повторный запуск команды поэтому не искажает рейтинги. Топ объявлений, в том числе
+по категории, читается по индексу таблицы рейтингов без агрегации
+предложений.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Ad, AdTrend, ExchangeProposal
+
+
+def decay_factor(elapsed):
+    return 0.5 ** (elapsed / timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS))
+
+
+def _add(ad_id, weight):
+    return AdTrend.objects.filter(ad_id=ad_id).update(score=F('score') + weight)
+
+
+def record_proposal(ad_id, weight=1.0):
+    """Учитывает полученное предложение в рейтинге объявления."""
+    if _add(ad_id, weight):
+        return
+    category = Ad.objects.filter(pk=ad_id).values_list('category', flat=True).first()
+    if category is None:
+        return
+    try:
+        with transaction.atomic():
+            AdTrend.objects.create(ad_id=ad_id, category=category, score=weight)
+    except IntegrityError:
+        # Строку успел создать параллельный запрос.
+        _add(ad_id, weight)
+
+
+def _decay_batch(last_id, batch_size, now):
+    """
+    Пачка строк блокируется до записи: иначе предложение, учтённое между
+    чтением и записью рейтинга, потерялось бы.
+    """
+    with transaction.atomic():
+        trends = list(
+            AdTrend.objects.filter(ad_id__gt=last_id, decayed_at__lt=now)
+            .select_for_update()
+            .order_by('ad_id')
+            .only('score', 'decayed_at')[:batch_size]
+        )
+        for trend in trends:
+            trend.score *= decay_factor(now - trend.decayed_at)
+            trend.decayed_at = now
+        AdTrend.objects.bulk_update(trends, ['score', 'decayed_at'])
+    return trends
+
+
+def decay(now=None, batch_size=1000):
+    """Затухание всех рейтингов к моменту now. Возвращает (обновлено, удалено)."""
+    now = now or timezone.now()
+    updated = 0
+    last_id = 0
+    while trends := _decay_batch(last_id, batch_size, now):
+        last_id = trends[-1].ad_id
+        updated += len(trends)
+    pruned, _ = AdTrend.objects.filter(score__lt=settings.TRENDING_MIN_SCORE).delete()
+    return updated, pruned
+
+
+def rebuild(now=None):
+    """
+    Пересчитывает рейтинги по предложениям за последние десять периодов
+    полураспада: более старые предложения дают меньше TRENDING_MIN_SCORE.
+    """
+    now = now or timezone.now()
+    half_life = timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+    scores = defaultdict(float)
+    proposals = ExchangeProposal.objects.filter(created_at__gte=now - 10 * half_life)
+    for ad_id, created_at in proposals.values_list('ad_receiver_id', 'created_at').iterator():
+        scores[ad_id] += 0.5 ** ((now - created_at) / half_life)
+
+    categories = dict(Ad.objects.filter(pk__in=scores).values_list('id', 'category'))
+    with transaction.atomic():
+        AdTrend.objects.all().delete()
+        AdTrend.objects.bulk_create(
+            AdTrend(ad_id=ad_id, category=categories[ad_id], score=score, decayed_at=now)
+            for ad_id, score in scores.items()
+            if ad_id in categories and score >= settings.TRENDING_MIN_SCORE
+        )
+    return len(scores)
+
+
+def trending(queryset, category=None):
+    """Объявления выборки с ненулевым рейтингом, от самых популярных."""
+    queryset = queryset.filter(trend__isnull=False)
+    if category:
+        queryset = queryset.filter(trend__category=category)
+    return queryset.order_by('-trend__score', '-id')
@@ -4,11 +4,18 @@ from .views import (
     AdCreateView,
     AdListView,
     AdDetailView,
+    AdLookupView,
     AdUpdateView,
     AdDeleteView,
+    AdRenewView,
+    SavedSearchCreateView,
+    SavedSearchDeleteView,
+    SavedSearchListView,
+    SavedSearchNotificationsAckView,
     ExchangeProposalCreateView,
     ExchangeProposalUpdateView,
     ExchangeProposalView,
+    ExchangeProposalEventsView,
     ExchangeProposalListView,
     ExchangeProposalDeleteView,
 )
@@ -19,11 +26,22 @@ urlpatterns = [
     path('', AdListView.as_view(), name='ad_list' ),
     path('create/', AdCreateView.as_view(), name='ad_form'),
     path('ads/<int:pk>/', AdDetailView.as_view(), name='ad_detail'),
+    path('ads/lookup/', AdLookupView.as_view(), name='ad_lookup'),
     path('<int:pk>/edit/', AdUpdateView.as_view(), name='update_ad'),
     path('<int:pk>/delete/', AdDeleteView.as_view(), name='delete_ad'),
+    path('<int:pk>/renew/', AdRenewView.as_view(), name='renew_ad'),
+    path('searches/', SavedSearchListView.as_view(), name='saved_search_list'),
+    path('searches/create/', SavedSearchCreateView.as_view(), name='saved_search_create'),
+    path('searches/<int:pk>/delete/', SavedSearchDeleteView.as_view(), name='saved_search_delete'),
+    path(
+        'searches/notifications/ack/',
+        SavedSearchNotificationsAckView.as_view(),
+        name='saved_search_notifications_ack',
+    ),
     path('proposals/create/', ExchangeProposalCreateView.as_view(), name='proposal_create'),
     path('proposal/<int:pk>/edit/', ExchangeProposalUpdateView.as_view(), name='proposal_update'),
     path('proposals/<int:pk>/', ExchangeProposalView.as_view(), name='proposal_detail'),
     path('proposals/', ExchangeProposalListView.as_view(), name='proposal_list'),
+    path('proposals/events/', ExchangeProposalEventsView.as_view(), name='proposal_events'),
     path('proposals/<int:pk>/delete/', ExchangeProposalDeleteView.as_view(), name='proposal_delete'),
 ]
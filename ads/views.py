@@ -1,21 +1,51 @@
 from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views import View
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.views.generic import ListView
-from django.views.generic.detail import DetailView
+from django.views.generic.detail import DetailView, SingleObjectMixin
+from django.shortcuts import redirect
 from django.urls import reverse_lazy
 
-from .models import Ad, ExchangeProposal
+from barter_platform.throttling import ThrottleMixin
+
+from .archive import get_proposal_with_archive
+from .concurrency import VersionConflict
+from .events import event_stream, sync_event_stream
+from .fragments import render_ad_fragments, render_proposal_fragments
+from .models import Ad, ExchangeProposal, SavedSearch, get_ad_with_archive
+from .pagination import CountlessPaginator, WindowedPaginator
+from .percolator import acknowledge_notifications, pending_notifications
+from .trending import trending
+from .ownership import OwnedObjectMixin
 from .forms import (
     AdForm,
     ExchangeProposalForm,
     ExchangeProposalStatusForm,
+    SavedSearchForm,
 )
 
 
-class AdCreateView(LoginRequiredMixin, CreateView):
+class VersionConflictMixin:
+    """Если объект изменили, пока форма была открыта, показывает ошибку вместо перезаписи."""
+
+    conflict_message = 'Пока вы редактировали, объект изменили. Обновите страницу и повторите изменения.'
+
+    def form_valid(self, form):
+        try:
+            return super().form_valid(form)
+        except VersionConflict:
+            form.add_error(None, self.conflict_message)
+            return self.form_invalid(form)
+
+
+class AdCreateView(ThrottleMixin, LoginRequiredMixin, CreateView):
     model = Ad
+    throttle_scope = 'ads_create'
     form_class = AdForm
     template_name = 'ads/ad_form.html'
     success_url = reverse_lazy('ads:ad_list')
@@ -31,10 +61,13 @@ class AdListView(ListView):
     context_object_name = 'ads'
     paginate_by = 4
     ordering = ['id']
-
+    sort_orderings = {
+        'popular': [F('received_proposals_count').desc(), '-id'],
+        'activity': [F('last_proposal_at').desc(nulls_last=True), '-id'],
+    }
 
     def get_queryset(self):
-        queryset = Ad.objects.all()
+        queryset = Ad.objects.active()
         query = self.request.GET.get('q')
         if query:
             queryset = queryset.filter(
@@ -50,50 +83,165 @@ class AdListView(ListView):
         if condition:
             queryset = queryset.filter(condition=condition)
 
+        if self.request.GET.get('has_proposals'):
+            queryset = queryset.filter(received_proposals_count__gt=0)
+
+        sort = self.request.GET.get('sort')
+        if sort == 'trending':
+            queryset = trending(queryset, category)
+        elif sort in self.sort_orderings:
+            queryset = queryset.order_by(*self.sort_orderings[sort])
+
         return queryset
 
+    def get_paginator(self, queryset, per_page, **kwargs):
+        if self.request.GET.get('q'):
+            return CountlessPaginator(queryset, per_page, **kwargs)
+        return WindowedPaginator(
+            queryset, per_page, base_queryset=Ad.objects.active(), estimate_relation='ad_active_id_idx', **kwargs
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        categories = Ad.objects.values_list('category', flat=True).distinct()
+        categories = Ad.objects.active().values_list('category', flat=True).distinct()
         unique_categories = set(categories)
         context['categories'] = list(unique_categories)
+        context['ad_cards'] = render_ad_fragments(
+            'card', 'ads/fragments/ad_card.html', context['ads'],
+            vary_on=lambda ad: (ad.received_proposals_count,),
+        )
 
         context['selected_category'] = self.request.GET.get('category', '')
         context['selected_condition'] = self.request.GET.get('condition', '')
+        context['selected_sort'] = self.request.GET.get('sort', '')
+        context['selected_has_proposals'] = self.request.GET.get('has_proposals', '')
 
         return context
 
 
+class AdLookupView(LoginRequiredMixin, View):
+    page_size = 20
+
+    def get(self, request):
+        queryset = Ad.objects.active().exclude(user=request.user).order_by('id')
+
+        query = request.GET.get('q', '').strip()
+        if query:
+            queryset = queryset.filter(title__istartswith=query)
+
+        after = request.GET.get('after')
+        if after and after.isdigit():
+            queryset = queryset.filter(id__gt=after)
+
+        results = list(queryset.values('id', 'title', 'category')[:self.page_size + 1])
+        has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        return JsonResponse({
+            'results': results,
+            'next': results[-1]['id'] if has_next else None,
+        })
+
+
 class AdDetailView(DetailView):
     model = Ad
     template_name = 'ads/ad_detail.html'
     context_object_name = 'ad'
 
+    def get_object(self, queryset=None):
+        ad = get_ad_with_archive(self.kwargs['pk'])
+        if ad is None:
+            raise Http404('Объявление не найдено.')
+        return ad
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        [(_, context['ad_body'])] = render_ad_fragments(
+            'detail', 'ads/fragments/ad_detail.html', [self.object],
+            vary_on=lambda ad: (ad.user.username,),
+        )
+        return context
+
 
-class AdUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class AdUpdateView(LoginRequiredMixin, OwnedObjectMixin, UserPassesTestMixin, VersionConflictMixin, UpdateView):
     model = Ad
+    conflict_message = 'Пока вы редактировали, объявление изменили. Обновите страницу и повторите изменения.'
     form_class = AdForm
     template_name = 'ads/ad_form_update.html'
     success_url = reverse_lazy('ads:ad_list')
 
-    def test_func(self):
-        ad = self.get_object()
-        return self.request.user == ad.user
 
-
-class AdDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class AdDeleteView(LoginRequiredMixin, OwnedObjectMixin, UserPassesTestMixin, DeleteView):
     model = Ad
     template_name = 'ads/ad_confirm_delete.html'
     success_url = reverse_lazy('ads:ad_list')
 
-    def test_func(self):
+
+class AdRenewView(LoginRequiredMixin, OwnedObjectMixin, UserPassesTestMixin, SingleObjectMixin, View):
+    model = Ad
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
         ad = self.get_object()
-        return self.request.user == ad.user
+        ad.renew()
+        return redirect(ad)
 
 
-class ExchangeProposalCreateView(LoginRequiredMixin, CreateView):
+class SavedSearchListView(LoginRequiredMixin, ListView):
+    model = SavedSearch
+    template_name = 'ads/saved_search_list.html'
+    context_object_name = 'searches'
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user).annotate(
+            pending_count=Count('matches', filter=Q(matches__notified_at__isnull=True))
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['notifications'] = pending_notifications(self.request.user, settings.SAVED_SEARCH_NOTIFICATIONS_LIMIT)
+        return context
+
+
+class SavedSearchNotificationsAckView(LoginRequiredMixin, View):
+    """Отмечает показанные уведомления прочитанными: GET списка их не трогает."""
+
+    http_method_names = ['post']
+
+    def post(self, request):
+        try:
+            last_id = int(request.POST['last_id'])
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest('Не указано последнее уведомление.')
+        acknowledge_notifications(request.user, last_id)
+        return redirect('ads:saved_search_list')
+
+
+class SavedSearchCreateView(LoginRequiredMixin, CreateView):
+    model = SavedSearch
+    form_class = SavedSearchForm
+    template_name = 'ads/saved_search_form.html'
+    success_url = reverse_lazy('ads:saved_search_list')
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        return super().form_valid(form)
+
+
+class SavedSearchDeleteView(LoginRequiredMixin, OwnedObjectMixin, UserPassesTestMixin, DeleteView):
+    model = SavedSearch
+    http_method_names = ['post']
+    success_url = reverse_lazy('ads:saved_search_list')
+
+
+class ExchangeProposalCreateView(ThrottleMixin, LoginRequiredMixin, CreateView):
     model = ExchangeProposal
+    throttle_scope = 'proposals_create'
     form_class = ExchangeProposalForm
     template_name = 'proposals/proposal_form.html'
     success_url = reverse_lazy('ads:proposal_list')
@@ -107,15 +255,17 @@ class ExchangeProposalCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class ExchangeProposalUpdateView(LoginRequiredMixin, UpdateView):
+class ExchangeProposalUpdateView(LoginRequiredMixin, OwnedObjectMixin, VersionConflictMixin, UpdateView):
     model = ExchangeProposal
+    conflict_message = 'Пока вы редактировали, предложение изменили. Обновите страницу и повторите изменения.'
     form_class = ExchangeProposalStatusForm
     template_name = 'proposals/proposal_form_update.html'
     success_url = reverse_lazy('ads:ad_list')
+    owner_field = 'ad_receiver__user'
 
     def get_object(self, queryset=None):
         obj = super().get_object(queryset)
-        if obj.ad_receiver.user != self.request.user:
+        if not obj.is_owner:
             raise PermissionDenied('Вы не можете менять статус этого предложения.')
         return obj
 
@@ -126,7 +276,7 @@ class ExchangeProposalListView(ListView):
     context_object_name = 'proposals'
 
     def get_queryset(self):
-        queryset = ExchangeProposal.objects.all()
+        queryset = ExchangeProposal.objects.select_related('ad_sender', 'ad_receiver')
 
         ad_sender = self.request.GET.get('ad_sender')
         if ad_sender:
@@ -150,6 +300,10 @@ class ExchangeProposalListView(ListView):
         context['ad_senders'] = [str(sender) for sender in senders if sender]
         context['ad_receivers'] = [str(receiver) for receiver in receivers if receiver]
 
+        context['proposal_rows'] = render_proposal_fragments(
+            'row', 'proposals/fragments/proposal_row.html', context['proposals'],
+        )
+
         context['selected_sender'] = self.request.GET.get('ad_sender', '')
         context['selected_status'] = self.request.GET.get('status', '')
         context['selected_receiver'] = self.request.GET.get('ad_receiver', '')
@@ -157,18 +311,37 @@ class ExchangeProposalListView(ListView):
         return context
 
 
+class ExchangeProposalEventsView(View):
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+        stream = event_stream if isinstance(request, ASGIRequest) else sync_event_stream
+        response = StreamingHttpResponse(stream(user.pk), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
 class ExchangeProposalView(DetailView):
     model = ExchangeProposal
     template_name = 'proposals/proposal_detail.html'
     context_object_name = 'proposal'
 
+    def get_object(self, queryset=None):
+        proposal = get_proposal_with_archive(self.kwargs['pk'])
+        if proposal is None:
+            raise Http404('Предложение не найдено.')
+        return proposal
+
 
-class ExchangeProposalDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class ExchangeProposalDeleteView(LoginRequiredMixin, OwnedObjectMixin, UserPassesTestMixin, DeleteView):
     model = ExchangeProposal
     template_name = 'proposals/proposal_confirm_delete.html'
     context_object_name = 'proposal'
     success_url = reverse_lazy('ads:proposal_list')
+    owner_field = 'ad_sender__user'
 
-    def test_func(self):
-        proposal = self.get_object()
-        return self.request.user == proposal.ad_sender.user
+    def get_queryset(self):
+        return super().get_queryset().select_related('ad_receiver')
@@ -0,0 +1,27 @@
+from django import forms
+from django.urls import reverse_lazy
+
+from .models import Ad
+
+
+class AdAutocompleteWidget(forms.Widget):
+    """
+    Поле поиска объявления с подсказками с сервера. В отличие от Select
+    не выводит список всех объявлений: загружает только заголовок выбранного.
+    """
+
+    template_name = 'ads/widgets/ad_autocomplete.html'
+
+    def __init__(self, lookup_url=reverse_lazy('ads:ad_lookup'), attrs=None):
+        super().__init__(attrs)
+        self.lookup_url = lookup_url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        label = ''
+        if value:
+            title = Ad.objects.filter(pk=value).values_list('title', flat=True).first()
+            if title is not None:
+                label = f'{title} (#{value})'
+        context['widget'].update({'lookup_url': self.lookup_url, 'label': label})
+        return context
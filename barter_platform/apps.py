@@ -0,0 +1,23 @@
+from django.contrib.admin.apps import SimpleAdminConfig
+from django.contrib.admin.checks import check_admin_app, check_dependencies
+from django.core import checks
+
+
+def check_lazy_admin_app(app_configs, **kwargs):
+    """Модули admin.py загружаются лениво, поэтому перед проверкой ModelAdmin их нужно найти."""
+    from django.contrib import admin
+
+    admin.autodiscover()
+    return check_admin_app(app_configs, **kwargs)
+
+
+class LazyAdminConfig(SimpleAdminConfig):
+    """
+    Админка без autodiscover при старте: модули admin.py загружаются при первом
+    обращении к /admin/ (см. barter_platform.urls) или при запуске системных
+    проверок, чтобы manage.py check по-прежнему проверял ModelAdmin.
+    """
+
+    def ready(self):
+        checks.register(check_dependencies, checks.Tags.admin)
+        checks.register(check_lazy_admin_app, checks.Tags.admin)
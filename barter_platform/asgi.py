@@ -2,6 +2,9 @@
 ASGI config for barter_platform project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Server-Sent Events connections (``ads:proposal_events``) do not hold a worker
+thread when the project is served through this module by an ASGI server; under
+WSGI each open stream occupies a thread for up to PROPOSAL_EVENTS_MAX_DURATION.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,133 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .throttling import get_client_ip
+
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    name='Idempotency-Key',
+    type=OpenApiTypes.STR,
+    location=OpenApiParameter.HEADER,
+    required=False,
+    description='Повтор запроса с тем же ключом вернёт первый ответ, не выполняя его заново',
+)
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def idempotency_scope(request):
+    """
+    Чьи ключи не должны пересекаться: пользователь или, для анонимных
+    запросов (регистрация), IP клиента — по тем же правилам, что и в throttling.
+    """
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{get_client_ip(request)}'
+
+
+def idempotency_cache_key(scope, method, path, key):
+    digest = hashlib.sha256(f'{scope}:{method}:{path}:{key}'.encode()).hexdigest()
+    return f'idempotency:{digest}'
+
+
+def _pack(response, fingerprint):
+    payload = json.dumps([response.status_code, response.data, fingerprint], cls=JSONEncoder)
+    return zlib.compress(payload.encode())
+
+
+def _replay(stored, fingerprint):
+    status_code, data, stored_fingerprint = json.loads(zlib.decompress(stored))
+    if stored_fingerprint != fingerprint:
+        return Response(
+            {'detail': 'Ключ идемпотентности уже использован с другим запросом.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(data, status=status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+def _wait_for_result(cache_key):
+    with _in_flight_lock:
+        event = _in_flight.get(cache_key)
+    if event is not None:
+        event.wait(settings.IDEMPOTENCY_LOCK_TIMEOUT)
+        return cache.get(cache_key)
+
+    deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return stored
+        time.sleep(0.05)
+    return None
+
+
+def idempotent(view_method):
+    """
+    Обрабатывает заголовок Idempotency-Key у POST-методов APIView.
+    Первый ответ сохраняется в кэше в сжатом виде и отдаётся при повторах;
+    одновременные дубликаты ждут завершения первого запроса.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {'detail': 'Ключ идемпотентности слишком длинный.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = idempotency_cache_key(idempotency_scope(request), request.method, request.path, key)
+        lock_key = f'{cache_key}:lock'
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        if not cache.add(lock_key, 1, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            stored = _wait_for_result(cache_key)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+            return Response(
+                {'detail': 'Запрос с этим ключом идемпотентности ещё выполняется.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        # Первый запрос мог сохранить ответ и снять блокировку между проверкой
+        # выше и cache.add: тогда его ответ уже в кэше и выполнять запрос нельзя.
+        stored = cache.get(cache_key)
+        if stored is not None:
+            cache.delete(lock_key)
+            return _replay(stored, fingerprint)
+
+        event = threading.Event()
+        with _in_flight_lock:
+            _in_flight[cache_key] = event
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code < 500:
+                cache.set(cache_key, _pack(response, fingerprint), settings.IDEMPOTENCY_KEY_TIMEOUT)
+            return response
+        finally:
+            cache.delete(lock_key)
+            with _in_flight_lock:
+                _in_flight.pop(cache_key, None)
+            event.set()
+
+    return wrapper
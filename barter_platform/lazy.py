@@ -0,0 +1,46 @@
+import threading
+
+from django.urls import URLResolver
+from django.urls.resolvers import RoutePattern
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+
+def lazy_view(view_path, **initkwargs):
+    """Представление-класс импортируется при первом запросе, а не при загрузке urlconf."""
+    view = None
+    lock = threading.Lock()
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            with lock:
+                if view is None:
+                    view = import_string(view_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class LazyURLConf:
+    """urlconf, маршруты которого строятся при первом обращении к ним."""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    @cached_property
+    def urlpatterns(self):
+        return self._loader()
+
+
+def lazy_include(route, loader, namespace):
+    """
+    Аналог include() для тяжёлых разделов сайта. Маршруты должны быть в
+    пространстве имён: тогда reverse() в других разделах их не загружает.
+    """
+    return URLResolver(
+        RoutePattern(route, is_endpoint=False),
+        LazyURLConf(loader),
+        app_name=namespace,
+        namespace=namespace,
+    )
@@ -0,0 +1,111 @@
+import gzip
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.views import View
+
+
+FORMATS = {
+    'yaml': 'application/vnd.oai.openapi',
+    'json': 'application/vnd.oai.openapi+json',
+}
+
+
+class SchemaDocument:
+    __slots__ = ('content', 'compressed', 'etag')
+
+    def __init__(self, content, compressed=None):
+        self.content = content
+        self.compressed = compressed if compressed is not None else gzip.compress(content, mtime=0)
+        self.etag = '"{}"'.format(hashlib.sha256(content).hexdigest()[:32])
+
+
+_documents = {}
+_lock = threading.Lock()
+
+
+def render_schema():
+    """Генерирует схему по коду представлений во всех форматах."""
+    from drf_spectacular.generators import SchemaGenerator
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return {
+        'yaml': OpenApiYamlRenderer().render(schema, renderer_context={}),
+        'json': OpenApiJsonRenderer().render(schema, renderer_context={}),
+    }
+
+
+def schema_path(fmt):
+    return settings.SCHEMA_ROOT / f'openapi.{fmt}'
+
+
+def write_schema(rendered):
+    settings.SCHEMA_ROOT.mkdir(parents=True, exist_ok=True)
+    for fmt, content in rendered.items():
+        document = SchemaDocument(content)
+        schema_path(fmt).write_bytes(document.content)
+        schema_path(fmt).with_suffix(f'.{fmt}.gz').write_bytes(document.compressed)
+
+
+def stale_formats(rendered):
+    """Форматы, у которых сохранённая схема отсутствует или не совпадает с кодом."""
+    stale = []
+    for fmt, content in rendered.items():
+        path = schema_path(fmt)
+        if not path.exists() or path.read_bytes() != content:
+            stale.append(fmt)
+    return stale
+
+
+def _load_documents():
+    paths = {fmt: schema_path(fmt) for fmt in FORMATS}
+    if all(path.exists() for path in paths.values()):
+        documents = {}
+        for fmt, path in paths.items():
+            compressed_path = path.with_suffix(f'.{fmt}.gz')
+            compressed = compressed_path.read_bytes() if compressed_path.exists() else None
+            documents[fmt] = SchemaDocument(path.read_bytes(), compressed)
+        return documents
+    return {fmt: SchemaDocument(content) for fmt, content in render_schema().items()}
+
+
+def get_document(fmt):
+    """
+    Схема берётся из SCHEMA_ROOT (см. команду build_schema), а если её там нет —
+    генерируется один раз за время жизни процесса.
+    """
+    if not _documents:
+        with _lock:
+            if not _documents:
+                _documents.update(_load_documents())
+    return _documents[fmt]
+
+
+def clear():
+    with _lock:
+        _documents.clear()
+
+
+class CachedSchemaView(View):
+    """Отдаёт готовую схему OpenAPI с ETag и заранее сжатой gzip-версией."""
+
+    def get(self, request):
+        fmt = 'yaml'
+        if request.GET.get('format') == 'json' or 'json' in request.headers.get('Accept', ''):
+            fmt = 'json'
+        document = get_document(fmt)
+
+        if request.headers.get('If-None-Match') == document.etag:
+            response = HttpResponseNotModified()
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(document.compressed, content_type=FORMATS[fmt])
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(document.content, content_type=FORMATS[fmt])
+        response['ETag'] = document.etag
+        patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+        return response
@@ -25,12 +25,13 @@ ALLOWED_HOSTS = ['*']
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    'barter_platform.apps.LazyAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.forms',
     'ads',
     'accounts',
     'drf_spectacular',
@@ -39,6 +40,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'barter_platform.slow_queries.SlowQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,6 +66,8 @@ TEMPLATES = [
     },
 ]
 
+FORM_RENDERER = 'django.forms.renderers.TemplatesSetting'
+
 WSGI_APPLICATION = 'barter_platform.wsgi.application'
 
 
@@ -82,6 +86,34 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': env.str('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env.str('CACHE_LOCATION', ''),
+    },
+}
+
+SESSION_ENGINE = 'accounts.sessions'
+
+SESSION_CACHE_LOCAL_SIZE = 10000
+SESSION_CACHE_LOCAL_TIMEOUT = 5
+
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.CachedModelBackend',
+]
+
+USER_CACHE_TIMEOUT = 60 * 15
+USER_CACHE_LOCAL_SIZE = 10000
+USER_CACHE_LOCAL_TIMEOUT = 5
+
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+FRAGMENT_CACHE_LOCAL_SIZE = 5000
+FRAGMENT_CACHE_LOCAL_TIMEOUT = 60 * 5
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -118,6 +150,20 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+THUMBNAIL_SIZE = (320, 320)
+THUMBNAIL_WORKERS = 4
+THUMBNAIL_FETCH_TIMEOUT = 5
+THUMBNAIL_FETCH_DEADLINE = 15
+THUMBNAIL_MAX_REDIRECTS = 3
+THUMBNAIL_MAX_PIXELS = 40_000_000
+# Непубличные сети, из которых всё же можно загружать изображения (например, локальный CDN).
+THUMBNAIL_ALLOWED_NETWORKS = []
+THUMBNAIL_MAX_SOURCE_SIZE = 5 * 1024 * 1024
+THUMBNAIL_ALLOWED_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -131,10 +177,85 @@ REST_FRAMEWORK = {
             'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'barter_platform.throttling.TokenBucketThrottle',
+    ],
+}
+
+THROTTLE_RATES = {
+    'ads_create': '20/min',
+    'proposals_create': '30/min',
+    'registration': '5/min',
+    'ip': '300/min',
 }
+THROTTLE_MAX_BUCKETS = 100000
+THROTTLE_SYNC_INTERVAL = env.float('THROTTLE_SYNC_INTERVAL', None)
+THROTTLE_TRUST_X_FORWARDED_FOR = False
+
+CHANGELOG_RETENTION_DAYS = 30
+CHANGES_FEED_PAGE_SIZE = 500
+# Записи журнала моложе этого числа секунд в ленту не отдаются: id выдаются при
+# вставке, а транзакции фиксируются в другом порядке, и запись с меньшим id может
+# стать видимой позже курсора клиента.
+CHANGES_FEED_SAFETY_LAG = 5
+
+AD_LIFETIME_DAYS = 30
+
+# Поиск почти одинаковых объявлений: при 64 числах в 16 полосах кандидатами
+# становятся пары со сходством примерно от 0.5, дубликатами — от DEDUP_THRESHOLD.
+DEDUP_NUM_PERM = 64
+DEDUP_BANDS = 16
+DEDUP_THRESHOLD = 0.7
+DEDUP_MAX_CANDIDATES = 200
+DEDUP_REJECT = False
+
+SAVED_SEARCHES_PER_USER = 20
+SAVED_SEARCH_NOTIFICATIONS_LIMIT = 50
+
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_DECAY_INTERVAL_MINUTES = 60
+TRENDING_MIN_SCORE = 0.01
+TRENDING_API_LIMIT = 20
+
+ARCHIVE_PROPOSALS_AFTER_DAYS = 90
+ARCHIVE_ADS_AFTER_DAYS = 180
+
+API_MAX_IDS_PER_REQUEST = 100
+
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+
+USER_SUMMARY_CACHE_TIMEOUT = 60 * 5
+
+IDEMPOTENCY_KEY_TIMEOUT = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+
+# Журнал медленных запросов (страница /debug/slow-queries/ для суперпользователей).
+# None (SLOW_QUERY_LOG=false в окружении) отключает замеры. На PostgreSQL к запросу
+# прикладывается план EXPLAIN; EXPLAIN ANALYZE выполняет запрос ещё раз в рамках
+# того же HTTP-запроса и включается отдельно. Параметры запросов не сохраняются,
+# только их типы, а для таблиц с учётными данными не строится и план: в нём видны значения.
+SLOW_QUERY_THRESHOLD_MS = env.float('SLOW_QUERY_THRESHOLD_MS', 200) if env.bool('SLOW_QUERY_LOG', True) else None
+SLOW_QUERY_EXPLAIN_ANALYZE = env.bool('SLOW_QUERY_EXPLAIN_ANALYZE', False)
+SLOW_QUERY_SENSITIVE_TABLES = ['auth_user', 'django_session']
+SLOW_QUERY_SAMPLE_RATE = env.float('SLOW_QUERY_SAMPLE_RATE', 1.0)
+SLOW_QUERY_LOG_SIZE = 200
+SLOW_QUERY_EXPLAIN_INTERVAL = 60
+SLOW_QUERY_STACK_DEPTH = 8
+
+PAGINATION_ESTIMATE_THRESHOLD = 10000
+PAGINATION_COUNT_CACHE_TIMEOUT = 60
+
+PROPOSAL_EVENTS_BROKER = env.str('PROPOSAL_EVENTS_BROKER', 'ads.events.PostgresBroker')
+PROPOSAL_EVENTS_QUEUE_SIZE = 100
+PROPOSAL_EVENTS_HEARTBEAT = 25
+PROPOSAL_EVENTS_RETRY = 5
+PROPOSAL_EVENTS_MAX_DURATION = 60
 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Barter system API',
     'VERSION': '0.0.1',
     'SERVE_INCLUDE_SCHEMA': False,
 }
+
+SCHEMA_ROOT = BASE_DIR / 'schema'
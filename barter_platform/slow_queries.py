@@ -0,0 +1,247 @@
+"""
+Журнал медленных SQL-запросов. SlowQueryMiddleware на время запроса
+оборачивает все соединения с БД (connection.execute_wrapper) и записывает
+запросы дольше SLOW_QUERY_THRESHOLD_MS: нормализованный SQL, типы параметров,
+представление, стек вызовов в коде проекта и, на PostgreSQL, план EXPLAIN
+(с SLOW_QUERY_EXPLAIN_ANALYZE — EXPLAIN (ANALYZE, BUFFERS)). Записи попадают
+в лог и в кольцевой буфер процесса, который показывает страница для
+суперпользователей.
+"""
+import logging
+import random
+import re
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections, transaction
+from django.views.generic import TemplateView
+
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+WHITESPACE = re.compile(r'\s+')
+LOCKING_CLAUSE = re.compile(r'\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE)\b|\bFOR\s+KEY\s+SHARE\b', re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    """Запрос без литералов и длины списков IN: одинаковые запросы сводятся в одну строку."""
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def project_stack(limit):
+    """Последние кадры стека из кода проекта, без Django и сторонних пакетов."""
+    root = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(root) and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+    return [f'{frame.filename.removeprefix(root)}:{frame.lineno} in {frame.name}' for frame in frames[-limit:]]
+
+
+def touches_sensitive_table(sql):
+    return any(f'"{table}"' in sql for table in settings.SLOW_QUERY_SENSITIVE_TABLES)
+
+
+def explain_options(sql):
+    """
+    ANALYZE выполняет запрос повторно, поэтому применяется только к чтению без
+    блокировок строк и только с SLOW_QUERY_EXPLAIN_ANALYZE; иначе запрос лишь планируется.
+    """
+    if (
+        settings.SLOW_QUERY_EXPLAIN_ANALYZE
+        and sql.lstrip()[:6].upper() == 'SELECT'
+        and not LOCKING_CLAUSE.search(sql)
+    ):
+        return '(ANALYZE, BUFFERS)'
+    return ''
+
+
+class SlowQuery:
+    __slots__ = ('sql', 'normalized', 'params', 'duration', 'view', 'stack', 'plan', 'alias', 'recorded_at')
+
+    def __init__(self, sql, normalized, params, duration, view, stack, plan, alias):
+        self.sql = sql
+        self.normalized = normalized
+        self.params = params
+        self.duration = duration
+        self.view = view
+        self.stack = stack
+        self.plan = plan
+        self.alias = alias
+        self.recorded_at = time.time()
+
+
+class SlowQueryLog:
+    """
+    Кольцевой буфер последних медленных запросов процесса. Для каждого
+    нормализованного запроса EXPLAIN выполняется не чаще explain_interval секунд.
+    """
+
+    def __init__(self, size=200, explain_interval=60, clock=time.monotonic):
+        self.explain_interval = explain_interval
+        self.clock = clock
+        self._entries = deque(maxlen=size)
+        self._explained = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def should_explain(self, normalized):
+        now = self.clock()
+        with self._lock:
+            last = self._explained.get(normalized)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            self._explained[normalized] = now
+            self._explained.move_to_end(normalized)
+            if len(self._explained) > self._entries.maxlen:
+                self._explained.popitem(last=False)
+            return True
+
+    def entries(self):
+        with self._lock:
+            return list(self._entries)
+
+    def worst(self, order='total'):
+        """Запросы, сгруппированные по нормализованному SQL, от самых затратных."""
+        groups = {}
+        for entry in self.entries():
+            group = groups.setdefault(entry.normalized, {
+                'normalized': entry.normalized, 'count': 0, 'total': 0.0, 'max': 0.0, 'views': set(),
+                'example': entry, 'plan': None,
+            })
+            group['count'] += 1
+            group['total'] += entry.duration
+            group['views'].add(entry.view)
+            if entry.duration >= group['max']:
+                group['max'] = entry.duration
+                group['example'] = entry
+            group['plan'] = entry.plan or group['plan']
+        for group in groups.values():
+            group['avg'] = group['total'] / group['count']
+            group['views'] = sorted(filter(None, group['views']))
+        return sorted(groups.values(), key=lambda group: group[order], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._explained.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+slow_log = SlowQueryLog(settings.SLOW_QUERY_LOG_SIZE, settings.SLOW_QUERY_EXPLAIN_INTERVAL)
+
+
+class SlowQueryRecorder:
+    """execute_wrapper одного HTTP-запроса: замеряет SQL и записывает медленные."""
+
+    _local = threading.local()
+
+    def __init__(self, log, threshold, sample_rate=1.0):
+        self.log = log
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.view = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self._local, 'explaining', False):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = (time.perf_counter() - start) * 1000
+        if duration >= self.threshold and random.random() < self.sample_rate:
+            self.record(sql, params, many, context['connection'], duration)
+        return result
+
+    def record(self, sql, params, many, connection, duration):
+        normalized = normalize_sql(sql)
+        plan = None
+        if (
+            not many and connection.vendor == 'postgresql' and not touches_sensitive_table(sql)
+            and self.log.should_explain(normalized)
+        ):
+            plan = self.explain(connection, sql, params)
+        # Значения параметров (ключи сессий, хэши паролей, адреса) не сохраняются.
+        entry = SlowQuery(
+            sql=sql,
+            normalized=normalized,
+            params=None if many else [type(param).__name__ for param in params or ()],
+            duration=duration,
+            view=self.view,
+            stack=project_stack(settings.SLOW_QUERY_STACK_DEPTH),
+            plan=plan,
+            alias=connection.alias,
+        )
+        self.log.add(entry)
+        logger.warning('Медленный запрос %.1f мс (%s): %s', duration, self.view or '-', normalized)
+
+    def explain(self, connection, sql, params):
+        # Ошибка EXPLAIN откатывает лишь свою точку сохранения.
+        options = explain_options(sql)
+        self._local.explaining = True
+        try:
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN {options} {sql}', params)
+                return '\n'.join(row[0] for row in cursor.fetchall())
+        except DatabaseError as e:
+            return f'EXPLAIN не выполнен: {e}'
+        finally:
+            self._local.explaining = False
+
+
+class SlowQueryMiddleware:
+
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_THRESHOLD_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = SlowQueryRecorder(slow_log, settings.SLOW_QUERY_THRESHOLD_MS, settings.SLOW_QUERY_SAMPLE_RATE)
+        request._slow_query_recorder = recorder
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = getattr(request, '_slow_query_recorder', None)
+        if recorder is not None:
+            recorder.view = request.resolver_match.view_name or request.resolver_match._func_path
+
+
+class SlowQueryView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    template_name = 'slow_queries.html'
+    orders = {'total': 'Суммарное время', 'max': 'Максимальное время', 'count': 'Число запросов'}
+
+    def test_func(self):
+        return self.request.user.is_superuser
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        order = self.request.GET.get('order')
+        if order not in self.orders:
+            order = 'total'
+        context['order'] = order
+        context['orders'] = self.orders
+        context['groups'] = slow_log.worst(order)
+        context['threshold'] = settings.SLOW_QUERY_THRESHOLD_MS
+        return context
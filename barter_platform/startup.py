@@ -0,0 +1,82 @@
+"""
+Замер холодного запуска. Запускается отдельным процессом с -X importtime
+(см. команду profile_startup): печатает в stdout JSON со временем
+AppConfig.ready каждого приложения и импорта корневого urlconf.
+"""
+import json
+import re
+import sys
+import time
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def parse_importtime(output):
+    """Строки -X importtime -> {модуль: собственное время импорта в микросекундах}."""
+    timings = {}
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(1))
+    return timings
+
+
+def app_module(entry):
+    """'django.contrib.admin.apps.SimpleAdminConfig' -> 'django.contrib.admin'."""
+    if '.apps.' in entry:
+        return entry.split('.apps.')[0]
+    return entry
+
+
+def import_cost(timings, module):
+    """Суммарное собственное время импорта пакета и всех его подмодулей, мс."""
+    prefix = f'{module}.'
+    return sum(
+        self_time for name, self_time in timings.items() if name == module or name.startswith(prefix)
+    ) / 1000
+
+
+def main():
+    from django.apps import AppConfig
+
+    ready_timings = {}
+    app_names = {}
+    original_create = AppConfig.create.__func__
+
+    def create(cls, entry):
+        config = original_create(cls, entry)
+        app_names[entry] = config.name
+        ready = config.ready
+
+        def timed_ready():
+            started = time.perf_counter()
+            ready()
+            ready_timings[config.name] = (time.perf_counter() - started) * 1000
+
+        config.ready = timed_ready
+        return config
+
+    AppConfig.create = classmethod(create)
+
+    started = time.perf_counter()
+    import django
+    django.setup()
+    setup_time = (time.perf_counter() - started) * 1000
+
+    from django.conf import settings
+    started = time.perf_counter()
+    __import__(settings.ROOT_URLCONF)
+    urlconf_time = (time.perf_counter() - started) * 1000
+
+    json.dump({
+        'installed_apps': list(settings.INSTALLED_APPS),
+        'app_names': app_names,
+        'ready': ready_timings,
+        'setup': setup_time,
+        'urlconf': urlconf_time,
+        'modules': sorted(sys.modules),
+    }, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
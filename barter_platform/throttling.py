@@ -0,0 +1,191 @@
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.throttling import BaseThrottle
+
+
+DURATIONS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'30/min' -> (ёмкость корзины, пополнение в секунду)."""
+    count, period = rate.split('/')
+    capacity = int(count)
+    return capacity, capacity / DURATIONS[period]
+
+
+class TokenBucket:
+    __slots__ = ('tokens', 'updated', 'synced', 'syncing', 'pending', 'reported', 'elsewhere', 'window')
+
+    def __init__(self, capacity, now):
+        self.tokens = float(capacity)
+        self.updated = now
+        self.synced = now
+        self.syncing = False
+        self.pending = 0
+        self.reported = 0
+        self.elsewhere = 0
+        self.window = None
+
+
+class TokenBucketEngine:
+    """
+    Корзины токенов в памяти процесса. Число корзин ограничено: давно не
+    использованные вытесняются, что равносильно полной корзине. При заданном
+    sync_interval расход периодически суммируется в общем кэше, и каждый
+    процесс учитывает токены, потраченные другими. Обращение к кэшу идёт без
+    блокировки движка: под ней только снимается и затем учитывается расход.
+    """
+
+    def __init__(self, max_buckets=100000, sync_interval=None, clock=time.monotonic):
+        self.max_buckets = max_buckets
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate):
+        """Возвращает 0, если запрос разрешён, иначе время ожидания в секундах."""
+        capacity, refill = parse_rate(rate)
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(capacity, now)
+                if len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated) * refill)
+                bucket.updated = now
+
+            if bucket.tokens < 1:
+                return (1 - bucket.tokens) / refill
+            bucket.tokens -= 1
+            bucket.pending += 1
+
+            pending = 0
+            if (
+                self.sync_interval is not None and not bucket.syncing
+                and now - bucket.synced >= self.sync_interval
+            ):
+                pending, bucket.pending = bucket.pending, 0
+                bucket.synced = now
+                bucket.syncing = True
+
+        if pending:
+            self._sync(key, bucket, pending, capacity, refill)
+        return 0
+
+    def refund(self, key, rate):
+        """
+        Возвращает токен, списанный consume, если запрос отклонила другая
+        корзина. Уже отправленный в общий кэш расход не уменьшается.
+        """
+        capacity, _ = parse_rate(rate)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.tokens = min(capacity, bucket.tokens + 1)
+                bucket.pending = max(0, bucket.pending - 1)
+
+    def _sync(self, key, bucket, pending, capacity, refill):
+        window_length = capacity / refill
+        window = int(time.time() // window_length)
+        total = _add_shared(f'throttle:{key}:{window}', pending, int(window_length * 2) + 1)
+
+        with self._lock:
+            bucket.syncing = False
+            if total is None:
+                bucket.pending += pending
+                return
+            if window != bucket.window:
+                bucket.window, bucket.reported, bucket.elsewhere = window, 0, 0
+            bucket.reported += pending
+            consumed_elsewhere = total - bucket.reported
+            bucket.tokens = max(0.0, bucket.tokens - (consumed_elsewhere - bucket.elsewhere))
+            bucket.elsewhere = consumed_elsewhere
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+def _add_shared(shared_key, delta, timeout):
+    """Прибавляет delta к счётчику окна в общем кэше; None, если кэш недоступен."""
+    for _ in range(2):
+        cache.add(shared_key, 0, timeout)
+        try:
+            return cache.incr(shared_key, delta)
+        except ValueError:
+            # Ключ вытеснили или он истёк между add и incr: создаём заново.
+            continue
+    return None
+
+
+engine = TokenBucketEngine(
+    max_buckets=settings.THROTTLE_MAX_BUCKETS,
+    sync_interval=settings.THROTTLE_SYNC_INTERVAL,
+)
+
+
+def get_client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded and settings.THROTTLE_TRUST_X_FORWARDED_FOR:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def throttle_wait(request, scope):
+    """Проверяет корзины эндпоинта по пользователю (или IP) и по IP."""
+    ip = get_client_ip(request)
+    user = request.user
+    ident = f'user:{user.pk}' if user.is_authenticated else f'ip:{ip}'
+
+    scope_key = f'{scope}:{ident}'
+    wait = engine.consume(scope_key, settings.THROTTLE_RATES[scope])
+    if not wait:
+        wait = engine.consume(f'ip:{ip}', settings.THROTTLE_RATES['ip'])
+        if wait:
+            # Запрос отклонён по IP и не выполнится: лимит эндпоинта не тратится.
+            engine.refund(scope_key, settings.THROTTLE_RATES[scope])
+    return wait
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle для DRF: область задаётся атрибутом throttle_scope представления."""
+
+    methods = ('POST',)
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None or request.method not in self.methods:
+            return True
+        self._wait = throttle_wait(request, scope)
+        return not self._wait
+
+    def wait(self):
+        return self._wait
+
+
+class ThrottleMixin:
+    """Ограничение частоты запросов для обычных (не DRF) представлений."""
+
+    throttle_scope = None
+    throttle_methods = ('POST',)
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.throttle_scope and request.method in self.throttle_methods:
+            wait = throttle_wait(request, self.throttle_scope)
+            if wait:
+                response = HttpResponse('Слишком много запросов. Попробуйте позже.', status=429)
+                response['Retry-After'] = str(math.ceil(wait))
+                return response
+        return super().dispatch(request, *args, **kwargs)
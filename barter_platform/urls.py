@@ -1,15 +1,32 @@
-from django.contrib import admin
+from django.conf import settings
+from django.conf.urls.static import static
 from django.urls import path, include
 
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from .lazy import lazy_include, lazy_view
+from .slow_queries import SlowQueryView
 
+
+def admin_urls():
+    from django.contrib import admin
+
+    admin.autodiscover()
+    return admin.site.get_urls()
+
+
+# Админка и документация API нужны редко, поэтому загружаются при первом
+# обращении к ним, а не при старте каждого воркера (см. profile_startup).
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    lazy_include('admin/', admin_urls, namespace='admin'),
+    path('api/schema/', lazy_view('barter_platform.schema.CachedSchemaView'), name='schema'),
+    path(
+        'api/docs/',
+        lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'),
+        name='swagger-ui',
+    ),
+    path('debug/slow-queries/', SlowQueryView.as_view(), name='slow_queries'),
     path('auth/', include('accounts.api_urls')),
     path('api/', include('ads.api_urls')),
     path('', include('ads.urls', namespace='ads')),
     path('accounts/', include('accounts.urls')),
     path('accounts/', include('django.contrib.auth.urls')),
-]
+] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)